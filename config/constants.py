@@ -16,6 +16,60 @@ CONFIG_FILE_NAME = "app_config.ini"        # Nome do ficheiro de configuração
 CONFIG_SECTION_UPDATE = "UpdateSettings"   # Nome da seção para configurações de atualização
 CONFIG_KEY_LAST_CHECK = "last_update_check_timestamp" # Chave para o timestamp da última verificação
 
+# --- Configurações da API (API Gateway) ---
+# URL base do API Gateway (incluindo o estágio, ex: /dev), partilhada por todos os serviços de API.
+API_GATEWAY_BASE_URL = "https://p55kko7yc6.execute-api.sa-east-1.amazonaws.com/dev"
+API_DEFAULT_TIMEOUT = 15          # Timeout padrão (segundos) das requisições à API
+API_POOL_CONNECTIONS = 4          # Número de pools de conexão mantidos pelo HTTPAdapter (um por host)
+API_POOL_MAXSIZE = 10             # Conexões keep-alive reutilizáveis por host (deve cobrir os workers em paralelo)
+HTTP_CACHE_MAX_BYTES = 32 * 1024 * 1024  # Limite do cache de GETs condicionais (ETag), em bytes de corpo guardado
+HTTP_CACHE_MAX_ENTRIES = 64       # Limite de URLs distintas no cache (LRU)
+LIST_PAGE_SIZE = 500              # Registos por página nas listagens paginadas (limit/cursor)
+API_HTTP2_ENABLED = False         # HTTP/2 multiplexado (requer 'httpx[http2]'); ou a variável de ambiente ADVOCACIA_HTTP2=1
+API_RETRY_MAX_ATTEMPTS = 3        # Tentativas (incluindo a primeira) dos pedidos idempotentes com falha passageira
+API_RETRY_BASE_DELAY_SECONDS = 0.5  # Base do backoff exponencial com jitter entre tentativas
+API_RETRY_MAX_DELAY_SECONDS = 8   # Teto do backoff entre tentativas
+API_RETRY_AFTER_MAX_SECONDS = 30  # Teto da espera pedida pelo servidor no header Retry-After
+API_BREAKER_FAILURE_THRESHOLD = 5 # Falhas seguidas de um endpoint que abrem o circuito (falha imediata)
+API_BREAKER_RESET_SECONDS = 30    # Tempo com o circuito aberto antes de um pedido de teste
+API_LATENCY_WINDOW = 200          # Latências recentes guardadas por endpoint (percentis)
+API_LATENCY_MIN_SAMPLES = 20      # Amostras mínimas antes de ajustar timeouts ou duplicar pedidos
+API_ADAPTIVE_TIMEOUT_MULTIPLIER = 4  # Timeout dos GETs = p99 do endpoint x este fator (até ao timeout do serviço)
+API_ADAPTIVE_TIMEOUT_MIN_SECONDS = 3  # Piso do timeout adaptativo
+API_HEDGE_PERCENTILE = 95         # GETs de detalhe mais lentos que este percentil recebem um pedido duplicado
+API_HEDGE_MAX_RATIO = 0.1         # Fração máxima de pedidos duplicados (evita duplicar a carga num backend lento)
+API_MAX_CONCURRENT_REQUESTS = 10  # Pedidos HTTP em curso em simultâneo, no total (RequestScheduler)
+API_MAX_CONCURRENT_PER_HOST = 10  # Pedidos em curso por host (não deve passar do API_POOL_MAXSIZE)
+API_INTERACTIVE_RESERVED_SLOTS = 2  # Vagas (no total e por host) que só os pedidos interativos podem ocupar
+API_BACKGROUND_MAX_CONCURRENT = 4 # Teto dos pedidos de prefetch e sincronização em curso (juntos)
+
+# --- Upload de documentos direto para o S3 (URLs pré-assinadas) ---
+UPLOAD_DIRECT_TO_S3 = False       # Requer o endpoint /uploads na API; False = documentos no corpo multipart (API Gateway)
+UPLOAD_PART_SIZE_BYTES = 8 * 1024 * 1024  # Tamanho das partes do upload multipart (mínimo do S3: 5 MB)
+UPLOAD_MAX_CONCURRENCY = 4        # Partes (de todos os ficheiros) enviadas em simultâneo
+UPLOAD_PART_MAX_ATTEMPTS = 3      # Tentativas de cada parte antes de desistir (o upload pode ser retomado depois)
+UPLOAD_PART_TIMEOUT = 120         # Timeout (segundos) do envio de uma parte
+
+# --- Outbox (alterações gravadas em segundo plano) ---
+OUTBOX_RETRY_BASE_SECONDS = 2     # Espera antes da 1ª nova tentativa; duplica a cada falha
+OUTBOX_RETRY_MAX_SECONDS = 300    # Teto da espera entre tentativas
+OUTBOX_MAX_ATTEMPTS = 10          # Depois disto a alteração fica como 'falhada' até ação do utilizador
+
+# --- Sincronização incremental (updated_since) ---
+DELTA_SYNC_FULL_RESYNC_HOURS = 24 # Intervalo entre sincronizações completas (apanha o que os deltas não tragam)
+
+# --- Logging ---
+LOG_DEFAULT_LEVEL = "INFO"        # Nível global (ou a variável de ambiente ADVOCACIA_LOG_LEVEL)
+LOG_MODULE_LEVELS = {             # Níveis por módulo (ou ADVOCACIA_LOG_LEVELS="services.api_transport=DEBUG,...")
+    "urllib3": "WARNING",
+}
+LOG_DIR_NAME = "logs"             # Pasta dos logs, junto ao executável / à raiz do projeto
+LOG_FILE_NAME = "advocacia.log"
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024  # Tamanho de cada ficheiro antes da rotação
+LOG_FILE_BACKUP_COUNT = 3         # Ficheiros antigos mantidos
+LOG_BODY_MAX_CHARS = 2000         # Corpos de pedidos/respostas são truncados nos logs
+LOG_BODY_SAMPLE_EVERY = 10        # Em DEBUG, regista um em cada N corpos por módulo
+
 # --- Outras Constantes (Exemplos) ---
 # COMPANY_NAME = "Meu Escritório de Advocacia Digital"
 # CONTACT_EMAIL = "suporte@meuescritorio.com"
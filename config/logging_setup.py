@@ -0,0 +1,211 @@
+# advocacia_app/config/logging_setup.py
+
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import re
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+from config.constants import (
+    LOG_DEFAULT_LEVEL,
+    LOG_MODULE_LEVELS,
+    LOG_DIR_NAME,
+    LOG_FILE_NAME,
+    LOG_FILE_MAX_BYTES,
+    LOG_FILE_BACKUP_COUNT,
+    LOG_BODY_MAX_CHARS,
+    LOG_BODY_SAMPLE_EVERY
+)
+
+# Variáveis de ambiente para ajustar os níveis sem recompilar:
+#   ADVOCACIA_LOG_LEVEL=DEBUG
+#   ADVOCACIA_LOG_LEVELS="services.api_transport=DEBUG,ui=WARNING"
+ENV_LOG_LEVEL = "ADVOCACIA_LOG_LEVEL"
+ENV_LOG_LEVELS = "ADVOCACIA_LOG_LEVELS"
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s [%(threadName)s] %(name)s: %(message)s"
+
+# Chaves cujos valores nunca vão para os logs (comparação sem maiúsculas)
+SENSITIVE_KEYS = frozenset({"password", "senha", "token", "authorization", "secret", "jwt", "access_token",
+                            "refresh_token", "password_hash"})
+REDACTED = "***"
+
+_SENSITIVE_KEYS_PATTERN = "|".join(sorted(SENSITIVE_KEYS, key=len, reverse=True))
+# "chave": "valor" (JSON), 'chave': 'valor' (repr de dict) e chave=valor (query strings, headers em texto)
+_QUOTED_SECRET_RE = re.compile(r"""(?i)(["'](?:%s)["']\s*:\s*)(["'])(?:(?!\2).)*\2""" % _SENSITIVE_KEYS_PATTERN)
+_ASSIGNED_SECRET_RE = re.compile(r"(?i)\b((?:%s)=)[^&\s,;]+" % _SENSITIVE_KEYS_PATTERN)
+_BEARER_RE = re.compile(r"(?i)\bBearer\s+[A-Za-z0-9\-._~+/]+=*")
+
+
+def redact_text(text: str) -> str:
+    """Mascara segredos num texto já formatado (tokens Bearer, senhas em JSON/dicts/query strings)."""
+    text = _BEARER_RE.sub("Bearer " + REDACTED, text)
+    text = _QUOTED_SECRET_RE.sub(lambda m: f"{m.group(1)}{m.group(2)}{REDACTED}{m.group(2)}", text)
+    return _ASSIGNED_SECRET_RE.sub(lambda m: m.group(1) + REDACTED, text)
+
+
+def redact(value: Any) -> Any:
+    """Cópia de dicts/listas com os valores das chaves sensíveis mascarados."""
+    if isinstance(value, dict):
+        return {key: REDACTED if str(key).lower() in SENSITIVE_KEYS else redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+class Redacted:
+    """
+    Argumento de log preguiçoso para payloads: só é serializado (e mascarado) se a mensagem for emitida.
+        logger.debug("Payload: %s", Redacted(payload))
+    """
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: int = LOG_BODY_MAX_CHARS):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        try:
+            text = json.dumps(redact(self.value), ensure_ascii=False, default=str)
+        except (TypeError, ValueError):
+            text = repr(redact(self.value))
+        return _truncate(text, self.limit)
+
+
+class BodyPreview:
+    """
+    Argumento de log preguiçoso para corpos HTTP (requests.Response, bytes ou str): truncado a 'limit'
+    caracteres e descodificado como UTF-8 apenas se a mensagem for emitida.
+    """
+    __slots__ = ("body", "limit")
+
+    def __init__(self, body: Any, limit: int = LOG_BODY_MAX_CHARS):
+        self.body = body
+        self.limit = limit
+
+    def __str__(self) -> str:
+        body = getattr(self.body, "content", self.body) # requests.Response -> bytes
+        if body is None:
+            return ""
+        if isinstance(body, (bytes, bytearray)):
+            size = len(body)
+            text = bytes(body[:self.limit]).decode("utf-8", errors="replace")
+        else:
+            text = str(body)
+            size = len(text)
+            text = text[:self.limit]
+        if size > self.limit:
+            text += f"... ({size} no total)"
+        return text
+
+
+def _truncate(text: str, limit: int) -> str:
+    if limit and len(text) > limit:
+        return f"{text[:limit]}... ({len(text)} caracteres no total)"
+    return text
+
+
+class _BodySampler:
+    """Deixa passar um em cada 'every' corpos por logger (listas grandes a cada refresh)."""
+
+    def __init__(self, every: int):
+        self.every = max(1, every)
+        self._counters: Dict[str, "itertools.count[int]"] = {}
+        self._lock = threading.Lock()
+
+    def should_log(self, name: str) -> bool:
+        with self._lock:
+            counter = self._counters.setdefault(name, itertools.count())
+            return next(counter) % self.every == 0
+
+
+_body_sampler = _BodySampler(LOG_BODY_SAMPLE_EVERY)
+
+
+def log_body(logger: logging.Logger, message: str, body: Any, *args: Any):
+    """
+    Regista em DEBUG um corpo de resposta/pedido, truncado, mascarado e amostrado. Com DEBUG desligado
+    custa apenas a verificação do nível. 'message' recebe os 'args' e por fim o corpo (último %s).
+    """
+    if logger.isEnabledFor(logging.DEBUG) and _body_sampler.should_log(logger.name):
+        logger.debug(message, *args, BodyPreview(body))
+
+
+class RedactingFilter(logging.Filter):
+    """Filtro dos handlers: mascara segredos na mensagem final (só corre para registos que vão ser emitidos)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        redacted = redact_text(message)
+        if redacted != message or record.args:
+            record.msg, record.args = redacted, None
+        return True
+
+
+def _parse_level(value: Any, default: int = logging.INFO) -> int:
+    if isinstance(value, int):
+        return value
+    level = logging.getLevelName(str(value).strip().upper())
+    return level if isinstance(level, int) else default
+
+
+def _module_levels() -> Dict[str, int]:
+    levels = {name: _parse_level(level) for name, level in LOG_MODULE_LEVELS.items()}
+    for item in os.environ.get(ENV_LOG_LEVELS, "").split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = _parse_level(level)
+    return levels
+
+
+def default_log_dir() -> str:
+    """Pasta dos logs: junto ao executável (compilado) ou na raiz do projeto, como o app_config.ini."""
+    if getattr(sys, 'frozen', False):
+        base_path = os.path.dirname(sys.executable)
+    else:
+        base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_path, LOG_DIR_NAME)
+
+
+_configured = False
+
+def setup_logging(log_dir: Optional[str] = None, level: Optional[Any] = None) -> logging.Logger:
+    """
+    Configura o logging da aplicação (uma vez, no arranque): ficheiro rotativo e consola (se existir),
+    com níveis por módulo e mascaramento de segredos. Retorna o logger raiz.
+    """
+    global _configured
+    root = logging.getLogger()
+    if _configured:
+        return root
+    _configured = True
+
+    root.setLevel(_parse_level(level or os.environ.get(ENV_LOG_LEVEL) or LOG_DEFAULT_LEVEL))
+    for name, module_level in _module_levels().items():
+        logging.getLogger(name).setLevel(module_level)
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    redacting_filter = RedactingFilter()
+    handlers = []
+    if sys.stderr is not None: # Executáveis sem consola (PyInstaller --windowed) não têm stderr
+        handlers.append(logging.StreamHandler())
+    log_dir = log_dir or default_log_dir()
+    try:
+        os.makedirs(log_dir, exist_ok=True)
+        handlers.append(logging.handlers.RotatingFileHandler(
+            os.path.join(log_dir, LOG_FILE_NAME), maxBytes=LOG_FILE_MAX_BYTES,
+            backupCount=LOG_FILE_BACKUP_COUNT, encoding="utf-8", delay=True))
+    except OSError as e:
+        print(f"setup_logging: Não foi possível criar o ficheiro de log em {log_dir}: {e}")
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        handler.addFilter(redacting_filter)
+        root.addHandler(handler)
+
+    logging.captureWarnings(True)
+    root.info("Logging iniciado (nível %s, pasta %s).", logging.getLevelName(root.level), log_dir)
+    return root
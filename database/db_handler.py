@@ -1,4 +1,5 @@
 import sqlite3
+import threading
 from typing import List, Tuple, Any, Optional
 
 DB_NAME = "advocacia_data.db"
@@ -124,6 +125,35 @@ class DBHandler:
         finally:
             self.close()
 
+class SharedConnectionDBHandler(DBHandler):
+    """
+    Variante do DBHandler com uma única conexão persistente (WAL), protegida por um lock.
+    Usada pelas tabelas acedidas ao mesmo tempo pela GUI e pelos workers (réplica local, outbox),
+    onde abrir e fechar uma conexão por query seria demasiado lento.
+    """
+
+    def __init__(self, db_name=DB_NAME):
+        super().__init__(db_name)
+        self._lock = threading.RLock()
+        self._shared_conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão partilhada; deve ser usada com self._lock adquirido."""
+        if self._shared_conn is None:
+            self._shared_conn = sqlite3.connect(self.db_name, check_same_thread=False)
+            self._shared_conn.row_factory = sqlite3.Row
+            self._shared_conn.execute("PRAGMA journal_mode=WAL") # Leituras da GUI não esperam pelas escritas dos workers
+            self._shared_conn.execute("PRAGMA synchronous=NORMAL")
+        return self._shared_conn
+
+    def shutdown(self):
+        """Fecha a conexão persistente (no encerramento da aplicação)."""
+        with self._lock:
+            if self._shared_conn is not None:
+                self._shared_conn.close()
+                self._shared_conn = None
+
+
 # Exemplo de uso (geralmente chamado uma vez no início do app)
 if __name__ == "__main__":
     db_handler = DBHandler()
@@ -0,0 +1,294 @@
+import json
+import sqlite3
+import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .db_handler import SharedConnectionDBHandler, DB_NAME
+
+# Entidades replicadas: tabela local e campo chave do documento remoto
+REPLICA_ENTITIES: Dict[str, Tuple[str, str]] = {
+    "clients": ("replica_clientes", "client_cpf"),
+    "processes": ("replica_processos", "process_id"),
+    "hearings": ("replica_audiencias", "hearing_id"),
+}
+
+
+class ReconcileResult:
+    """
+    Resultado de uma sincronização: documentos e o que mudou em relação à cópia local.
+    Num delta ('is_delta'), 'records' só traz os documentos alterados, não a coleção inteira.
+    """
+    __slots__ = ("records", "changed_keys", "removed_keys", "is_delta")
+
+    def __init__(self, records: Dict[str, Dict[str, Any]], changed_keys: List[str], removed_keys: List[str],
+                 is_delta: bool = False):
+        self.records = records
+        self.changed_keys = changed_keys
+        self.removed_keys = removed_keys
+        self.is_delta = is_delta
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.changed_keys or self.removed_keys)
+
+
+class LocalReplica(SharedConnectionDBHandler):
+    """
+    Réplica local (SQLite) dos documentos de clientes, processos e audiências da API.
+
+    Cada documento é guardado tal como vem da API (JSON), com a chave e o 'updated_at' em colunas
+    próprias para a reconciliação. Usada pela GUI (leituras) e pelos workers (sincronização).
+    """
+
+    def __init__(self, db_name=DB_NAME):
+        super().__init__(db_name)
+        self.setup_replica_tables()
+
+    def setup_replica_tables(self):
+        """Cria as tabelas da réplica, se não existirem (independentes das tabelas legadas do DBHandler)."""
+        queries = [
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                user_id TEXT NOT NULL,
+                entity_key TEXT NOT NULL,
+                updated_at TEXT,
+                document TEXT NOT NULL,
+                PRIMARY KEY (user_id, entity_key)
+            );
+            """ for table, _ in REPLICA_ENTITIES.values()
+        ]
+        queries.append("""
+            CREATE TABLE IF NOT EXISTS replica_sync_state (
+                user_id TEXT NOT NULL,
+                entity TEXT NOT NULL,
+                last_synced_at TEXT,
+                sync_cursor TEXT,
+                full_synced_at TEXT,
+                PRIMARY KEY (user_id, entity)
+            );
+        """)
+        with self._lock:
+            try:
+                conn = self._connection()
+                with conn:
+                    for query in queries:
+                        conn.execute(query)
+                    # Réplicas criadas antes da sincronização incremental não têm as colunas do cursor
+                    columns = {row[1] for row in conn.execute("PRAGMA table_info(replica_sync_state)")}
+                    for column in ("sync_cursor", "full_synced_at"):
+                        if column not in columns:
+                            conn.execute(f"ALTER TABLE replica_sync_state ADD COLUMN {column} TEXT")
+            except sqlite3.Error as e:
+                print(f"LocalReplica: Erro ao configurar tabelas da réplica: {e}")
+
+    @staticmethod
+    def _table(entity: str) -> Tuple[str, str]:
+        if entity not in REPLICA_ENTITIES:
+            raise ValueError(f"Entidade não replicada: {entity}")
+        return REPLICA_ENTITIES[entity]
+
+    # --- Leitura ---
+
+    def load_all(self, entity: str, user_id: str) -> List[Dict[str, Any]]:
+        """Todos os documentos locais da entidade para o utilizador (servido em milissegundos, sem rede)."""
+        table, _ = self._table(entity)
+        with self._lock:
+            try:
+                rows = self._connection().execute(
+                    f"SELECT document FROM {table} WHERE user_id = ?", (user_id,)
+                ).fetchall()
+            except sqlite3.Error as e:
+                print(f"LocalReplica: Erro ao ler {entity}: {e}")
+                return []
+        return [json.loads(row[0]) for row in rows]
+
+    def last_synced_at(self, entity: str, user_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT last_synced_at FROM replica_sync_state WHERE user_id = ? AND entity = ?", (user_id, entity)
+            ).fetchone()
+        return row[0] if row else None
+
+    def sync_state(self, entity: str, user_id: str) -> Tuple[Optional[str], Optional[str]]:
+        """(cursor para o próximo 'updated_since', data da última sincronização completa)."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT sync_cursor, full_synced_at FROM replica_sync_state WHERE user_id = ? AND entity = ?", (user_id, entity)
+            ).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    @staticmethod
+    def next_cursor(response_cursor: Optional[str], records: List[Dict[str, Any]], previous: Optional[str]) -> Optional[str]:
+        """O cursor devolvido pela API ou, na falta dele, o 'updated_at' mais recente recebido."""
+        if response_cursor:
+            return str(response_cursor)
+        candidates = [str(record["updated_at"]) for record in records if record.get("updated_at")]
+        if previous:
+            candidates.append(previous)
+        return max(candidates) if candidates else None
+
+    # --- Escrita ---
+
+    def upsert(self, entity: str, user_id: str, record: Dict[str, Any]):
+        table, key_field = self._table(entity)
+        key = record.get(key_field)
+        if key is None:
+            return
+        with self._lock:
+            try:
+                with self._connection() as conn:
+                    conn.execute(
+                        f"INSERT OR REPLACE INTO {table} (user_id, entity_key, updated_at, document) VALUES (?, ?, ?, ?)",
+                        (user_id, str(key), record.get("updated_at"), json.dumps(record, ensure_ascii=False))
+                    )
+            except sqlite3.Error as e:
+                print(f"LocalReplica: Erro ao gravar {entity} '{key}': {e}")
+
+    def delete(self, entity: str, user_id: str, key: str):
+        table, _ = self._table(entity)
+        with self._lock:
+            try:
+                with self._connection() as conn:
+                    conn.execute(f"DELETE FROM {table} WHERE user_id = ? AND entity_key = ?", (user_id, str(key)))
+            except sqlite3.Error as e:
+                print(f"LocalReplica: Erro ao remover {entity} '{key}': {e}")
+
+    def _load_local(self, conn: sqlite3.Connection, table: str, user_id: str, keys: List[str]) -> Dict[str, Tuple[Optional[str], str]]:
+        """(updated_at, documento) locais só das chaves pedidas, em blocos (limite de parâmetros do SQLite)."""
+        local: Dict[str, Tuple[Optional[str], str]] = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = conn.execute(
+                f"SELECT entity_key, updated_at, document FROM {table} WHERE user_id = ? AND entity_key IN ({','.join('?' * len(chunk))})",
+                (user_id, *chunk)
+            ).fetchall()
+            local.update({row[0]: (row[1], row[2]) for row in rows})
+        return local
+
+    @staticmethod
+    def _diff(remote_by_key: Dict[str, Dict[str, Any]], local: Dict[str, Tuple[Optional[str], str]],
+              user_id: str) -> Tuple[Dict[str, Dict[str, Any]], List[str], List[Tuple[str, str, Optional[str], str]]]:
+        """
+        Documentos remotos a gravar: novos, alterados, ou sem 'updated_at' para comparar. Um documento local
+        com 'updated_at' mais recente que o remoto (alteração local ainda não refletida na API) é mantido.
+        Com o mesmo 'updated_at' é a mesma versão: os campos remotos são fundidos no documento local, para
+        que uma listagem com projeção (só alguns campos) não apague os restantes campos já guardados.
+        """
+        records: Dict[str, Dict[str, Any]] = {}
+        changed_keys: List[str] = []
+        to_write: List[Tuple[str, str, Optional[str], str]] = []
+        for key, remote in remote_by_key.items():
+            remote_updated = remote.get("updated_at")
+            local_updated, local_document = local.get(key, (None, None))
+            if local_document is not None and remote_updated and local_updated:
+                if str(local_updated) > str(remote_updated):
+                    continue
+                if str(local_updated) == str(remote_updated):
+                    remote = {**json.loads(local_document), **remote}
+            document = json.dumps(remote, ensure_ascii=False)
+            if document != local_document:
+                records[key] = remote
+                changed_keys.append(key)
+                to_write.append((user_id, key, remote_updated, document))
+        return records, changed_keys, to_write
+
+    def _by_key(self, key_field: str, remote_records: List[Dict[str, Any]], protected_keys: Set[str]) -> Dict[str, Dict[str, Any]]:
+        """Documentos remotos por chave, sem as chaves protegidas (alterações locais ainda na outbox: o local vence)."""
+        by_key: Dict[str, Dict[str, Any]] = {}
+        for remote in remote_records:
+            key = remote.get(key_field)
+            if key is not None and str(key) not in protected_keys:
+                by_key[str(key)] = remote
+        return by_key
+
+    def reconcile_page(self, entity: str, user_id: str, remote_records: List[Dict[str, Any]],
+                       protected_keys: Optional[Set[str]] = None) -> ReconcileResult:
+        """
+        Grava uma página da listagem completa da API, numa transação. Não remove nada: os documentos locais
+        que não vierem em nenhuma página são removidos no fim, por finish_full_sync().
+        O resultado só traz os documentos novos ou alterados (is_delta).
+        """
+        table, key_field = self._table(entity)
+        remote_by_key = self._by_key(key_field, remote_records, protected_keys or set())
+        with self._lock:
+            conn = self._connection()
+            local = self._load_local(conn, table, user_id, list(remote_by_key))
+            records, changed_keys, to_write = self._diff(remote_by_key, local, user_id)
+            try:
+                with conn:
+                    if to_write:
+                        conn.executemany(
+                            f"INSERT OR REPLACE INTO {table} (user_id, entity_key, updated_at, document) VALUES (?, ?, ?, ?)",
+                            to_write
+                        )
+            except sqlite3.Error as e:
+                print(f"LocalReplica: Erro ao gravar página de {entity}: {e}")
+        return ReconcileResult(records, changed_keys, [], is_delta=True)
+
+    def finish_full_sync(self, entity: str, user_id: str, seen_keys: Set[str],
+                         protected_keys: Optional[Set[str]] = None, sync_cursor: Optional[str] = None) -> List[str]:
+        """
+        Fim de uma listagem completa (todas as páginas gravadas com reconcile_page): remove os documentos
+        locais que a API já não tem, exceto as chaves protegidas (ex: criados localmente e ainda na outbox),
+        e guarda o cursor para os próximos pedidos incrementais. Retorna as chaves removidas.
+        """
+        protected_keys = protected_keys or set()
+        table, _ = self._table(entity)
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        with self._lock:
+            conn = self._connection()
+            local_keys = [row[0] for row in conn.execute(f"SELECT entity_key FROM {table} WHERE user_id = ?", (user_id,))]
+            removed_keys = [key for key in local_keys if key not in seen_keys and key not in protected_keys]
+            try:
+                with conn:
+                    if removed_keys:
+                        conn.executemany(f"DELETE FROM {table} WHERE user_id = ? AND entity_key = ?",
+                                         [(user_id, key) for key in removed_keys])
+                    conn.execute(
+                        "INSERT OR REPLACE INTO replica_sync_state (user_id, entity, last_synced_at, sync_cursor, full_synced_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (user_id, entity, now, sync_cursor, now)
+                    )
+            except sqlite3.Error as e:
+                print(f"LocalReplica: Erro ao concluir a sincronização de {entity}: {e}")
+        return removed_keys
+
+    def apply_delta(self, entity: str, user_id: str, changed_records: List[Dict[str, Any]], deleted_keys: List[Any],
+                    protected_keys: Optional[Set[str]] = None, sync_cursor: Optional[str] = None) -> ReconcileResult:
+        """
+        Aplica uma resposta incremental ('updated_since'): grava os documentos alterados e remove os
+        tombstones, numa única transação, e avança o cursor. As regras de conflito são as de reconcile_page();
+        os registos que não vieram no delta ficam como estão.
+        """
+        protected_keys = protected_keys or set()
+        table, key_field = self._table(entity)
+        tombstones = {str(key) for key in deleted_keys if key is not None and str(key) not in protected_keys}
+        remote_by_key = {key: remote for key, remote in self._by_key(key_field, changed_records, protected_keys).items()
+                         if key not in tombstones}
+
+        with self._lock:
+            conn = self._connection()
+            previous_cursor = self.sync_state(entity, user_id)[0]
+            local = self._load_local(conn, table, user_id, list(remote_by_key) + list(tombstones))
+            records, changed_keys, to_write = self._diff(remote_by_key, local, user_id)
+            removed_keys = [key for key in tombstones if key in local]
+
+            now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+            try:
+                with conn:
+                    if to_write:
+                        conn.executemany(
+                            f"INSERT OR REPLACE INTO {table} (user_id, entity_key, updated_at, document) VALUES (?, ?, ?, ?)",
+                            to_write
+                        )
+                    if removed_keys:
+                        conn.executemany(f"DELETE FROM {table} WHERE user_id = ? AND entity_key = ?",
+                                         [(user_id, key) for key in removed_keys])
+                    conn.execute(
+                        "UPDATE replica_sync_state SET last_synced_at = ?, sync_cursor = ? WHERE user_id = ? AND entity = ?",
+                        (now, self.next_cursor(sync_cursor, changed_records, previous_cursor), user_id, entity)
+                    )
+            except sqlite3.Error as e:
+                print(f"LocalReplica: Erro ao aplicar delta de {entity}: {e}")
+        print(f"LocalReplica: delta de {entity} aplicado ({len(changed_keys)} alterados, {len(removed_keys)} removidos).")
+        return ReconcileResult(records, changed_keys, removed_keys, is_delta=True)
@@ -0,0 +1,239 @@
+import json
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .db_handler import SharedConnectionDBHandler, DB_NAME
+
+# Estados de uma mutação na outbox
+STATUS_PENDING = "pending"   # À espera de envio (ou de nova tentativa)
+STATUS_SENDING = "sending"   # Em envio por um worker
+STATUS_FAILED = "failed"     # Rejeitada pela API ou sem mais tentativas; precisa de ação do utilizador
+
+OPERATION_CREATE = "create"
+OPERATION_UPDATE = "update"
+OPERATION_DELETE = "delete"
+
+
+class MutationOutbox(SharedConnectionDBHandler):
+    """
+    Fila persistente (SQLite) das alterações feitas na aplicação e ainda não confirmadas pela API.
+
+    As mutações sobrevivem a falhas de rede e ao fecho da aplicação; um worker envia-as pela ordem
+    em que foram feitas. Alterações sucessivas à mesma entidade, ainda não enviadas, são fundidas
+    numa só (ex: criar + editar = criar com os dados finais; criar + remover = nada a enviar).
+    """
+
+    def __init__(self, db_name=DB_NAME):
+        super().__init__(db_name)
+        self.setup_outbox_table()
+
+    def setup_outbox_table(self):
+        with self._lock:
+            try:
+                with self._connection() as conn:
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS outbox_mutations (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            user_id TEXT NOT NULL,
+                            entity TEXT NOT NULL,
+                            entity_key TEXT NOT NULL,
+                            operation TEXT NOT NULL,
+                            payload TEXT,
+                            status TEXT NOT NULL DEFAULT 'pending',
+                            attempts INTEGER NOT NULL DEFAULT 0,
+                            next_attempt_at REAL NOT NULL DEFAULT 0,
+                            last_error TEXT,
+                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        );
+                    """)
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_user_status ON outbox_mutations (user_id, status, id)")
+            except sqlite3.Error as e:
+                print(f"MutationOutbox: Erro ao configurar a tabela da outbox: {e}")
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        mutation = dict(row)
+        mutation["payload"] = json.loads(mutation["payload"]) if mutation.get("payload") else None
+        return mutation
+
+    # --- Enfileirar (com fusão) ---
+
+    def enqueue(self, user_id: str, entity: str, operation: str, entity_key: str,
+                payload: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        """
+        Regista uma mutação, fundindo-a com a mutação pendente (ainda não em envio) da mesma entidade.
+        Retorna o id da mutação resultante, ou None se as duas se anularam (criar + remover).
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                row = conn.execute(
+                    "SELECT * FROM outbox_mutations WHERE user_id = ? AND entity = ? AND entity_key = ? AND status = ? "
+                    "ORDER BY id DESC LIMIT 1",
+                    (user_id, entity, str(entity_key), STATUS_PENDING)
+                ).fetchone()
+                if row is not None:
+                    previous = self._row_to_dict(row)
+                    merged = self._merge(previous["operation"], previous["payload"], operation, payload)
+                    if merged is None:
+                        conn.execute("DELETE FROM outbox_mutations WHERE id = ?", (previous["id"],))
+                        return None
+                    merged_operation, merged_payload = merged
+                    conn.execute(
+                        "UPDATE outbox_mutations SET operation = ?, payload = ?, attempts = 0, next_attempt_at = 0, last_error = NULL "
+                        "WHERE id = ?",
+                        (merged_operation, json.dumps(merged_payload, ensure_ascii=False) if merged_payload is not None else None, previous["id"])
+                    )
+                    return previous["id"]
+                cursor = conn.execute(
+                    "INSERT INTO outbox_mutations (user_id, entity, entity_key, operation, payload) VALUES (?, ?, ?, ?, ?)",
+                    (user_id, entity, str(entity_key), operation, json.dumps(payload, ensure_ascii=False) if payload is not None else None)
+                )
+                return cursor.lastrowid
+
+    @staticmethod
+    def _merge(previous_operation: str, previous_payload: Optional[Dict[str, Any]],
+               operation: str, payload: Optional[Dict[str, Any]]) -> Optional[Tuple[str, Optional[Dict[str, Any]]]]:
+        if operation == OPERATION_DELETE:
+            if previous_operation == OPERATION_CREATE:
+                return None # A API nunca soube desta entidade
+            return OPERATION_DELETE, None
+        if previous_operation == OPERATION_DELETE:
+            return operation, payload # Recriada depois de removida: vale a nova operação
+        merged_payload = dict(previous_payload or {})
+        merged_payload.update(payload or {})
+        # create + update continua a ser create; update + update é um update com os campos combinados
+        return previous_operation, merged_payload
+
+    # --- Consumo pelo worker ---
+
+    # Mutações pendentes que podem ser enviadas: uma alteração anterior da mesma entidade que falhou
+    # bloqueia as seguintes (ex: a edição de um 'local-…' cuja criação foi recusada) até ser repetida
+    # ou descartada, para que a API nunca as receba fora de ordem.
+    _SENDABLE = (
+        "FROM outbox_mutations AS m WHERE m.user_id = ? AND m.status = ? AND NOT EXISTS ("
+        "SELECT 1 FROM outbox_mutations AS f WHERE f.user_id = m.user_id AND f.entity = m.entity "
+        "AND f.entity_key = m.entity_key AND f.status = ? AND f.id < m.id)"
+    )
+
+    def next_due(self, user_id: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """A mutação pendente (não bloqueada) mais antiga, se o prazo de nova tentativa já passou (ordem de criação)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT m.* {self._SENDABLE} ORDER BY m.id LIMIT 1", (user_id, STATUS_PENDING, STATUS_FAILED)
+            ).fetchone()
+        if row is None or row["next_attempt_at"] > now:
+            return None # A mais antiga ainda está em espera: as seguintes esperam por ela (mantém a ordem)
+        return self._row_to_dict(row)
+
+    def next_attempt_at(self, user_id: str) -> Optional[float]:
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT m.next_attempt_at {self._SENDABLE} ORDER BY m.id LIMIT 1", (user_id, STATUS_PENDING, STATUS_FAILED)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, query: str, params: Tuple):
+        with self._lock:
+            with self._connection() as conn:
+                conn.execute(query, params)
+
+    def mark_sending(self, mutation_id: int):
+        self._set("UPDATE outbox_mutations SET status = ? WHERE id = ?", (STATUS_SENDING, mutation_id))
+
+    def complete(self, mutation_id: int):
+        self._set("DELETE FROM outbox_mutations WHERE id = ?", (mutation_id,))
+
+    def reschedule(self, mutation_id: int, attempts: int, next_attempt_at: float, error: str):
+        self._set(
+            "UPDATE outbox_mutations SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+            (STATUS_PENDING, attempts, next_attempt_at, error, mutation_id)
+        )
+
+    def mark_failed(self, mutation_id: int, attempts: int, error: str):
+        self._set(
+            "UPDATE outbox_mutations SET status = ?, attempts = ?, last_error = ? WHERE id = ?",
+            (STATUS_FAILED, attempts, error, mutation_id)
+        )
+
+    def rekey(self, user_id: str, entity: str, old_key: str, new_key: str):
+        """
+        Depois de criada na API, a entidade passa da chave local provisória para a definitiva:
+        atualiza as mutações seguintes da mesma entidade e as referências noutras mutações
+        (ex: audiência criada para um processo que ainda estava na outbox).
+        """
+        old_json, new_json = json.dumps(str(old_key)), json.dumps(str(new_key))
+        with self._lock:
+            with self._connection() as conn:
+                conn.execute(
+                    "UPDATE outbox_mutations SET entity_key = ? WHERE user_id = ? AND entity = ? AND entity_key = ?",
+                    (str(new_key), user_id, entity, str(old_key))
+                )
+                conn.execute(
+                    "UPDATE outbox_mutations SET payload = replace(payload, ?, ?) WHERE user_id = ? AND instr(payload, ?) > 0",
+                    (old_json, new_json, user_id, old_json)
+                )
+
+    def discard_pending(self, user_id: str, entity: str, entity_key: str):
+        """Descarta as mutações ainda não enviadas de uma entidade (ex: audiências de um processo removido)."""
+        self._set("DELETE FROM outbox_mutations WHERE user_id = ? AND entity = ? AND entity_key = ? AND status != ?",
+                  (user_id, entity, str(entity_key), STATUS_SENDING))
+
+    def recover_interrupted(self, user_id: str):
+        """Mutações que estavam em envio quando a aplicação fechou voltam a ficar pendentes."""
+        self._set("UPDATE outbox_mutations SET status = ? WHERE user_id = ? AND status = ?",
+                  (STATUS_PENDING, user_id, STATUS_SENDING))
+
+    # --- Estado para a interface ---
+
+    def counts(self, user_id: str) -> Tuple[int, int]:
+        """(pendentes + em envio, falhadas)."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT status, COUNT(*) FROM outbox_mutations WHERE user_id = ? GROUP BY status", (user_id,)
+            ).fetchall()
+        by_status = {row[0]: row[1] for row in rows}
+        return by_status.get(STATUS_PENDING, 0) + by_status.get(STATUS_SENDING, 0), by_status.get(STATUS_FAILED, 0)
+
+    def pending_keys(self, user_id: str, entity: str) -> Set[str]:
+        """Chaves com alterações locais ainda não confirmadas (incluindo as falhadas)."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT DISTINCT entity_key FROM outbox_mutations WHERE user_id = ? AND entity = ?", (user_id, entity)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def has_pending(self, user_id: str, entity: str, entity_key: str) -> bool:
+        return str(entity_key) in self.pending_keys(user_id, entity)
+
+    def failed_mutations(self, user_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT * FROM outbox_mutations WHERE user_id = ? AND status = ? ORDER BY id", (user_id, STATUS_FAILED)
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def retry_failed(self, user_id: str):
+        self._set(
+            "UPDATE outbox_mutations SET status = ?, attempts = 0, next_attempt_at = 0 WHERE user_id = ? AND status = ?",
+            (STATUS_PENDING, user_id, STATUS_FAILED)
+        )
+
+    def discard_failed(self, user_id: str) -> List[Dict[str, Any]]:
+        """
+        Remove as mutações falhadas, e as pendentes que elas bloqueavam (feitas depois sobre a mesma
+        entidade), e devolve-as (para repor o estado da API nas entidades afetadas).
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                rows = conn.execute(
+                    "SELECT m.* FROM outbox_mutations AS m WHERE m.user_id = ? AND (m.status = ? OR (m.status = ? AND EXISTS ("
+                    "SELECT 1 FROM outbox_mutations AS f WHERE f.user_id = m.user_id AND f.entity = m.entity "
+                    "AND f.entity_key = m.entity_key AND f.status = ? AND f.id < m.id))) ORDER BY m.id",
+                    (user_id, STATUS_FAILED, STATUS_PENDING, STATUS_FAILED)
+                ).fetchall()
+                conn.executemany("DELETE FROM outbox_mutations WHERE id = ?", [(row["id"],) for row in rows])
+        return [self._row_to_dict(row) for row in rows]
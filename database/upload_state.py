@@ -0,0 +1,90 @@
+import json
+import sqlite3
+from typing import Any, Dict, Optional
+
+from .db_handler import SharedConnectionDBHandler, DB_NAME
+
+
+class UploadStateStore(SharedConnectionDBHandler):
+    """
+    Estado persistente (SQLite) dos uploads multipart diretos para o S3 ainda não concluídos.
+
+    Cada ficheiro é identificado pelo caminho, tamanho e data de modificação: se o envio for
+    interrompido (rede, fecho da aplicação), um novo envio do mesmo ficheiro retoma o upload_id
+    guardado e só envia as partes em falta. Um ficheiro alterado entretanto começa do zero (e o
+    upload anterior é abortado pelo S3DirectUploader).
+    """
+
+    def __init__(self, db_name=DB_NAME):
+        super().__init__(db_name)
+        self.setup_upload_table()
+
+    def setup_upload_table(self):
+        with self._lock:
+            try:
+                with self._connection() as conn:
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS upload_sessions (
+                            user_id TEXT NOT NULL,
+                            file_path TEXT NOT NULL,
+                            file_size INTEGER NOT NULL,
+                            file_mtime REAL NOT NULL,
+                            upload_id TEXT NOT NULL,
+                            s3_key TEXT NOT NULL,
+                            part_size INTEGER NOT NULL,
+                            parts TEXT NOT NULL DEFAULT '{}',
+                            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                            PRIMARY KEY (user_id, file_path)
+                        );
+                    """)
+            except sqlite3.Error as e:
+                print(f"UploadStateStore: Erro ao configurar a tabela de uploads: {e}")
+
+    def load(self, user_id: str, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Sessão guardada para este caminho (None se não houver). Quem chama compara file_size/file_mtime:
+        uma sessão de uma versão anterior do ficheiro deve ser abortada no S3 e apagada.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT * FROM upload_sessions WHERE user_id = ? AND file_path = ?", (user_id, file_path)
+            ).fetchone()
+        if row is None:
+            return None
+        session = dict(row)
+        # Partes já enviadas: número da parte -> ETag devolvido pelo S3
+        session["parts"] = {int(number): etag for number, etag in json.loads(session["parts"] or "{}").items()}
+        return session
+
+    def save(self, user_id: str, file_path: str, file_size: int, file_mtime: float,
+             upload_id: str, s3_key: str, part_size: int):
+        with self._lock:
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO upload_sessions "
+                    "(user_id, file_path, file_size, file_mtime, upload_id, s3_key, part_size, parts, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, '{}', CURRENT_TIMESTAMP)",
+                    (user_id, file_path, file_size, file_mtime, upload_id, s3_key, part_size)
+                )
+
+    def record_part(self, user_id: str, file_path: str, part_number: int, etag: str):
+        """Regista uma parte enviada (chamado pelas threads do upload, à medida que cada parte termina)."""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                row = conn.execute(
+                    "SELECT parts FROM upload_sessions WHERE user_id = ? AND file_path = ?", (user_id, file_path)
+                ).fetchone()
+                if row is None:
+                    return
+                parts = json.loads(row["parts"] or "{}")
+                parts[str(part_number)] = etag
+                conn.execute(
+                    "UPDATE upload_sessions SET parts = ?, updated_at = CURRENT_TIMESTAMP WHERE user_id = ? AND file_path = ?",
+                    (json.dumps(parts), user_id, file_path)
+                )
+
+    def delete(self, user_id: str, file_path: str):
+        with self._lock:
+            with self._connection() as conn:
+                conn.execute("DELETE FROM upload_sessions WHERE user_id = ? AND file_path = ?", (user_id, file_path))
@@ -1,4 +1,5 @@
 import json
+import logging
 import boto3
 import hashlib
 import hmac # Para hmac.compare_digest
@@ -16,6 +17,13 @@ JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 't8!nZ@sW3$pLqE7yH*vG1xU(bK0jF
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION_MINUTES = 60 # Token expira em 60 minutos
 
+# Nível dos logs no CloudWatch (LOG_LEVEL=DEBUG na configuração da Lambda para diagnóstico)
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# Campos que nunca vão para os logs
+SENSITIVE_FIELDS = ('password', 'token', 'authorization')
+
 dynamodb_client = boto3.client('dynamodb')
 
 def verify_password(stored_password_full_hash, provided_password):
@@ -23,7 +31,7 @@ def verify_password(stored_password_full_hash, provided_password):
     try:
         parts = stored_password_full_hash.split('$')
         if len(parts) != 4 or parts[0] != 'pbkdf2_sha256':
-            print("Formato de hash armazenado inválido.")
+            logger.warning("Formato de hash armazenado inválido.")
             return False
 
         algorithm, iterations_str, salt_hex, stored_hash_hex = parts
@@ -40,9 +48,7 @@ def verify_password(stored_password_full_hash, provided_password):
         )
         return hmac.compare_digest(stored_hash_bytes, derived_key)
     except Exception as e:
-        print(f"Erro durante a verificação da senha: {e}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Erro durante a verificação da senha: %s", e)
         return False
 
 def generate_jwt_token(username, role):
@@ -55,36 +61,52 @@ def generate_jwt_token(username, role):
     }
     try:
         token = jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
-        print(f"Token JWT gerado para o utilizador {username}")
+        logger.debug("Token JWT gerado para o utilizador %s", username)
         return token
     except Exception as e:
-        print(f"Erro ao gerar token JWT: {e}")
+        logger.exception("Erro ao gerar token JWT: %s", e)
         return None
 
+def _redact(value):
+    """Cópia do evento sem senhas/tokens (inclui o 'body' em JSON) para os logs de diagnóstico."""
+    if isinstance(value, dict):
+        redacted = {}
+        for key, item in value.items():
+            if str(key).lower() in SENSITIVE_FIELDS:
+                redacted[key] = '***'
+            elif key == 'body' and isinstance(item, str):
+                try:
+                    redacted[key] = _redact(json.loads(item))
+                except json.JSONDecodeError:
+                    redacted[key] = '<corpo não JSON>'
+            else:
+                redacted[key] = _redact(item)
+        return redacted
+    if isinstance(value, list):
+        return [_redact(item) for item in value]
+    return value
+
 def lambda_handler(event, context):
-    print(f"FUNÇÃO DE LOGIN INVOCADA.")
-    print(f"EVENTO COMPLETO RECEBIDO: {json.dumps(event)}") 
+    if logger.isEnabledFor(logging.DEBUG): # Evita serializar o evento quando o DEBUG está desligado
+        logger.debug("Evento recebido: %s", json.dumps(_redact(event)))
 
     body_content = None
     try:
-        print("Dentro do bloco try principal da função de login.")
         event_body_str = event.get('body')
         
-        print(f"Tipo de event.get('body'): {type(event_body_str)}")
-        print(f"Conteúdo de event.get('body'): {event_body_str}")
+        logger.debug("Tipo de event.get('body'): %s", type(event_body_str))
 
         if event_body_str is not None and isinstance(event_body_str, str):
             try:
                 body_content = json.loads(event_body_str)
-                print(f"Corpo (body) após json.loads de event['body']: {body_content}")
             except json.JSONDecodeError as json_err:
-                print(f"Erro de decodificação JSON em event['body']: {json_err}")
+                logger.warning("Erro de decodificação JSON em event['body']: %s", json_err)
                 return {'statusCode': 400, 'headers': {'Access-Control-Allow-Origin': '*'}, 'body': json.dumps({'success': False, 'message': 'Formato do corpo da requisição JSON inválido.'})}
         elif isinstance(event, dict) and 'username' in event and 'password' in event: # Para testes diretos da Lambda
             body_content = event
-            print(f"Usando o próprio 'event' como corpo (body) - comum em testes diretos: {body_content}")
+            logger.debug("Usando o próprio 'event' como corpo (body) - comum em testes diretos.")
         else:
-            print("Corpo (body) da requisição está ausente ou em formato inesperado para login.")
+            logger.warning("Corpo (body) da requisição está ausente ou em formato inesperado para login.")
             return {
                 'statusCode': 400,
                 'headers': {'Access-Control-Allow-Origin': '*'},
@@ -92,52 +114,50 @@ def lambda_handler(event, context):
             }
 
         if body_content is None:
-            print("Falha ao determinar o conteúdo do corpo para login.")
+            logger.warning("Falha ao determinar o conteúdo do corpo para login.")
             return {'statusCode': 400, 'headers': {'Access-Control-Allow-Origin': '*'}, 'body': json.dumps({'success': False, 'message': 'Não foi possível processar o corpo da requisição de login.'})}
 
         username_attempt = body_content.get('username')
         password_attempt = body_content.get('password')
 
-        print(f"Tentativa de login para username: {username_attempt}, Senha fornecida (comprimento): {len(password_attempt) if password_attempt else 0}")
+        logger.debug("Tentativa de login para username: %s, Senha fornecida (comprimento): %s", username_attempt, len(password_attempt) if password_attempt else 0)
 
         if not username_attempt or not password_attempt:
-            print("Nome de utilizador ou senha ausentes no corpo processado para login.")
+            logger.info("Nome de utilizador ou senha ausentes no corpo processado para login.")
             return {
                 'statusCode': 400,
                 'headers': {'Access-Control-Allow-Origin': '*'},
                 'body': json.dumps({'success': False, 'message': 'Nome de utilizador e senha são obrigatórios para o login.'})
             }
 
-        print(f"Buscando utilizador '{username_attempt}' no DynamoDB...")
+        logger.debug("Buscando utilizador '%s' no DynamoDB...", username_attempt)
         try:
             response = dynamodb_client.get_item(
                 TableName=DYNAMODB_TABLE_NAME,
                 Key={'username': {'S': username_attempt}}
             )
         except Exception as e_db_get:
-            print(f"Erro ao buscar utilizador '{username_attempt}' no DynamoDB: {e_db_get}")
-            import traceback
-            print(traceback.format_exc())
+            logger.exception("Erro ao buscar utilizador '%s' no DynamoDB: %s", username_attempt, e_db_get)
             return {'statusCode': 500, 'headers': {'Access-Control-Allow-Origin': '*'}, 'body': json.dumps({'success': False, 'message': 'Erro ao consultar o banco de dados.'})}
 
         item = response.get('Item')
         if not item:
-            print(f"Utilizador '{username_attempt}' não encontrado no DynamoDB.")
+            logger.info("Utilizador '%s' não encontrado no DynamoDB.", username_attempt)
             return {'statusCode': 401, 'headers': {'Access-Control-Allow-Origin': '*'}, 'body': json.dumps({'success': False, 'message': 'Utilizador ou senha inválidos.'})}
 
         stored_password_full_hash = item.get('password_hash', {}).get('S')
         if not stored_password_full_hash:
-            print(f"Hash de senha não encontrado no DynamoDB para o utilizador: {username_attempt}")
+            logger.error("Hash de senha não encontrado no DynamoDB para o utilizador: %s", username_attempt)
             return {'statusCode': 500, 'headers': {'Access-Control-Allow-Origin': '*'}, 'body': json.dumps({'success': False, 'message': 'Erro interno: Configuração de utilizador inválida.'})}
         
         user_role = item.get('role', {}).get('S', 'user') # Pega a role do utilizador
 
-        print(f"Verificando senha para '{username_attempt}'...")
+        logger.debug("Verificando senha para '%s'...", username_attempt)
         if verify_password(stored_password_full_hash, password_attempt):
             # Geração do Token JWT
             token = generate_jwt_token(username_attempt, user_role)
             if not token:
-                print(f"Falha ao gerar token JWT para '{username_attempt}'.")
+                logger.error("Falha ao gerar token JWT para '%s'.", username_attempt)
                 return {'statusCode': 500, 'headers': {'Access-Control-Allow-Origin': '*'}, 'body': json.dumps({'success': False, 'message': 'Erro interno ao gerar token de autenticação.'})}
 
             # Inclui o token na resposta user_data
@@ -146,18 +166,16 @@ def lambda_handler(event, context):
                 'role': user_role,
                 'token': token  # <<< TOKEN ADICIONADO AQUI
             }
-            print(f"Login bem-sucedido para '{username_attempt}'. Token incluído na resposta.")
+            logger.info("Login bem-sucedido para '%s'. Token incluído na resposta.", username_attempt)
             return {
                 'statusCode': 200,
                 'headers': {'Access-Control-Allow-Origin': '*'},
                 'body': json.dumps({'success': True, 'message': 'Login bem-sucedido!', 'user_data': user_data_response})
             }
         else:
-            print(f"Senha inválida para '{username_attempt}'.")
+            logger.info("Senha inválida para '%s'.", username_attempt)
             return {'statusCode': 401, 'headers': {'Access-Control-Allow-Origin': '*'}, 'body': json.dumps({'success': False, 'message': 'Utilizador ou senha inválidos.'})}
 
     except Exception as e: 
-        print(f"Erro geral e inesperado na função de login: {e}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Erro geral e inesperado na função de login: %s", e)
         return {'statusCode': 500, 'headers': {'Access-Control-Allow-Origin': '*'}, 'body': json.dumps({'success': False, 'message': f'Erro interno do servidor durante o login.'})}
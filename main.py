@@ -8,9 +8,16 @@ from ui.main_app_window_pyside import MainAppWindow
 from services.auth_service import AuthService 
 from services.update_service import UpdateService 
 from config.constants import CURRENT_APPLICATION_VERSION 
+from config.logging_setup import setup_logging
 from services.client_api_service import ClientApiService
 from services.process_api_service import ProcessApiService 
 from services.hearings_api_service import HearingsApiService # Nova importação
+from services.api_transport import ApiTransport
+from services.async_api import shutdown_async_loop
+from database.local_replica import LocalReplica
+from database.outbox import MutationOutbox
+from database.upload_state import UploadStateStore
+from ui.entity_store import EntityStore
 # A linha abaixo foi mantida conforme o seu código, mas atenção ao seu uso.
 # from services.dynamodb_client_handler import DynamoDBClientHandler 
 
@@ -23,13 +30,39 @@ class AppController(QApplication):
         self.main_app_window = None
 
         # --- Serviços ---
-        self.auth_service = AuthService()
+        # Transporte HTTP único (pool keep-alive) partilhado por todos os serviços de API
+        self.api_transport = ApiTransport()
+        self.aboutToQuit.connect(self.api_transport.close)
+        self.aboutToQuit.connect(shutdown_async_loop) # Loop asyncio das chamadas em paralelo (AsyncApiService)
+        self.auth_service = AuthService(transport=self.api_transport)
+        # Réplica local (SQLite) dos dados da API: as listas abrem sem esperar pela rede
+        try:
+            self.local_replica = LocalReplica()
+            self.aboutToQuit.connect(self.local_replica.shutdown)
+        except Exception as e:
+            print(f"AppController: Réplica local indisponível, a aplicação usará apenas a API: {e}")
+            self.local_replica = None
+        # Outbox (SQLite) das alterações ainda não confirmadas pela API: os diálogos fecham de imediato
+        try:
+            self.mutation_outbox = MutationOutbox()
+            self.aboutToQuit.connect(self.mutation_outbox.shutdown)
+        except Exception as e:
+            print(f"AppController: Outbox indisponível, as alterações serão enviadas diretamente à API: {e}")
+            self.mutation_outbox = None
+        # Estado (SQLite) dos uploads de documentos para o S3: um upload interrompido é retomado no envio seguinte
+        try:
+            self.upload_state = UploadStateStore()
+            self.aboutToQuit.connect(self.upload_state.shutdown)
+        except Exception as e:
+            print(f"AppController: Estado dos uploads indisponível, uploads interrompidos recomeçarão do início: {e}")
+            self.upload_state = None
         
         # self.dynamodb_client_handler = DynamoDBClientHandler() # Comentado, pois o ideal é via API
         
         self.client_api_service = None 
         self.process_api_service = None 
         self.hearings_api_service = None # Novo serviço de audiências
+        self.entity_store = None # Clientes/processos/audiências partilhados pelas abas (criado no login)
         self.update_service = None 
 
         self.setApplicationName("Sistema Advocacia")
@@ -90,12 +123,18 @@ class AppController(QApplication):
         print(f"AppController: Token de autenticação recebido e armazenado.")
         
         # Instanciar os serviços de API com o token
-        self.client_api_service = ClientApiService(auth_token=self.auth_token)
+        self.client_api_service = ClientApiService(auth_token=self.auth_token, transport=self.api_transport)
         print("AppController: ClientApiService instanciado.")
-        self.process_api_service = ProcessApiService(auth_token=self.auth_token)
+        self.process_api_service = ProcessApiService(auth_token=self.auth_token, transport=self.api_transport,
+                                                     upload_state=self.upload_state)
         print("AppController: ProcessApiService instanciado.")
-        self.hearings_api_service = HearingsApiService(auth_token=self.auth_token) # Instancia o novo serviço
+        self.hearings_api_service = HearingsApiService(auth_token=self.auth_token, transport=self.api_transport) # Instancia o novo serviço
         print("AppController: HearingsApiService instanciado.")
+        self.entity_store = EntityStore(username_display, self.client_api_service, self.process_api_service,
+                                        self.hearings_api_service, replica=self.local_replica,
+                                        outbox=self.mutation_outbox, parent=self)
+        # Os dados de todas as abas começam a ser baixados já, enquanto a janela principal é montada
+        self.entity_store.prefetch()
         
         if self.login_window:
             self.login_window.close()
@@ -115,7 +154,7 @@ class AppController(QApplication):
 
     def show_main_app_window(self):
         # Verifica se os serviços de API foram instanciados
-        if not self.user_data or not self.client_api_service or not self.process_api_service or not self.hearings_api_service: 
+        if not self.user_data or not self.client_api_service or not self.process_api_service or not self.hearings_api_service or not self.entity_store: 
             print("AppController: Não é possível mostrar a janela principal. Dados do usuário ou serviços de API não estão prontos.")
             # Poderia mostrar uma mensagem de erro para o usuário aqui também ou tentar relogar.
             # Por agora, apenas não abre a janela principal se algo essencial faltar.
@@ -136,6 +175,11 @@ class AppController(QApplication):
         self.client_api_service = None 
         self.process_api_service = None 
         self.hearings_api_service = None # Limpar HearingsApiService
+        self.api_transport.http_cache.clear() # Os corpos guardados pertencem ao utilizador que saiu
+        if self.entity_store:
+            self.entity_store.clear() # Descarta os dados (e respostas pendentes) da sessão anterior
+            self.entity_store.deleteLater()
+            self.entity_store = None
         print("AppController: Usuário deslogado.")
         if self.main_app_window:
             self.main_app_window.close() 
@@ -153,5 +197,7 @@ if __name__ == "__main__":
     assets_dir = os.path.join(project_dir, "assets") 
     os.makedirs(assets_dir, exist_ok=True)
     
+    setup_logging() # Ficheiro rotativo em logs/ e níveis por módulo (ADVOCACIA_LOG_LEVEL / ADVOCACIA_LOG_LEVELS)
+
     app = AppController(sys.argv)
     sys.exit(app.exec())
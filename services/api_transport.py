@@ -0,0 +1,297 @@
+# advocacia_app/services/api_transport.py
+
+import concurrent.futures
+import contextvars
+import logging
+import os
+import threading
+import time
+from typing import Optional, Dict, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.constants import (
+    API_GATEWAY_BASE_URL,
+    API_DEFAULT_TIMEOUT,
+    API_POOL_CONNECTIONS,
+    API_POOL_MAXSIZE,
+    API_HTTP2_ENABLED,
+    CURRENT_APPLICATION_VERSION
+)
+from .http2_session import Http2Session, http2_available
+from .http_cache import HttpCache
+from .latency import LatencyTracker
+from .resilience import CircuitOpenError, ResiliencePolicy
+from .scheduler import RequestScheduler
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+class ApiTransport:
+    """
+    Transporte HTTP partilhado por todos os serviços de API.
+
+    Mantém um único HTTPAdapter (pool de conexões keep-alive) para o API Gateway,
+    de modo que as requisições reutilizam a mesma conexão TCP+TLS em vez de abrir
+    uma nova a cada chamada. Cada thread recebe a sua própria requests.Session
+    (Session não é thread-safe), mas todas montam o mesmo adapter, logo o pool é comum.
+
+    conditional_get() passa pelo HttpCache (ETag / Last-Modified) para as listas grandes.
+    Todos os pedidos passam pela ResiliencePolicy (repetição dos idempotentes e circuit breaker por endpoint).
+    single_flight junta os GETs idênticos em curso dos serviços (decorador @coalesced).
+
+    Com http2=True (ou API_HTTP2_ENABLED / ADVOCACIA_HTTP2=1) os pedidos vão por uma Http2Session
+    partilhada, multiplexados numa só conexão; os uploads em streaming continuam em HTTP/1.1.
+    Sem o httpx[http2] instalado, fica em HTTP/1.1.
+
+    Os GETs usam timeouts adaptativos (a partir das latências do endpoint, LatencyTracker) e, com
+    hedge=True (detalhes), um pedido duplicado quando o primeiro passa do p95; vale o que chegar primeiro.
+
+    Cada envio ocupa uma vaga do RequestScheduler (teto global e por host), pela prioridade do contexto
+    (request_priority); as esperas entre tentativas não ocupam vaga.
+    """
+
+    def __init__(self, base_url: str = API_GATEWAY_BASE_URL,
+                 pool_connections: int = API_POOL_CONNECTIONS,
+                 pool_maxsize: int = API_POOL_MAXSIZE,
+                 default_headers: Optional[Dict[str, str]] = None,
+                 default_timeout: float = API_DEFAULT_TIMEOUT,
+                 http_cache: Optional[HttpCache] = None,
+                 resilience: Optional[ResiliencePolicy] = None,
+                 http2: Optional[bool] = None,
+                 latency: Optional[LatencyTracker] = None,
+                 scheduler: Optional[RequestScheduler] = None):
+        self.base_url = base_url.rstrip("/")
+        self.default_timeout = default_timeout
+        self.default_headers: Dict[str, str] = {
+            "Accept": "application/json",
+            "User-Agent": f"AdvocaciaApp/{CURRENT_APPLICATION_VERSION}",
+        }
+        if default_headers:
+            self.default_headers.update(default_headers)
+
+        self.http_cache = http_cache if http_cache is not None else HttpCache()
+        self.resilience = resilience if resilience is not None else ResiliencePolicy()
+        self.single_flight = SingleFlight()
+        self.latency = latency if latency is not None else LatencyTracker()
+        self.scheduler = scheduler if scheduler is not None else RequestScheduler()
+        self._hedge_executor = concurrent.futures.ThreadPoolExecutor(max_workers=pool_maxsize, thread_name_prefix="api-hedge")
+        self._base_path = requests.utils.urlparse(self.base_url).path
+        self._adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self._thread_local = threading.local()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._http2_session: Optional[Http2Session] = None
+        if http2 is None:
+            http2 = API_HTTP2_ENABLED or os.environ.get("ADVOCACIA_HTTP2", "").strip().lower() in ("1", "true", "yes")
+        if http2:
+            if http2_available():
+                self._http2_session = Http2Session(self.default_headers, max_connections=pool_maxsize)
+            else:
+                logger.warning("HTTP/2 pedido mas o pacote 'httpx[http2]' não está instalado; a usar HTTP/1.1.")
+        logger.debug("Instanciado para %s (pool: %sx%s, HTTP/2: %s).", self.base_url, pool_connections, pool_maxsize,
+                     "sim" if self._http2_session else "não")
+
+    def _get_session(self) -> requests.Session:
+        """Retorna a Session da thread atual, criando-a na primeira utilização."""
+        session = getattr(self._thread_local, "session", None)
+        if session is None:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("ApiTransport já foi encerrado.")
+                session = requests.Session()
+                session.headers.update(self.default_headers)
+                session.mount("https://", self._adapter)
+                session.mount("http://", self._adapter)
+            self._thread_local.session = session
+        return session
+
+    def _session_for(self, kwargs: Dict[str, Any]) -> Any:
+        if self._http2_session is not None and Http2Session.can_send(kwargs):
+            if self._closed:
+                raise RuntimeError("ApiTransport já foi encerrado.")
+            return self._http2_session
+        return self._get_session()
+
+    def build_url(self, path_or_url: str) -> str:
+        """Aceita um caminho relativo à base (ex: '/users/x/clients') ou uma URL absoluta."""
+        if path_or_url.startswith(("http://", "https://")):
+            return path_or_url
+        if not path_or_url.startswith("/"):
+            path_or_url = "/" + path_or_url
+        return f"{self.base_url}{path_or_url}"
+
+    def request(self, method: str, path_or_url: str, **kwargs: Any) -> requests.Response:
+        """
+        Executa a requisição pela Session da thread atual. Aceita os mesmos kwargs de requests.
+
+        Pedidos idempotentes com falha passageira (rede, timeout, 408/429/5xx) são repetidos com backoff;
+        se ainda assim falharem, devolve a última resposta (ou levanta a última exceção) como antes.
+        Com o circuito do endpoint aberto levanta CircuitOpenError sem contactar o servidor.
+        Nos GETs o timeout do serviço passa a ser um teto (timeout adaptativo); hedge=True ativa o
+        pedido duplicado para GETs sensíveis à latência da cauda.
+        """
+        kwargs.setdefault("timeout", self.default_timeout)
+        hedge = kwargs.pop("hedge", False)
+        method = method.upper()
+        url = self.build_url(path_or_url)
+        policy = self.resilience
+        endpoint = policy.endpoint_key(url, self._base_path)
+        max_attempts = policy.max_attempts if policy.is_retryable_method(method) else 1
+        if method == "GET":
+            if isinstance(kwargs["timeout"], (int, float)):
+                kwargs["timeout"] = self.latency.adaptive_timeout(endpoint, kwargs["timeout"])
+        else:
+            hedge = False # Só GETs podem ser enviados em duplicado sem efeitos no servidor
+
+        attempt = 1
+        while True:
+            try:
+                policy.before_request(endpoint)
+            except CircuitOpenError:
+                if attempt == 1:
+                    raise
+                policy.note_gave_up() # O circuito abriu entre tentativas: fica a última falha
+                if last_error is not None:
+                    raise last_error
+                return response
+            response, last_error = None, None
+            try:
+                if hedge:
+                    response = self._send_hedged(method, url, endpoint, kwargs)
+                else:
+                    response = self._send(method, url, endpoint, kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                policy.record_failure(endpoint)
+                last_error = e
+                reason = type(e).__name__
+            except BaseException:
+                # Outros erros (redirecionamentos, descodificação, scheduler) não contam como falha do
+                # backend, mas não podem deixar o circuito meio-aberto preso à espera deste teste
+                policy.release_trial(endpoint)
+                raise
+            else:
+                if policy.is_backend_failure(response):
+                    policy.record_failure(endpoint)
+                else:
+                    policy.record_success(endpoint)
+                if not policy.is_retryable_response(response):
+                    return response
+                reason = f"HTTP {response.status_code}"
+
+            if attempt >= max_attempts:
+                if max_attempts > 1:
+                    policy.note_gave_up()
+                if last_error is not None:
+                    raise last_error
+                return response
+            delay = policy.retry_delay(attempt, response)
+            policy.note_retry(method, url, attempt, delay, reason)
+            if response is not None:
+                response.close() # Devolve a conexão ao pool antes de esperar
+            time.sleep(delay)
+            attempt += 1
+
+    def _send(self, method: str, url: str, endpoint: str, kwargs: Dict[str, Any]) -> requests.Response:
+        """Um envio (sem repetições) numa vaga do scheduler, registando a latência das respostas bem-sucedidas."""
+        with self.scheduler.slot(requests.utils.urlparse(url).netloc):
+            started = time.monotonic() # Depois da vaga: a espera na fila não conta como latência do endpoint
+            response = self._session_for(kwargs).request(method, url, **kwargs)
+        if not self.resilience.is_backend_failure(response):
+            self.latency.record(endpoint, time.monotonic() - started)
+        return response
+
+    def _send_hedged(self, method: str, url: str, endpoint: str, kwargs: Dict[str, Any]) -> requests.Response:
+        """
+        Envia o pedido e, se não houver resposta até ao p95 do endpoint, envia um duplicado; devolve a
+        primeira resposta obtida (a outra é fechada quando chegar). Se ambos falharem, levanta o erro do primeiro.
+        """
+        delay = self.latency.hedge_delay(endpoint)
+        if delay is None:
+            return self._send(method, url, endpoint, kwargs)
+        # As threads do executor correm com o contexto de quem pediu (mesma prioridade no scheduler)
+        primary = self._hedge_executor.submit(contextvars.copy_context().run, self._send, method, url, endpoint, kwargs)
+        try:
+            return primary.result(timeout=delay)
+        except concurrent.futures.TimeoutError:
+            pass
+        if not self.latency.try_acquire_hedge():
+            return primary.result()
+        logger.debug("GET %s sem resposta após %.2fs (p95); a enviar pedido duplicado.", url, delay)
+        hedged = self._hedge_executor.submit(contextvars.copy_context().run, self._send, method, url, endpoint, kwargs)
+        pending = {primary, hedged}
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.add_done_callback(self._close_discarded)
+                    if future is hedged:
+                        self.latency.note_hedge_won()
+                    return future.result()
+        return primary.result() # Os dois falharam: levanta a exceção do primeiro
+
+    @staticmethod
+    def _close_discarded(future: "concurrent.futures.Future[requests.Response]"):
+        if not future.cancelled() and future.exception() is None:
+            future.result().close()
+
+    def get(self, path_or_url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", path_or_url, **kwargs)
+
+    def conditional_get(self, path_or_url: str, headers: Optional[Dict[str, str]] = None,
+                        params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> requests.Response:
+        """
+        GET com revalidação: envia os validadores guardados e, num 304, devolve o corpo do cache
+        como uma resposta 200 normal (response.from_cache = True), transparente para os serviços.
+        """
+        url = requests.Request("GET", self.build_url(path_or_url), params=params).prepare().url
+        key = self.http_cache.make_key(url, headers)
+        request_headers = dict(headers or {})
+        request_headers.update(self.http_cache.validators_for(key))
+        response = self.get(url, headers=request_headers, **kwargs)
+        response = self.http_cache.handle_response(key, response)
+        if getattr(response, "from_cache", False):
+            logger.debug("304 Not Modified para %s; corpo reutilizado do cache (%s bytes).", url, len(response.content))
+        return response
+
+    def post(self, path_or_url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", path_or_url, **kwargs)
+
+    def put(self, path_or_url: str, **kwargs: Any) -> requests.Response:
+        return self.request("PUT", path_or_url, **kwargs)
+
+    def delete(self, path_or_url: str, **kwargs: Any) -> requests.Response:
+        return self.request("DELETE", path_or_url, **kwargs)
+
+    def close(self):
+        """Fecha o pool de conexões. Chamado no encerramento da aplicação."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._adapter.close()
+            self._hedge_executor.shutdown(wait=False, cancel_futures=True)
+            if self._http2_session is not None:
+                self._http2_session.close()
+        logger.info("Pool de conexões encerrado. Cache HTTP: %s", self.http_cache.stats())
+        logger.info("Repetições e circuitos: %s", self.resilience.stats())
+        logger.info("Pedidos idênticos juntados: %s", self.single_flight.stats())
+        logger.info("Latências e pedidos duplicados: %s", self.latency.stats())
+        logger.info("Filas por prioridade: %s", self.scheduler.stats())
+        if self._http2_session is not None:
+            logger.info("HTTP/2: %s", self._http2_session.stats())
+
+
+_default_transport: Optional[ApiTransport] = None
+_default_transport_lock = threading.Lock()
+
+def get_default_transport() -> ApiTransport:
+    """Instância única do transporte, usada quando nenhum transporte é injetado nos serviços."""
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None or _default_transport._closed:
+            _default_transport = ApiTransport()
+        return _default_transport
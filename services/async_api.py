@@ -0,0 +1,106 @@
+# advocacia_app/services/async_api.py
+
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Coroutine, Optional
+
+from config.constants import API_POOL_MAXSIZE
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncLoopThread:
+    """
+    Event loop asyncio numa thread dedicada, partilhado pela aplicação.
+
+    A GUI (Qt) continua com o seu próprio loop; as corrotinas são submetidas com submit() e o
+    resultado chega como concurrent.futures.Future (o BackgroundTaskRunner converte-o em sinais Qt).
+    As chamadas HTTP continuam a ser feitas pelos serviços síncronos (requests + ApiTransport),
+    executadas num ThreadPoolExecutor dimensionado como o pool de conexões; o asyncio só orquestra
+    (gather, timeouts, cancelamento).
+    """
+
+    def __init__(self, max_workers: int = API_POOL_MAXSIZE):
+        self.loop = asyncio.new_event_loop()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api-async")
+        self.loop.set_default_executor(self.executor)
+        self._thread = threading.Thread(target=self._run_loop, name="api-asyncio-loop", daemon=True)
+        self._thread.start()
+        logger.debug("Event loop iniciado (executor: %s threads).", max_workers)
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> "concurrent.futures.Future[Any]":
+        """Agenda a corrotina no loop (pode ser chamado de qualquer thread)."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def is_running(self) -> bool:
+        return self._thread.is_alive() and not self.loop.is_closed()
+
+    def stop(self):
+        if not self.is_running():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.loop.close()
+        logger.debug("Event loop encerrado.")
+
+
+_async_loop: Optional[AsyncLoopThread] = None
+_async_loop_lock = threading.Lock()
+
+def get_async_loop() -> AsyncLoopThread:
+    """Instância única do loop asyncio da aplicação (criada na primeira utilização)."""
+    global _async_loop
+    with _async_loop_lock:
+        if _async_loop is None or not _async_loop.is_running():
+            _async_loop = AsyncLoopThread()
+        return _async_loop
+
+def shutdown_async_loop():
+    """Chamado no encerramento da aplicação."""
+    global _async_loop
+    with _async_loop_lock:
+        if _async_loop is not None:
+            _async_loop.stop()
+            _async_loop = None
+
+
+class AsyncApiService:
+    """
+    Versão aguardável de um serviço de API (ClientApiService, ProcessApiService, HearingsApiService).
+
+    Cada método público do serviço fica disponível como corrotina com a mesma assinatura e o mesmo
+    retorno (dict com 'success'/'message'), o que permite juntar chamadas independentes:
+
+        process_resp, hearings_resp = await asyncio.gather(
+            async_process_api.get_process_details(user_id, process_id),
+            async_hearings_api.get_hearings_by_user(user_id, process_id=process_id))
+    """
+
+    def __init__(self, service: Any):
+        self.service = service
+
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        method = getattr(self.service, name)
+        if name.startswith("_") or not callable(method):
+            return method
+
+        @functools.wraps(method)
+        async def call_in_executor(*args: Any, **kwargs: Any) -> Any:
+            loop = asyncio.get_running_loop()
+            # run_in_executor não passa o contexto: copiá-lo mantém a prioridade da tarefa (scheduler)
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(None, functools.partial(context.run, method, *args, **kwargs))
+
+        return call_in_executor
+
+    def __repr__(self) -> str:
+        return f"AsyncApiService({type(self.service).__name__})"
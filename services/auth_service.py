@@ -1,36 +1,37 @@
+import logging
 import requests 
 import json
+from typing import Optional
 
-API_GATEWAY_BASE_URL = "https://p55kko7yc6.execute-api.sa-east-1.amazonaws.com/dev"
-API_GATEWAY_LOGIN_ENDPOINT = f"{API_GATEWAY_BASE_URL}/login"
-API_GATEWAY_REGISTER_ENDPOINT = f"{API_GATEWAY_BASE_URL}/register" 
+from config.logging_setup import BodyPreview, Redacted, log_body
+from .api_transport import ApiTransport, get_default_transport
+from .json_codec import decode_json_response, loads_json, response_preview, unwrap_lambda_proxy
+
+logger = logging.getLogger(__name__)
+
+API_GATEWAY_LOGIN_ENDPOINT = "/login"
+API_GATEWAY_REGISTER_ENDPOINT = "/register" 
 
 class AuthService:
-    def __init__(self):
-        pass
+    def __init__(self, transport: Optional[ApiTransport] = None):
+        self.transport = transport or get_default_transport()
 
     def _process_lambda_response(self, response, operation_name="operação"):
         """Processa a resposta HTTP e extrai o corpo da resposta da Lambda."""
-        print(f"Resposta bruta da {operation_name} (status {response.status_code}): {response.text}")
+        log_body(logger, "Resposta bruta da %s (status %s): %s", response, operation_name, response.status_code)
         response.raise_for_status() # Lança exceção para respostas de erro HTTP (4xx ou 5xx)
-        
-        lambda_response_data = response.json() # Resposta completa do API Gateway
-        
-        if 'body' in lambda_response_data and isinstance(lambda_response_data['body'], str):
-            try:
-                body_data = json.loads(lambda_response_data['body'])
-                print(f"Corpo da resposta da Lambda ({operation_name}, parseado): {body_data}")
-                return body_data # Este é o dict com 'success', 'message', etc.
-            except json.JSONDecodeError as e:
-                print(f"Erro ao fazer parse do JSON no 'body' da resposta da Lambda ({operation_name}): {e}")
-                print(f"String do 'body' que causou o erro: {lambda_response_data['body']}")
-                return {"success": False, "message": f"Resposta inválida do servidor (formato do corpo na {operation_name})."}
-        elif 'success' in lambda_response_data: # Fallback se não for proxy e a Lambda retornar diretamente
-            print(f"Usando resposta direta da Lambda (sem 'body' de proxy, {operation_name}): {lambda_response_data}")
-            return lambda_response_data
-        else:
-            print(f"Estrutura de resposta inesperada da Lambda ({operation_name}): {lambda_response_data}")
-            return {"success": False, "message": f"Resposta inválida do servidor (estrutura na {operation_name})."}
+
+        try:
+            # Resposta do API Gateway; o 'body' de um proxy da Lambda é desembrulhado na mesma passagem
+            body_data = decode_json_response(response)
+        except json.JSONDecodeError as e:
+            logger.warning("Erro ao fazer parse do JSON da resposta da Lambda (%s): %s", operation_name, e)
+            return {"success": False, "message": f"Resposta inválida do servidor (formato do corpo na {operation_name})."}
+
+        if isinstance(body_data, dict) and 'success' in body_data: # Dict com 'success', 'message', etc.
+            return body_data
+        logger.warning("Estrutura de resposta inesperada da Lambda (%s): %s", operation_name, Redacted(body_data))
+        return {"success": False, "message": f"Resposta inválida do servidor (estrutura na {operation_name})."}
 
     def _handle_request_exception(self, e, operation_name="operação"):
         """Lida com exceções comuns do requests."""
@@ -38,43 +39,41 @@ class AuthService:
             error_message = f"Erro HTTP na {operation_name}: {e}"
             if e.response is not None:
                 try:
-                    print(f"Resposta de erro HTTP ({operation_name}): {e.response.text}")
+                    logger.warning("Resposta de erro HTTP (%s): %s", operation_name, BodyPreview(e.response))
                     # Tenta extrair a mensagem de erro do corpo da resposta da Lambda, se existir
-                    error_details_outer = e.response.json()
-                    if 'body' in error_details_outer and isinstance(error_details_outer['body'], str):
-                        try:
-                            body_error_details = json.loads(error_details_outer['body'])
-                            if 'message' in body_error_details:
-                                return {"success": False, "message": body_error_details['message']}
-                        except json.JSONDecodeError:
-                            pass # Usa a mensagem externa
-                    if 'message' in error_details_outer: # Se a mensagem estiver no nível superior
+                    error_details_outer = loads_json(e.response.content)
+                    try:
+                        body_error_details = unwrap_lambda_proxy(error_details_outer)
+                        if isinstance(body_error_details, dict) and 'message' in body_error_details:
+                            return {"success": False, "message": body_error_details['message']}
+                    except json.JSONDecodeError:
+                        pass # Usa a mensagem externa
+                    if isinstance(error_details_outer, dict) and 'message' in error_details_outer: # Se a mensagem estiver no nível superior
                          return {"success": False, "message": error_details_outer['message']}
                     error_message += f" - Detalhes: {error_details_outer}"
 
                 except json.JSONDecodeError:
-                    error_message += f" - Resposta não JSON: {e.response.text}"
-            print(error_message)
+                    error_message += f" - Resposta não JSON: {response_preview(e.response)}"
+            logger.warning("%s", error_message)
             return {"success": False, "message": f"Erro de comunicação com o servidor ({operation_name})."}
         elif isinstance(e, requests.exceptions.ConnectionError):
-            print(f"Erro de conexão na {operation_name}: {e}")
+            logger.warning("Erro de conexão na %s: %s", operation_name, e)
             return {"success": False, "message": f"Não foi possível conectar ao servidor ({operation_name})."}
         elif isinstance(e, requests.exceptions.Timeout):
-            print(f"Timeout na requisição de {operation_name}: {e}")
+            logger.warning("Timeout na requisição de %s: %s", operation_name, e)
             return {"success": False, "message": f"A requisição de {operation_name} demorou muito."}
         else: # requests.exceptions.RequestException ou outros
-            print(f"Erro na requisição de {operation_name}: {e}")
+            logger.warning("Erro na requisição de %s: %s", operation_name, e)
             return {"success": False, "message": f"Erro inesperado ({operation_name}): {e}"}
 
     def login(self, username: str, password: str) -> dict:
         payload = {"username": username, "password": password}
         headers = {"Content-Type": "application/json"}
-        api_url = API_GATEWAY_LOGIN_ENDPOINT
+        api_url = self.transport.build_url(API_GATEWAY_LOGIN_ENDPOINT)
 
         try:
-            print(f"Tentando login para {username} em {api_url}...")
-            print(f"PAYLOAD DE LOGIN A SER ENVIADO: {json.dumps(payload)}")
-            response = requests.post(api_url, data=json.dumps(payload), headers=headers, timeout=15)
+            logger.info("Tentando login para %s em %s...", username, api_url)
+            response = self.transport.post(api_url, data=json.dumps(payload), headers=headers, timeout=15)
             return self._process_lambda_response(response, "login")
         except Exception as e:
             return self._handle_request_exception(e, "login")
@@ -84,12 +83,11 @@ class AuthService:
         if email: 
             payload["email"] = email
         headers = {"Content-Type": "application/json"}
-        api_url = API_GATEWAY_REGISTER_ENDPOINT
+        api_url = self.transport.build_url(API_GATEWAY_REGISTER_ENDPOINT)
 
         try:
-            print(f"Tentando registrar usuário {username} em {api_url}...")
-            print(f"PAYLOAD DE REGISTRO A SER ENVIADO: {json.dumps(payload)}")
-            response = requests.post(api_url, data=json.dumps(payload), headers=headers, timeout=15)
+            logger.info("Tentando registrar usuário %s em %s...", username, api_url)
+            response = self.transport.post(api_url, data=json.dumps(payload), headers=headers, timeout=15)
             return self._process_lambda_response(response, "registro")
         except Exception as e:
             return self._handle_request_exception(e, "registro")
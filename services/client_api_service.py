@@ -1,14 +1,22 @@
+import logging
 import requests
 import json
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Sequence
 
-# URL base do seu API Gateway (incluindo o estágio, ex: /dev)
-API_GATEWAY_CLIENTS_BASE_URL = "https://p55kko7yc6.execute-api.sa-east-1.amazonaws.com/dev"
+from config.constants import LIST_PAGE_SIZE
+from config.logging_setup import BodyPreview, Redacted, log_body
+from .api_transport import ApiTransport, get_default_transport
+from .json_codec import decode_json_response, response_preview
+from .pagination import iterate_pages
+from .single_flight import coalesced
+
+logger = logging.getLogger(__name__)
 
 class ClientApiService:
-    def __init__(self, auth_token=None):
+    def __init__(self, auth_token=None, transport: Optional[ApiTransport] = None):
         self.auth_token = auth_token
-        print(f"ClientApiService: Instanciado com token: {'Sim' if auth_token else 'Não'}")
+        self.transport = transport or get_default_transport()
+        logger.debug("Instanciado com token: %s", 'Sim' if auth_token else 'Não')
 
     def _get_auth_headers(self) -> Dict[str, str]:
         headers = {"Content-Type": "application/json"}
@@ -19,131 +27,156 @@ class ClientApiService:
 
     def _handle_api_error(self, http_err: requests.exceptions.HTTPError, operation_name: str) -> Dict[str, Any]:
         """Lida com erros HTTP e tenta parsear a resposta da Lambda."""
-        print(f"ClientApiService: Erro HTTP em '{operation_name}': Status {http_err.response.status_code} - Resposta: {http_err.response.text}")
+        logger.warning("Erro HTTP em '%s': Status %s - Resposta: %s", operation_name, http_err.response.status_code, BodyPreview(http_err.response))
         try:
-            error_body = http_err.response.json()
-            if isinstance(error_body, str): # Se corpo for string JSON
-                try:
-                    error_body = json.loads(error_body)
-                except json.JSONDecodeError:
-                    # Mantém como string se não for JSON válido, mas loga
-                    print(f"ClientApiService: Corpo do erro HTTP não era JSON decodificável: {error_body}")
+            error_body = decode_json_response(http_err.response) # Também desfaz corpos JSON em string (proxy Lambda)
+            if isinstance(error_body, dict):
+                error_body.setdefault("http_status", http_err.response.status_code) # Usado para decidir se vale repetir
             return error_body 
         except json.JSONDecodeError:
-            return {"success": False, "message": f"Erro HTTP {http_err.response.status_code} em '{operation_name}'. Resposta não JSON: {http_err.response.text}"}
+            return {"success": False, "http_status": http_err.response.status_code, "message": f"Erro HTTP {http_err.response.status_code} em '{operation_name}'. Resposta não JSON: {response_preview(http_err.response)}"}
         except Exception as e: # Outro erro ao processar a resposta de erro
-            return {"success": False, "message": f"Erro HTTP {http_err.response.status_code} em '{operation_name}'. Erro ao processar resposta de erro: {str(e)}"}
+            return {"success": False, "http_status": http_err.response.status_code, "message": f"Erro HTTP {http_err.response.status_code} em '{operation_name}'. Erro ao processar resposta de erro: {str(e)}"}
 
     def add_client(self, user_id: str, client_data: Dict[str, Any]) -> Dict[str, Any]:
         operation_name = "adicionar cliente"
-        url = f"{API_GATEWAY_CLIENTS_BASE_URL}/users/{user_id}/clients"
+        url = self.transport.build_url(f"/users/{user_id}/clients")
         payload = client_data.copy() 
 
-        print(f"ClientApiService ({operation_name}): Chamando URL: {url}")
-        print(f"ClientApiService ({operation_name}): User ID: {user_id}")
-        print(f"ClientApiService ({operation_name}): Payload: {json.dumps(payload)}")
+        logger.debug("(%s) Chamando URL: %s", operation_name, url)
+        logger.debug("(%s) User ID: %s", operation_name, user_id)
+        logger.debug("(%s) Payload: %s", operation_name, Redacted(payload))
         
         try:
-            response = requests.post(url, headers=self._get_auth_headers(), data=json.dumps(payload), timeout=15)
-            print(f"ClientApiService ({operation_name}): Resposta bruta status: {response.status_code}, texto: {response.text}")
+            response = self.transport.post(url, headers=self._get_auth_headers(), data=json.dumps(payload), timeout=15)
+            log_body(logger, "(%s) Resposta status %s: %s", response, operation_name, response.status_code)
             response.raise_for_status()
-            return response.json() 
+            return decode_json_response(response) 
         except requests.exceptions.HTTPError as http_err:
             return self._handle_api_error(http_err, operation_name)
         except requests.exceptions.RequestException as req_err:
-            print(f"ClientApiService ({operation_name}): Erro de requisição: {req_err}")
+            logger.warning("(%s) Erro de requisição: %s", operation_name, req_err)
             return {"success": False, "message": f"Erro de comunicação ao {operation_name}: {str(req_err)}"}
         except Exception as e:
-            print(f"ClientApiService ({operation_name}): Erro inesperado: {e}")
+            logger.exception("(%s) Erro inesperado: %s", operation_name, e)
             return {"success": False, "message": f"Erro inesperado em {operation_name}: {str(e)}"}
 
-    def get_clients_by_user(self, user_id: str) -> Dict[str, Any]:
+    @coalesced
+    def get_clients_by_user(self, user_id: str, updated_since: Optional[str] = None,
+                            fields: Optional[Sequence[str]] = None,
+                            limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Lista os clientes do utilizador. Com 'updated_since' (cursor de uma sincronização anterior) pede
+        só o delta: 'clients' traz os alterados desde o cursor, 'deleted' os CPFs removidos e
+        'sync_cursor' o cursor para o próximo pedido.
+        'fields' limita os atributos devolvidos por cliente (projeção); o registo completo vem de get_client().
+        Com 'limit' a API devolve uma página e, se houver mais, 'next_cursor' (a passar em 'cursor').
+        """
         operation_name = "buscar clientes por usuário"
-        url = f"{API_GATEWAY_CLIENTS_BASE_URL}/users/{user_id}/clients"
-
-        print(f"ClientApiService ({operation_name}): Chamando URL: {url}")
-        print(f"ClientApiService ({operation_name}): User ID: {user_id}")
+        url = self.transport.build_url(f"/users/{user_id}/clients")
+
+        logger.debug("(%s) Chamando URL: %s", operation_name, url)
+        logger.debug("(%s) User ID: %s, updated_since: %s, fields: %s", operation_name, user_id, updated_since, fields)
+        params = {}
+        if fields:
+            params["fields"] = ",".join(fields)
+        if limit:
+            params["limit"] = limit
+        if cursor:
+            params["cursor"] = cursor
 
         try:
-            response = requests.get(url, headers=self._get_auth_headers(), timeout=15)
-            print(f"ClientApiService ({operation_name}): Resposta bruta status: {response.status_code}, texto: {response.text}")
+            if updated_since:
+                # Cada cursor é uma URL nova: não passa pelo cache HTTP
+                params["updated_since"] = updated_since
+                response = self.transport.get(url, headers=self._get_auth_headers(), params=params, timeout=15)
+            else:
+                response = self.transport.conditional_get(url, headers=self._get_auth_headers(), params=params, timeout=15)
+            log_body(logger, "(%s) Resposta status %s: %s", response, operation_name, response.status_code)
             response.raise_for_status()
-            return response.json()
+            return decode_json_response(response)
         except requests.exceptions.HTTPError as http_err:
             error_response = self._handle_api_error(http_err, operation_name)
             if "clients" not in error_response:
                  error_response["clients"] = []
             return error_response
         except requests.exceptions.RequestException as req_err:
-            print(f"ClientApiService ({operation_name}): Erro de requisição: {req_err}")
+            logger.warning("(%s) Erro de requisição: %s", operation_name, req_err)
             return {"success": False, "message": f"Erro de comunicação ao {operation_name}: {str(req_err)}", "clients": []}
         except Exception as e:
-            print(f"ClientApiService ({operation_name}): Erro inesperado: {e}")
+            logger.exception("(%s) Erro inesperado: %s", operation_name, e)
             return {"success": False, "message": f"Erro inesperado em {operation_name}: {str(e)}", "clients": []}
 
+    def iter_clients_by_user(self, user_id: str, page_size: int = LIST_PAGE_SIZE, updated_since: Optional[str] = None,
+                             fields: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Gerador das páginas de get_clients_by_user (a primeira chega após um único pedido)."""
+        return iterate_pages(lambda cursor: self.get_clients_by_user(
+            user_id, updated_since=updated_since, fields=fields, limit=page_size, cursor=cursor))
+
+    @coalesced
     def get_client(self, user_id: str, client_cpf: str) -> Dict[str, Any]:
         operation_name = "buscar cliente específico"
-        url = f"{API_GATEWAY_CLIENTS_BASE_URL}/users/{user_id}/clients/{client_cpf}"
+        url = self.transport.build_url(f"/users/{user_id}/clients/{client_cpf}")
 
-        print(f"ClientApiService ({operation_name}): Chamando URL: {url}")
-        print(f"ClientApiService ({operation_name}): User ID: {user_id}, CPF Cliente: {client_cpf}")
+        logger.debug("(%s) Chamando URL: %s", operation_name, url)
+        logger.debug("(%s) User ID: %s, CPF Cliente: %s", operation_name, user_id, client_cpf)
         
         try:
-            response = requests.get(url, headers=self._get_auth_headers(), timeout=15)
-            print(f"ClientApiService ({operation_name}): Resposta bruta status: {response.status_code}, texto: {response.text}")
+            response = self.transport.get(url, headers=self._get_auth_headers(), timeout=15, hedge=True)
+            log_body(logger, "(%s) Resposta status %s: %s", response, operation_name, response.status_code)
             response.raise_for_status()
-            return response.json()
+            return decode_json_response(response)
         except requests.exceptions.HTTPError as http_err:
             return self._handle_api_error(http_err, operation_name)
         except requests.exceptions.RequestException as req_err:
-            print(f"ClientApiService ({operation_name}): Erro de requisição: {req_err}")
+            logger.warning("(%s) Erro de requisição: %s", operation_name, req_err)
             return {"success": False, "message": f"Erro de comunicação ao {operation_name}: {str(req_err)}"}
         except Exception as e:
-            print(f"ClientApiService ({operation_name}): Erro inesperado: {e}")
+            logger.exception("(%s) Erro inesperado: %s", operation_name, e)
             return {"success": False, "message": f"Erro inesperado em {operation_name}: {str(e)}"}
             
     def update_client(self, user_id: str, client_cpf: str, update_data: Dict[str, Any]) -> Dict[str, Any]:
         operation_name = "atualizar cliente"
-        url = f"{API_GATEWAY_CLIENTS_BASE_URL}/users/{user_id}/clients/{client_cpf}"
+        url = self.transport.build_url(f"/users/{user_id}/clients/{client_cpf}")
         payload = update_data.copy()
 
-        print(f"ClientApiService ({operation_name}): Chamando URL: {url}")
-        print(f"ClientApiService ({operation_name}): User ID: {user_id}, CPF Cliente: {client_cpf}")
-        print(f"ClientApiService ({operation_name}): Payload: {json.dumps(payload)}")
+        logger.debug("(%s) Chamando URL: %s", operation_name, url)
+        logger.debug("(%s) User ID: %s, CPF Cliente: %s", operation_name, user_id, client_cpf)
+        logger.debug("(%s) Payload: %s", operation_name, Redacted(payload))
 
         try:
-            response = requests.put(url, headers=self._get_auth_headers(), data=json.dumps(payload), timeout=15)
-            print(f"ClientApiService ({operation_name}): Resposta bruta status: {response.status_code}, texto: {response.text}")
+            response = self.transport.put(url, headers=self._get_auth_headers(), data=json.dumps(payload), timeout=15)
+            log_body(logger, "(%s) Resposta status %s: %s", response, operation_name, response.status_code)
             response.raise_for_status()
-            return response.json()
+            return decode_json_response(response)
         except requests.exceptions.HTTPError as http_err:
             return self._handle_api_error(http_err, operation_name)
         except requests.exceptions.RequestException as req_err:
-            print(f"ClientApiService ({operation_name}): Erro de requisição: {req_err}")
+            logger.warning("(%s) Erro de requisição: %s", operation_name, req_err)
             return {"success": False, "message": f"Erro de comunicação ao {operation_name}: {str(req_err)}"}
         except Exception as e:
-            print(f"ClientApiService ({operation_name}): Erro inesperado: {e}")
+            logger.exception("(%s) Erro inesperado: %s", operation_name, e)
             return {"success": False, "message": f"Erro ao {operation_name}: {str(e)}"}
 
     def delete_client(self, user_id: str, client_cpf: str) -> Dict[str, Any]:
         operation_name = "remover cliente"
-        url = f"{API_GATEWAY_CLIENTS_BASE_URL}/users/{user_id}/clients/{client_cpf}"
+        url = self.transport.build_url(f"/users/{user_id}/clients/{client_cpf}")
 
-        print(f"ClientApiService ({operation_name}): Chamando URL: {url}")
-        print(f"ClientApiService ({operation_name}): User ID: {user_id}, CPF Cliente: {client_cpf}")
+        logger.debug("(%s) Chamando URL: %s", operation_name, url)
+        logger.debug("(%s) User ID: %s, CPF Cliente: %s", operation_name, user_id, client_cpf)
 
         try:
-            response = requests.delete(url, headers=self._get_auth_headers(), timeout=15)
-            print(f"ClientApiService ({operation_name}): Resposta bruta status: {response.status_code}, texto: {response.text}")
+            response = self.transport.delete(url, headers=self._get_auth_headers(), timeout=15)
+            log_body(logger, "(%s) Resposta status %s: %s", response, operation_name, response.status_code)
             response.raise_for_status()
-            return response.json()
+            return decode_json_response(response)
         except requests.exceptions.HTTPError as http_err:
             return self._handle_api_error(http_err, operation_name)
         except requests.exceptions.RequestException as req_err:
-            print(f"ClientApiService ({operation_name}): Erro de requisição: {req_err}")
+            logger.warning("(%s) Erro de requisição: %s", operation_name, req_err)
             return {"success": False, "message": f"Erro de comunicação ao {operation_name}: {str(req_err)}"}
         except Exception as e:
-            print(f"ClientApiService ({operation_name}): Erro inesperado: {e}")
+            logger.exception("(%s) Erro inesperado: %s", operation_name, e)
             return {"success": False, "message": f"Erro ao {operation_name}: {str(e)}"}
 
 if __name__ == '__main__':
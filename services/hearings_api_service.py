@@ -1,19 +1,24 @@
 # advocacia_app/services/hearings_api_service.py
 
+import logging
 import requests
 import json
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Sequence
 
-# A URL base da API Gateway deve ser centralizada em constants.py
-# Por enquanto, vamos definir aqui, mas o ideal é importar de config.constants
-# Supondo que os endpoints de audiências estarão sob a mesma API Gateway
-API_GATEWAY_BASE_URL = "https://p55kko7yc6.execute-api.sa-east-1.amazonaws.com/dev" 
+from config.constants import LIST_PAGE_SIZE
+from config.logging_setup import BodyPreview, Redacted, log_body
+from .api_transport import ApiTransport, get_default_transport
+from .json_codec import decode_json_response, response_preview
+from .pagination import iterate_pages
+from .single_flight import coalesced
+
+logger = logging.getLogger(__name__)
 
 class HearingsApiService:
-    def __init__(self, auth_token: Optional[str] = None):
+    def __init__(self, auth_token: Optional[str] = None, transport: Optional[ApiTransport] = None):
         self.auth_token = auth_token
-        self.base_url = API_GATEWAY_BASE_URL # Poderia ser injetado ou importado
-        print(f"HearingsApiService: Instanciado com token: {'Sim' if auth_token else 'Não'}")
+        self.transport = transport or get_default_transport()
+        logger.debug("Instanciado com token: %s", 'Sim' if auth_token else 'Não')
 
     def _get_auth_headers(self) -> Dict[str, str]:
         headers = {"Content-Type": "application/json"}
@@ -23,43 +28,42 @@ class HearingsApiService:
 
     def _handle_api_error(self, http_err: requests.exceptions.HTTPError, operation_name: str) -> Dict[str, Any]:
         """Lida com erros HTTP e tenta parsear a resposta da Lambda."""
-        print(f"HearingsApiService: Erro HTTP em '{operation_name}': Status {http_err.response.status_code} - Resposta: {http_err.response.text}")
+        logger.warning("Erro HTTP em '%s': Status %s - Resposta: %s", operation_name, http_err.response.status_code, BodyPreview(http_err.response))
         try:
-            error_body = http_err.response.json()
-            # Se o corpo do erro for uma string JSON (comum com proxy Lambda), parseie-o
-            if isinstance(error_body, str):
-                try:
-                    error_body = json.loads(error_body)
-                except json.JSONDecodeError:
-                    # Mantém como string se não for JSON válido, mas loga
-                    print(f"HearingsApiService: Corpo do erro HTTP não era JSON decodificável: {error_body}")
+            error_body = decode_json_response(http_err.response) # Também desfaz corpos JSON em string (proxy Lambda)
+            if isinstance(error_body, dict):
+                error_body.setdefault("http_status", http_err.response.status_code) # Usado para decidir se vale repetir
             return error_body # Pode ser um dict com 'success': False, 'message': '...' ou a resposta direta do API Gateway
         except json.JSONDecodeError: # Se a resposta de erro em si não for JSON
-            return {"success": False, "message": f"Erro HTTP {http_err.response.status_code} em '{operation_name}'. Resposta não JSON: {http_err.response.text}"}
+            return {"success": False, "http_status": http_err.response.status_code, "message": f"Erro HTTP {http_err.response.status_code} em '{operation_name}'. Resposta não JSON: {response_preview(http_err.response)}"}
         except Exception as e: # Outro erro ao processar a resposta de erro
-            return {"success": False, "message": f"Erro HTTP {http_err.response.status_code} em '{operation_name}'. Erro ao processar resposta de erro: {str(e)}"}
-
-    def _make_request(self, method: str, endpoint: str, operation_name: str, params: Optional[Dict] = None, data: Optional[Dict] = None) -> Dict[str, Any]:
-        """Método genérico para fazer requisições."""
-        url = f"{self.base_url}{endpoint}"
-        print(f"HearingsApiService ({operation_name}): Chamando {method} URL: {url}")
-        if params: print(f"HearingsApiService ({operation_name}): Params: {params}")
-        if data: print(f"HearingsApiService ({operation_name}): Data: {json.dumps(data)}")
+            return {"success": False, "http_status": http_err.response.status_code, "message": f"Erro HTTP {http_err.response.status_code} em '{operation_name}'. Erro ao processar resposta de erro: {str(e)}"}
+
+    def _make_request(self, method: str, endpoint: str, operation_name: str, params: Optional[Dict] = None, data: Optional[Dict] = None, conditional: bool = False, hedge: bool = False) -> Dict[str, Any]:
+        """
+        Método genérico para fazer requisições. 'conditional' revalida um GET pelo cache HTTP (ETag);
+        'hedge' envia um GET duplicado se o primeiro demorar mais que o habitual (detalhes).
+        """
+        url = self.transport.build_url(endpoint)
+        logger.debug("(%s) Chamando %s URL: %s", operation_name, method, url)
+        if params: logger.debug("(%s) Params: %s", operation_name, params)
+        if data: logger.debug("(%s) Data: %s", operation_name, Redacted(data))
 
         try:
-            response = requests.request(method, url, headers=self._get_auth_headers(), params=params, json=data, timeout=15)
-            print(f"HearingsApiService ({operation_name}): Resposta bruta status: {response.status_code}, texto: {response.text[:500]}...") # Limita o log do texto
+            if conditional and method == "GET":
+                response = self.transport.conditional_get(url, headers=self._get_auth_headers(), params=params, timeout=15)
+            else:
+                response = self.transport.request(method, url, headers=self._get_auth_headers(), params=params, json=data, timeout=15, hedge=hedge)
+            log_body(logger, "(%s) Resposta status %s: %s", response, operation_name, response.status_code)
             response.raise_for_status()
-            return response.json()
+            return decode_json_response(response)
         except requests.exceptions.HTTPError as http_err:
             return self._handle_api_error(http_err, operation_name)
         except requests.exceptions.RequestException as req_err:
-            print(f"HearingsApiService ({operation_name}): Erro de requisição: {req_err}")
+            logger.warning("(%s) Erro de requisição: %s", operation_name, req_err)
             return {"success": False, "message": f"Erro de comunicação ao {operation_name}: {str(req_err)}"}
         except Exception as e: # Captura outros erros inesperados
-            print(f"HearingsApiService ({operation_name}): Erro inesperado: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("(%s) Erro inesperado: %s", operation_name, e)
             return {"success": False, "message": f"Erro inesperado em {operation_name}: {str(e)}"}
 
     def add_hearing(self, user_id: str, hearing_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -67,8 +71,16 @@ class HearingsApiService:
         endpoint = f"/users/{user_id}/hearings"
         return self._make_request("POST", endpoint, "adicionar audiência", data=hearing_data)
 
-    def get_hearings_by_user(self, user_id: str, process_id: Optional[str] = None, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
-        """Busca audiências por usuário, opcionalmente filtrando por ID do processo ou intervalo de datas."""
+    @coalesced
+    def get_hearings_by_user(self, user_id: str, process_id: Optional[str] = None, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                             updated_since: Optional[str] = None, fields: Optional[Sequence[str]] = None,
+                             limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Busca audiências por usuário, opcionalmente filtrando por ID do processo ou intervalo de datas.
+        Com 'updated_since' pede só o delta desde esse cursor ('hearings' alteradas, 'deleted' com os IDs
+        removidos e 'sync_cursor' para o próximo pedido). 'fields' limita os atributos devolvidos (projeção).
+        Com 'limit' a API devolve uma página e, se houver mais, 'next_cursor' (a passar em 'cursor').
+        """
         endpoint = f"/users/{user_id}/hearings"
         params = {}
         if process_id:
@@ -77,16 +89,32 @@ class HearingsApiService:
             params['start_date'] = start_date # Formato esperado: YYYY-MM-DD
         if end_date:
             params['end_date'] = end_date   # Formato esperado: YYYY-MM-DD
+        if updated_since:
+            params['updated_since'] = updated_since
+        if fields:
+            params['fields'] = ",".join(fields)
+        if limit:
+            params['limit'] = limit
+        if cursor:
+            params['cursor'] = cursor
         
-        response = self._make_request("GET", endpoint, "buscar audiências", params=params)
+        # Cada cursor é uma URL nova: os pedidos de delta não passam pelo cache HTTP
+        response = self._make_request("GET", endpoint, "buscar audiências", params=params, conditional=not updated_since)
         if "hearings" not in response: # Garante que a chave 'hearings' sempre exista
             response["hearings"] = []
         return response
 
+    def iter_hearings_by_user(self, user_id: str, page_size: int = LIST_PAGE_SIZE, updated_since: Optional[str] = None,
+                              fields: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Gerador das páginas de get_hearings_by_user (a primeira chega após um único pedido)."""
+        return iterate_pages(lambda cursor: self.get_hearings_by_user(
+            user_id, updated_since=updated_since, fields=fields, limit=page_size, cursor=cursor))
+
+    @coalesced
     def get_hearing_details(self, user_id: str, hearing_id: str) -> Dict[str, Any]:
         """Busca detalhes de uma audiência específica."""
         endpoint = f"/users/{user_id}/hearings/{hearing_id}"
-        return self._make_request("GET", endpoint, "buscar detalhes da audiência")
+        return self._make_request("GET", endpoint, "buscar detalhes da audiência", hedge=True)
 
     def update_hearing(self, user_id: str, hearing_id: str, hearing_data: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza uma audiência existente."""
@@ -0,0 +1,113 @@
+# advocacia_app/services/http2_session.py
+
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+try: # Dependência opcional: pip install "httpx[http2]"
+    import httpx
+    import h2  # noqa: F401 (o httpx só negocia HTTP/2 com o pacote h2 instalado)
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# kwargs de requests.Session.request() que Http2Session.request() traduz para o httpx
+HTTP2_SUPPORTED_KWARGS = frozenset({"headers", "params", "data", "json", "timeout"})
+
+
+def http2_available() -> bool:
+    return httpx is not None
+
+
+class Http2Session:
+    """
+    Sessão HTTP/2 (httpx) com a mesma interface de requests.Session.request() usada pelo ApiTransport.
+
+    Um único httpx.Client, partilhado por todas as threads (é thread-safe), mantém uma conexão TLS por
+    host e multiplexa nela os pedidos simultâneos (listas das abas, detalhes, prefetch), sem um
+    handshake por conexão nem bloqueio de cabeça de fila. As respostas são convertidas em
+    requests.Response e as exceções nas de requests, logo os serviços e o HttpCache não mudam.
+
+    O urllib3 2.x também traz suporte HTTP/2 (urllib3.http2), mas experimental: um pedido por conexão
+    (sem multiplexação) e ativado por monkeypatch global do urllib3; por isso usa-se o httpx.
+    """
+
+    def __init__(self, default_headers: Optional[Dict[str, str]] = None, max_connections: int = 10):
+        if httpx is None:
+            raise RuntimeError("HTTP/2 indisponível: instale 'httpx[http2]'.")
+        self.headers = CaseInsensitiveDict(default_headers or {})
+        self._client = httpx.Client(
+            http2=True,
+            headers=dict(self.headers),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "http2_responses": 0}
+
+    @staticmethod
+    def can_send(kwargs: Dict[str, Any]) -> bool:
+        """
+        Só os pedidos que request() traduz sem mudar de comportamento. Os outros kwargs do requests
+        (allow_redirects, files, stream, verify, auth, ...) e os corpos em streaming (ex: MultipartEncoder
+        dos uploads) continuam pela sessão HTTP/1.1 do requests: o httpx, por exemplo, não segue
+        redirecionamentos por omissão.
+        """
+        if any(value is not None for name, value in kwargs.items() if name not in HTTP2_SUPPORTED_KWARGS):
+            return False
+        data = kwargs.get("data")
+        return data is None or isinstance(data, (str, bytes, dict))
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                params: Optional[Dict[str, Any]] = None, data: Any = None, json: Any = None,
+                timeout: Any = None, **kwargs: Any) -> requests.Response:
+        unsupported = sorted(name for name, value in kwargs.items() if value is not None)
+        if unsupported: # O ApiTransport consulta can_send() antes; nunca descartar opções em silêncio
+            raise TypeError(f"Http2Session não suporta: {', '.join(unsupported)}")
+        request_kwargs: Dict[str, Any] = {"headers": headers, "params": params, "json": json}
+        if isinstance(data, dict):
+            request_kwargs["data"] = data
+        elif data is not None:
+            request_kwargs["content"] = data.encode("utf-8") if isinstance(data, str) else data
+        if isinstance(timeout, tuple): # (connect, read) como no requests
+            connect_timeout, read_timeout = timeout
+            request_kwargs["timeout"] = httpx.Timeout(read_timeout, connect=connect_timeout)
+        elif timeout is not None:
+            request_kwargs["timeout"] = httpx.Timeout(timeout)
+        try:
+            response = self._client.request(method, url, **request_kwargs)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except (httpx.NetworkError, httpx.RemoteProtocolError, httpx.ProxyError) as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.exceptions.RequestException(str(e)) from e
+        with self._lock:
+            self._stats["requests"] += 1
+            if response.http_version == "HTTP/2":
+                self._stats["http2_responses"] += 1
+        return self._to_requests_response(response)
+
+    @staticmethod
+    def _to_requests_response(response: "httpx.Response") -> requests.Response:
+        converted = requests.Response()
+        converted.status_code = response.status_code
+        converted.reason = response.reason_phrase
+        converted._content = response.content
+        converted._content_consumed = True # Corpo já lido: close() não tem conexão a libertar
+        converted.headers = CaseInsensitiveDict(response.headers.items())
+        converted.encoding = response.charset_encoding
+        converted.url = str(response.url)
+        converted.elapsed = response.elapsed
+        converted.http_version = response.http_version
+        return converted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self):
+        self._client.close()
@@ -0,0 +1,141 @@
+# advocacia_app/services/http_cache.py
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+import requests
+
+from config.constants import HTTP_CACHE_MAX_BYTES, HTTP_CACHE_MAX_ENTRIES
+
+
+class HttpCacheEntry:
+    """Corpo de uma resposta 200 e os validadores (ETag / Last-Modified) devolvidos pelo servidor."""
+    __slots__ = ("url", "etag", "last_modified", "content", "headers", "encoding")
+
+    def __init__(self, url: str, etag: Optional[str], last_modified: Optional[str],
+                 content: bytes, headers: Dict[str, str], encoding: Optional[str]):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content = content
+        self.headers = headers
+        self.encoding = encoding
+
+    @property
+    def size(self) -> int:
+        return len(self.content)
+
+
+class HttpCache:
+    """
+    Cache HTTP do lado do cliente para GETs condicionais (usado pelo ApiTransport).
+
+    Guarda, por URL (com a query) e por utilizador (hash do header Authorization), o último corpo
+    recebido e os seus validadores. O próximo GET envia If-None-Match / If-Modified-Since; se o
+    servidor responder 304, o corpo guardado é reutilizado sem voltar a ser baixado.
+    LRU limitado pelo total de bytes e pelo número de entradas. Thread-safe (chamado pelos workers).
+    """
+
+    def __init__(self, max_bytes: int = HTTP_CACHE_MAX_BYTES, max_entries: int = HTTP_CACHE_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], HttpCacheEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "hits": 0, "misses": 0, "stores": 0, "evictions": 0, "bytes_saved": 0}
+
+    @staticmethod
+    def make_key(url: str, headers: Optional[Dict[str, str]]) -> Tuple[str, str]:
+        """Chave (URL, utilizador). O token não é guardado em claro, só o seu hash."""
+        authorization = (headers or {}).get("Authorization", "")
+        user_hash = hashlib.sha256(authorization.encode("utf-8")).hexdigest()[:16] if authorization else ""
+        return (url, user_hash)
+
+    def validators_for(self, key: Tuple[str, str]) -> Dict[str, str]:
+        """Headers condicionais a enviar para esta chave (vazio se não houver entrada)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return {}
+            validators = {}
+            if entry.etag:
+                validators["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                validators["If-Modified-Since"] = entry.last_modified
+            return validators
+
+    def handle_response(self, key: Tuple[str, str], response: requests.Response) -> requests.Response:
+        """
+        Processa a resposta de um GET condicional: num 304 devolve uma resposta 200 reconstruída a
+        partir da entrada guardada; num 200 com validadores guarda o corpo; senão só conta a falha.
+        """
+        with self._lock:
+            self._stats["requests"] += 1
+            entry = self._entries.get(key)
+            if response.status_code == 304 and entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                self._stats["bytes_saved"] += entry.size
+                return self._build_cached_response(entry, response)
+
+            self._stats["misses"] += 1
+            if response.status_code == 200:
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                if etag or last_modified:
+                    self._store(key, HttpCacheEntry(
+                        response.url, etag, last_modified, response.content,
+                        dict(response.headers), response.encoding
+                    ))
+                elif entry is not None: # O servidor deixou de enviar validadores: a entrada já não serve
+                    self._discard(key)
+        return response
+
+    def _store(self, key: Tuple[str, str], entry: HttpCacheEntry):
+        if entry.size > self.max_bytes:
+            self._discard(key)
+            return
+        self._discard(key)
+        self._entries[key] = entry
+        self._total_bytes += entry.size
+        self._stats["stores"] += 1
+        while self._entries and (self._total_bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            _, evicted = self._entries.popitem(last=False) # Menos usada recentemente
+            self._total_bytes -= evicted.size
+            self._stats["evictions"] += 1
+
+    def _discard(self, key: Tuple[str, str]):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.size
+
+    @staticmethod
+    def _build_cached_response(entry: HttpCacheEntry, not_modified: requests.Response) -> requests.Response:
+        cached = requests.Response()
+        cached.status_code = 200
+        cached.reason = "OK (cache)"
+        cached._content = entry.content
+        cached.headers.update(entry.headers)
+        cached.headers.update(not_modified.headers) # O 304 pode trazer validadores/expiração atualizados
+        cached.encoding = entry.encoding
+        cached.url = entry.url
+        cached.request = not_modified.request
+        cached.elapsed = not_modified.elapsed
+        cached.from_cache = True
+        return cached
+
+    def clear(self):
+        """Descarta todas as entradas (ex: no logout), mantendo as estatísticas."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes_cached"] = self._total_bytes
+        stats["hit_rate"] = stats["hits"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
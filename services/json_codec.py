@@ -0,0 +1,54 @@
+# advocacia_app/services/json_codec.py
+
+import json
+from typing import Any
+
+import requests
+
+try: # Backend opcional mais rápido; sem ele usa-se o json da biblioteca padrão
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError é subclasse de json.JSONDecodeError: os 'except json.JSONDecodeError' continuam a valer
+JSONDecodeError = json.JSONDecodeError
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+
+def loads_json(data: Any) -> Any:
+    """
+    Converte JSON (bytes UTF-8 ou str) em objetos Python. Os bytes vão diretamente para o parser,
+    sem passar por response.text (que, sem charset no Content-Type, corre a deteção de encoding
+    sobre o corpo inteiro antes de o descodificar).
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def unwrap_lambda_proxy(data: Any) -> Any:
+    """
+    Devolve o conteúdo de um envelope de integração proxy da Lambda ({"statusCode": ..., "body": "<json>"})
+    ou de um corpo JSON duplamente codificado (uma string com JSON); qualquer outro valor volta como está.
+    Levanta JSONDecodeError se o 'body' não for JSON.
+    """
+    if isinstance(data, dict) and isinstance(data.get("body"), str) and "statusCode" in data:
+        return loads_json(data["body"])
+    if isinstance(data, str) and data[:1] in ("{", "["):
+        return loads_json(data)
+    return data
+
+
+def decode_json_response(response: requests.Response) -> Any:
+    """Corpo JSON da resposta, descodificado numa só passagem a partir dos bytes e sem envelope da Lambda."""
+    return unwrap_lambda_proxy(loads_json(response.content))
+
+
+def response_preview(response: requests.Response, limit: int = 1000) -> str:
+    """Início do corpo para os logs, descodificado como UTF-8 sem deteção de charset."""
+    content = response.content or b""
+    preview = content[:limit].decode("utf-8", errors="replace")
+    if len(content) > limit:
+        preview += f"... ({len(content)} bytes)"
+    return preview
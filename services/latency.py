@@ -0,0 +1,91 @@
+# advocacia_app/services/latency.py
+
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from config.constants import (
+    API_LATENCY_WINDOW,
+    API_LATENCY_MIN_SAMPLES,
+    API_ADAPTIVE_TIMEOUT_MULTIPLIER,
+    API_ADAPTIVE_TIMEOUT_MIN_SECONDS,
+    API_HEDGE_PERCENTILE,
+    API_HEDGE_MAX_RATIO
+)
+
+
+class LatencyTracker:
+    """
+    Latências recentes (janela deslizante) de cada endpoint, usadas pelo ApiTransport para:
+    - timeouts adaptativos: p99 x multiplicador, entre um mínimo e o timeout pedido pelo serviço;
+    - pedidos "hedged": se um GET idempotente passa do p95 do endpoint, é enviado um duplicado e
+      usa-se a resposta que chegar primeiro. Os duplicados estão limitados a uma fração dos pedidos
+      (hedge_max_ratio) para não duplicar a carga quando o backend inteiro está lento.
+    Sem amostras suficientes (min_samples) valem o timeout do serviço e nenhum duplicado. Thread-safe.
+    """
+
+    def __init__(self, window: int = API_LATENCY_WINDOW, min_samples: int = API_LATENCY_MIN_SAMPLES,
+                 timeout_multiplier: float = API_ADAPTIVE_TIMEOUT_MULTIPLIER,
+                 timeout_min: float = API_ADAPTIVE_TIMEOUT_MIN_SECONDS,
+                 hedge_percentile: float = API_HEDGE_PERCENTILE,
+                 hedge_max_ratio: float = API_HEDGE_MAX_RATIO):
+        self.window = window
+        self.min_samples = min_samples
+        self.timeout_multiplier = timeout_multiplier
+        self.timeout_min = timeout_min
+        self.hedge_percentile = hedge_percentile
+        self.hedge_max_ratio = hedge_max_ratio
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hedgeable": 0, "hedges_sent": 0, "hedges_won": 0}
+
+    def record(self, endpoint: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None:
+                samples = self._samples[endpoint] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, endpoint: str, percentile: float) -> Optional[float]:
+        """Percentil das latências recentes do endpoint, ou None se ainda houver poucas amostras."""
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if not samples or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(round(percentile / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def adaptive_timeout(self, endpoint: str, ceiling: float) -> float:
+        p99 = self.percentile(endpoint, 99)
+        if p99 is None:
+            return ceiling
+        return min(ceiling, max(self.timeout_min, p99 * self.timeout_multiplier))
+
+    def hedge_delay(self, endpoint: str) -> Optional[float]:
+        """Espera pela primeira resposta antes de enviar o duplicado (p95), ou None para não duplicar."""
+        with self._lock:
+            self._stats["hedgeable"] += 1
+        return self.percentile(endpoint, self.hedge_percentile)
+
+    def try_acquire_hedge(self) -> bool:
+        with self._lock:
+            if self._stats["hedges_sent"] >= self.hedge_max_ratio * self._stats["hedgeable"] + 1:
+                return False
+            self._stats["hedges_sent"] += 1
+            return True
+
+    def note_hedge_won(self):
+        with self._lock:
+            self._stats["hedges_won"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            endpoints = list(self._samples)
+        stats["endpoints"] = {
+            endpoint: {"p50": self.percentile(endpoint, 50), "p95": self.percentile(endpoint, 95),
+                       "p99": self.percentile(endpoint, 99)}
+            for endpoint in endpoints
+        }
+        return stats
@@ -0,0 +1,22 @@
+# advocacia_app/services/pagination.py
+
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+def iterate_pages(fetch_page: Callable[[Optional[str]], Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Percorre uma listagem paginada por cursor: chama fetch_page(cursor) até a resposta não trazer
+    'next_cursor'. Cada página é produzida tal como veio do serviço (dict com 'success'); uma página
+    com falha é produzida e termina a iteração. Uma API que ignore a paginação devolve tudo numa
+    só página, sem 'next_cursor'.
+    """
+    cursor: Optional[str] = None
+    while True:
+        page = fetch_page(cursor)
+        yield page
+        if not isinstance(page, dict) or not page.get("success"):
+            return
+        next_cursor = page.get("next_cursor")
+        if not next_cursor or next_cursor == cursor: # Sem mais páginas (ou cursor repetido pela API)
+            return
+        cursor = str(next_cursor)
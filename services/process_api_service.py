@@ -1,14 +1,33 @@
+import os
+import logging
 import requests
 import json
-from typing import List, Dict, Optional, Any, Tuple
+from contextlib import ExitStack
+from typing import Callable, List, Dict, Iterator, Optional, Any, Sequence, Tuple
 
-# URL base do seu API Gateway (mesma do client_api_service, se for a mesma API)
-API_GATEWAY_PROCESSES_BASE_URL = "https://p55kko7yc6.execute-api.sa-east-1.amazonaws.com/dev" # Ajuste se necessário
+from requests_toolbelt.multipart.encoder import MultipartEncoder, MultipartEncoderMonitor
+
+from config.constants import LIST_PAGE_SIZE, UPLOAD_DIRECT_TO_S3
+from config.logging_setup import BodyPreview, Redacted, log_body
+from .api_transport import ApiTransport, get_default_transport
+from .json_codec import decode_json_response
+from .pagination import iterate_pages
+from .s3_upload import DirectUploadUnsupported, S3DirectUploader, UploadError
+from .single_flight import coalesced
+
+logger = logging.getLogger(__name__)
+
+# Callback de progresso do upload: (bytes_enviados, bytes_totais); chamado na thread do worker
+UploadProgressCallback = Callable[[int, int], None]
 
 class ProcessApiService:
-    def __init__(self, auth_token: Optional[str] = None):
+    def __init__(self, auth_token: Optional[str] = None, transport: Optional[ApiTransport] = None,
+                 upload_state: Optional[Any] = None, direct_uploads: bool = UPLOAD_DIRECT_TO_S3):
         self.auth_token = auth_token
-        print(f"ProcessApiService: Instanciado com token: {'Sim' if auth_token else 'Não'}")
+        self.transport = transport or get_default_transport()
+        # Documentos enviados diretamente para o S3 (URLs pré-assinadas); upload_state (UploadStateStore) permite retomar
+        self.uploader = S3DirectUploader(self.transport, self._get_auth_headers, state_store=upload_state) if direct_uploads else None
+        logger.debug("Instanciado com token: %s", 'Sim' if auth_token else 'Não')
 
     def _get_auth_headers(self) -> Dict[str, str]:
         headers = {} # Não define Content-Type por defeito, pois pode variar (JSON vs multipart)
@@ -17,21 +36,81 @@ class ProcessApiService:
         return headers
 
     def _handle_api_error(self, http_err: requests.exceptions.HTTPError, operation_name: str) -> Dict[str, Any]:
-        print(f"ProcessApiService: Erro HTTP em '{operation_name}': Status {http_err.response.status_code} - Resposta: {http_err.response.text}")
+        logger.warning("Erro HTTP em '%s': Status %s - Resposta: %s", operation_name, http_err.response.status_code, BodyPreview(http_err.response))
         try:
-            error_body = http_err.response.json()
-            if isinstance(error_body, str):
-                try: error_body = json.loads(error_body)
-                except json.JSONDecodeError: pass # Mantém como string se não for JSON
+            error_body = decode_json_response(http_err.response) # Também desfaz corpos JSON em string (proxy Lambda)
+            if isinstance(error_body, dict):
+                error_body.setdefault("http_status", http_err.response.status_code) # Usado para decidir se vale repetir
             return error_body 
         except json.JSONDecodeError:
-            return {"success": False, "message": f"Erro HTTP {http_err.response.status_code} em '{operation_name}'. Resposta não JSON."}
+            return {"success": False, "http_status": http_err.response.status_code, "message": f"Erro HTTP {http_err.response.status_code} em '{operation_name}'. Resposta não JSON."}
         except Exception as e:
-            return {"success": False, "message": f"Erro HTTP {http_err.response.status_code} em '{operation_name}'. Erro ao processar resposta: {str(e)}"}
+            return {"success": False, "http_status": http_err.response.status_code, "message": f"Erro HTTP {http_err.response.status_code} em '{operation_name}'. Erro ao processar resposta: {str(e)}"}
+
+    def _send_multipart(self, method: str, url: str, headers: Dict[str, str], process_data: Dict[str, Any],
+                        files_to_upload: List[Tuple[str, Any]], progress_callback: Optional[UploadProgressCallback],
+                        operation_name: str) -> requests.Response:
+        """
+        Envia o processo e os documentos em multipart/form-data lido diretamente do disco.
+
+        Cada ficheiro é (campo, (nome, caminho_ou_ficheiro, content_type)); caminhos são abertos aqui e
+        o MultipartEncoder lê-os em blocos à medida que o corpo é enviado, logo a memória usada não
+        depende do tamanho dos anexos. O progresso é reportado quando muda pelo menos 1%.
+        """
+        with ExitStack() as open_files:
+            fields: List[Tuple[str, Any]] = [('process_data_json', json.dumps(process_data))]
+            for field_name, (file_name, source, content_type) in files_to_upload:
+                if isinstance(source, (str, os.PathLike)):
+                    source = open_files.enter_context(open(source, 'rb'))
+                fields.append((field_name, (file_name, source, content_type)))
+
+            encoder = MultipartEncoder(fields=fields)
+            total_bytes = encoder.len
+            last_reported = [-1]
+            def on_read(monitor: MultipartEncoderMonitor):
+                percent = monitor.bytes_read * 100 // total_bytes if total_bytes else 100
+                if percent != last_reported[0]:
+                    last_reported[0] = percent
+                    progress_callback(monitor.bytes_read, total_bytes)
+            body = MultipartEncoderMonitor(encoder, on_read if progress_callback else None)
+
+            multipart_headers = dict(headers)
+            multipart_headers['Content-Type'] = body.content_type
+            logger.debug("(%s) Enviando %s ficheiros em streaming (%s bytes).", operation_name, len(files_to_upload), total_bytes)
+            return self.transport.request(method, url, headers=multipart_headers, data=body, timeout=60) # Timeout maior para uploads
+
+    def _upload_documents_direct(self, user_id: str, process_data: Dict[str, Any], files_to_upload: List[Tuple[str, Any]],
+                                 progress_callback: Optional[UploadProgressCallback], operation_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Envia os documentos diretamente para o S3 e devolve uma cópia de process_data com os metadados
+        acrescentados a 'documents' (a gravar em JSON, sem ficheiros). None = usar o envio multipart.
+        """
+        if self.uploader is None:
+            return None
+        try:
+            documents = self.uploader.upload_files(user_id, files_to_upload, progress_callback)
+        except DirectUploadUnsupported as e:
+            logger.info("(%s) Upload direto indisponível (%s); documentos seguem no corpo multipart.", operation_name, e)
+            self.uploader = None # Não volta a tentar nesta sessão
+            return None
+        logger.debug("(%s) %s documentos enviados para o S3.", operation_name, len(documents))
+        process_data = dict(process_data)
+        process_data["documents"] = list(process_data.get("documents") or []) + documents
+        return process_data
 
-    def add_process(self, user_id: str, process_data: Dict[str, Any], files_to_upload: Optional[List[Tuple[str, Any]]] = None) -> Dict[str, Any]:
+    def add_process(self, user_id: str, process_data: Dict[str, Any], files_to_upload: Optional[List[Tuple[str, Any]]] = None,
+                    progress_callback: Optional[UploadProgressCallback] = None) -> Dict[str, Any]:
         operation_name = "adicionar processo"
-        url = f"{API_GATEWAY_PROCESSES_BASE_URL}/users/{user_id}/processes"
+        url = self.transport.build_url(f"/users/{user_id}/processes")
+
+        if files_to_upload:
+            try:
+                with_documents = self._upload_documents_direct(user_id, process_data, files_to_upload, progress_callback, operation_name)
+            except UploadError as e:
+                logger.warning("(%s) Falha no upload dos documentos: %s", operation_name, e)
+                return {"success": False, "message": f"Erro ao enviar documentos: {e}"}
+            if with_documents is not None: # Documentos já no S3: o processo leva só os metadados
+                process_data, files_to_upload = with_documents, None
         
         headers = self._get_auth_headers()
         # Se houver ficheiros, não defina Content-Type: application/json.
@@ -42,96 +121,130 @@ class ProcessApiService:
         data_payload = None
 
         if files_to_upload:
-            # `requests` espera uma lista de tuplos para 'files': (fieldname, (filename, fileobject, content_type))
-            request_files = files_to_upload # Já deve estar no formato correto
-            # Envia os dados do processo como um campo de formulário JSON
+            # Lista de tuplos (fieldname, (filename, caminho_ou_ficheiro, content_type)), enviada em streaming
+            request_files = files_to_upload
+            # Os dados do processo vão como um campo de formulário JSON ('process_data_json') no multipart
             data_payload = {'process_data_json': json.dumps(process_data)}
-            # Não definir Content-Type nos headers, requests fará isso para multipart
-            if 'Content-Type' in headers:
-                del headers['Content-Type'] 
-            print(f"ProcessApiService ({operation_name}): Enviando com multipart/form-data.")
+            logger.debug("(%s) Enviando com multipart/form-data.", operation_name)
         else:
             # Sem ficheiros, envia como JSON normal
             headers["Content-Type"] = "application/json"
             data_payload = json.dumps(process_data)
-            print(f"ProcessApiService ({operation_name}): Enviando com application/json.")
+            logger.debug("(%s) Enviando com application/json.", operation_name)
 
-        print(f"ProcessApiService ({operation_name}): Chamando URL: {url}")
-        print(f"ProcessApiService ({operation_name}): User ID: {user_id}")
+        logger.debug("(%s) Chamando URL: %s", operation_name, url)
+        logger.debug("(%s) User ID: %s", operation_name, user_id)
         if files_to_upload:
-            print(f"ProcessApiService ({operation_name}): Dados do processo (como form field): {data_payload}")
-            print(f"ProcessApiService ({operation_name}): {len(files_to_upload)} ficheiros a serem enviados.")
+            logger.debug("(%s) Dados do processo (como form field): %s", operation_name, Redacted(process_data))
+            logger.debug("(%s) %s ficheiros a serem enviados.", operation_name, len(files_to_upload))
         else:
-            print(f"ProcessApiService ({operation_name}): Payload JSON: {data_payload}")
+            logger.debug("(%s) Payload JSON: %s", operation_name, Redacted(process_data))
         
         try:
             if files_to_upload:
-                response = requests.post(url, headers=headers, data=data_payload, files=request_files, timeout=60) # Timeout maior para uploads
+                response = self._send_multipart("POST", url, headers, process_data, request_files, progress_callback, operation_name)
             else:
-                response = requests.post(url, headers=headers, data=data_payload, timeout=15)
+                response = self.transport.post(url, headers=headers, data=data_payload, timeout=15)
                 
-            print(f"ProcessApiService ({operation_name}): Resposta bruta status: {response.status_code}, texto: {response.text}")
+            log_body(logger, "(%s) Resposta status %s: %s", response, operation_name, response.status_code)
             response.raise_for_status()
-            return response.json() 
+            return decode_json_response(response) 
         except requests.exceptions.HTTPError as http_err:
             return self._handle_api_error(http_err, operation_name)
         except requests.exceptions.RequestException as req_err:
-            print(f"ProcessApiService ({operation_name}): Erro de requisição: {req_err}")
+            logger.warning("(%s) Erro de requisição: %s", operation_name, req_err)
             return {"success": False, "message": f"Erro de comunicação ao {operation_name}: {str(req_err)}"}
         except Exception as e:
-            print(f"ProcessApiService ({operation_name}): Erro inesperado: {e}")
+            logger.exception("(%s) Erro inesperado: %s", operation_name, e)
             return {"success": False, "message": f"Erro inesperado em {operation_name}: {str(e)}"}
 
-    def get_processes_by_user(self, user_id: str, search_term: Optional[str] = None) -> Dict[str, Any]:
+    @coalesced
+    def get_processes_by_user(self, user_id: str, search_term: Optional[str] = None, updated_since: Optional[str] = None,
+                              fields: Optional[Sequence[str]] = None,
+                              limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Lista os processos do utilizador. Com 'updated_since' pede só o delta desde esse cursor
+        ('processes' alterados, 'deleted' com os IDs removidos e 'sync_cursor' para o próximo pedido).
+        'fields' limita os atributos devolvidos por processo (projeção); o registo completo vem de get_process_details().
+        Com 'limit' a API devolve uma página e, se houver mais, 'next_cursor' (a passar em 'cursor').
+        """
         operation_name = "buscar processos por utilizador"
-        url = f"{API_GATEWAY_PROCESSES_BASE_URL}/users/{user_id}/processes"
+        url = self.transport.build_url(f"/users/{user_id}/processes")
         params = {}
         if search_term:
             params['q'] = search_term # Exemplo de parâmetro de query para busca
+        if updated_since:
+            params['updated_since'] = updated_since
+        if fields:
+            params['fields'] = ",".join(fields)
+        if limit:
+            params['limit'] = limit
+        if cursor:
+            params['cursor'] = cursor
 
-        print(f"ProcessApiService ({operation_name}): Chamando URL: {url} com params: {params}")
+        logger.debug("(%s) Chamando URL: %s com params: %s", operation_name, url, params)
         try:
             headers = self._get_auth_headers()
             headers["Content-Type"] = "application/json" # GET não tem corpo, mas é bom ser explícito
-            response = requests.get(url, headers=headers, params=params, timeout=15)
-            print(f"ProcessApiService ({operation_name}): Resposta bruta status: {response.status_code}, texto: {response.text}")
+            if updated_since: # Cada cursor é uma URL nova: não passa pelo cache HTTP
+                response = self.transport.get(url, headers=headers, params=params, timeout=15)
+            else:
+                response = self.transport.conditional_get(url, headers=headers, params=params, timeout=15)
+            log_body(logger, "(%s) Resposta status %s: %s", response, operation_name, response.status_code)
             response.raise_for_status()
-            return response.json()
+            return decode_json_response(response)
         except requests.exceptions.HTTPError as http_err:
             error_response = self._handle_api_error(http_err, operation_name)
             if "processes" not in error_response: error_response["processes"] = []
             return error_response
         except requests.exceptions.RequestException as req_err:
-            print(f"ProcessApiService ({operation_name}): Erro de requisição: {req_err}")
+            logger.warning("(%s) Erro de requisição: %s", operation_name, req_err)
             return {"success": False, "message": f"Erro de comunicação: {str(req_err)}", "processes": []}
         except Exception as e:
-            print(f"ProcessApiService ({operation_name}): Erro inesperado: {e}")
+            logger.exception("(%s) Erro inesperado: %s", operation_name, e)
             return {"success": False, "message": f"Erro inesperado: {str(e)}", "processes": []}
 
+    def iter_processes_by_user(self, user_id: str, page_size: int = LIST_PAGE_SIZE, updated_since: Optional[str] = None,
+                               fields: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Gerador das páginas de get_processes_by_user (a primeira chega após um único pedido)."""
+        return iterate_pages(lambda cursor: self.get_processes_by_user(
+            user_id, updated_since=updated_since, fields=fields, limit=page_size, cursor=cursor))
+
+    @coalesced
     def get_process_details(self, user_id: str, process_id: str) -> Dict[str, Any]:
         operation_name = "buscar detalhes do processo"
-        url = f"{API_GATEWAY_PROCESSES_BASE_URL}/users/{user_id}/processes/{process_id}"
-        print(f"ProcessApiService ({operation_name}): Chamando URL: {url}")
+        url = self.transport.build_url(f"/users/{user_id}/processes/{process_id}")
+        logger.debug("(%s) Chamando URL: %s", operation_name, url)
         try:
             headers = self._get_auth_headers()
             headers["Content-Type"] = "application/json"
-            response = requests.get(url, headers=headers, timeout=15)
-            print(f"ProcessApiService ({operation_name}): Resposta bruta status: {response.status_code}, texto: {response.text}")
+            response = self.transport.get(url, headers=headers, timeout=15, hedge=True)
+            log_body(logger, "(%s) Resposta status %s: %s", response, operation_name, response.status_code)
             response.raise_for_status()
             # Espera-se {'success': True, 'process': {...}, 'documents': [...]}
-            return response.json()
+            return decode_json_response(response)
         except requests.exceptions.HTTPError as http_err:
             return self._handle_api_error(http_err, operation_name)
         except requests.exceptions.RequestException as req_err:
-            print(f"ProcessApiService ({operation_name}): Erro de requisição: {req_err}")
+            logger.warning("(%s) Erro de requisição: %s", operation_name, req_err)
             return {"success": False, "message": f"Erro de comunicação: {str(req_err)}"}
         except Exception as e:
-            print(f"ProcessApiService ({operation_name}): Erro inesperado: {e}")
+            logger.exception("(%s) Erro inesperado: %s", operation_name, e)
             return {"success": False, "message": f"Erro inesperado: {str(e)}"}
 
-    def update_process(self, user_id: str, process_id: str, process_data: Dict[str, Any], files_to_upload: Optional[List[Tuple[str, Any]]] = None) -> Dict[str, Any]:
+    def update_process(self, user_id: str, process_id: str, process_data: Dict[str, Any], files_to_upload: Optional[List[Tuple[str, Any]]] = None,
+                       progress_callback: Optional[UploadProgressCallback] = None) -> Dict[str, Any]:
         operation_name = "atualizar processo"
-        url = f"{API_GATEWAY_PROCESSES_BASE_URL}/users/{user_id}/processes/{process_id}"
+        url = self.transport.build_url(f"/users/{user_id}/processes/{process_id}")
+
+        if files_to_upload:
+            try:
+                with_documents = self._upload_documents_direct(user_id, process_data, files_to_upload, progress_callback, operation_name)
+            except UploadError as e:
+                logger.warning("(%s) Falha no upload dos documentos: %s", operation_name, e)
+                return {"success": False, "message": f"Erro ao enviar documentos: {e}"}
+            if with_documents is not None:
+                process_data, files_to_upload = with_documents, None
         
         headers = self._get_auth_headers()
         request_files = None
@@ -139,48 +252,46 @@ class ProcessApiService:
 
         if files_to_upload:
             request_files = files_to_upload
-            data_payload = {'process_data_json': json.dumps(process_data)}
-            if 'Content-Type' in headers: del headers['Content-Type']
-            print(f"ProcessApiService ({operation_name}): Enviando com multipart/form-data (PUT).")
+            logger.debug("(%s) Enviando com multipart/form-data (PUT).", operation_name)
         else:
             headers["Content-Type"] = "application/json"
             data_payload = json.dumps(process_data)
-            print(f"ProcessApiService ({operation_name}): Enviando com application/json (PUT).")
+            logger.debug("(%s) Enviando com application/json (PUT).", operation_name)
 
-        print(f"ProcessApiService ({operation_name}): Chamando URL: {url}")
+        logger.debug("(%s) Chamando URL: %s", operation_name, url)
         try:
             if files_to_upload:
-                response = requests.put(url, headers=headers, data=data_payload, files=request_files, timeout=60)
+                response = self._send_multipart("PUT", url, headers, process_data, request_files, progress_callback, operation_name)
             else:
-                response = requests.put(url, headers=headers, data=data_payload, timeout=15)
-            print(f"ProcessApiService ({operation_name}): Resposta bruta status: {response.status_code}, texto: {response.text}")
+                response = self.transport.put(url, headers=headers, data=data_payload, timeout=15)
+            log_body(logger, "(%s) Resposta status %s: %s", response, operation_name, response.status_code)
             response.raise_for_status()
-            return response.json()
+            return decode_json_response(response)
         except requests.exceptions.HTTPError as http_err:
             return self._handle_api_error(http_err, operation_name)
         except requests.exceptions.RequestException as req_err:
-            print(f"ProcessApiService ({operation_name}): Erro de requisição: {req_err}")
+            logger.warning("(%s) Erro de requisição: %s", operation_name, req_err)
             return {"success": False, "message": f"Erro de comunicação: {str(req_err)}"}
         except Exception as e:
-            print(f"ProcessApiService ({operation_name}): Erro inesperado: {e}")
+            logger.exception("(%s) Erro inesperado: %s", operation_name, e)
             return {"success": False, "message": f"Erro inesperado: {str(e)}"}
 
     def delete_process(self, user_id: str, process_id: str) -> Dict[str, Any]:
         operation_name = "remover processo"
-        url = f"{API_GATEWAY_PROCESSES_BASE_URL}/users/{user_id}/processes/{process_id}"
-        print(f"ProcessApiService ({operation_name}): Chamando URL: {url}")
+        url = self.transport.build_url(f"/users/{user_id}/processes/{process_id}")
+        logger.debug("(%s) Chamando URL: %s", operation_name, url)
         try:
             headers = self._get_auth_headers()
             headers["Content-Type"] = "application/json" 
-            response = requests.delete(url, headers=headers, timeout=15)
-            print(f"ProcessApiService ({operation_name}): Resposta bruta status: {response.status_code}, texto: {response.text}")
+            response = self.transport.delete(url, headers=headers, timeout=15)
+            log_body(logger, "(%s) Resposta status %s: %s", response, operation_name, response.status_code)
             response.raise_for_status()
-            return response.json() 
+            return decode_json_response(response) 
         except requests.exceptions.HTTPError as http_err:
             return self._handle_api_error(http_err, operation_name)
         except requests.exceptions.RequestException as req_err:
-            print(f"ProcessApiService ({operation_name}): Erro de requisição: {req_err}")
+            logger.warning("(%s) Erro de requisição: %s", operation_name, req_err)
             return {"success": False, "message": f"Erro de comunicação: {str(req_err)}"}
         except Exception as e:
-            print(f"ProcessApiService ({operation_name}): Erro inesperado: {e}")
+            logger.exception("(%s) Erro inesperado: %s", operation_name, e)
             return {"success": False, "message": f"Erro inesperado: {str(e)}"}
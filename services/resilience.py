@@ -0,0 +1,228 @@
+# advocacia_app/services/resilience.py
+
+import email.utils
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from config.constants import (
+    API_RETRY_MAX_ATTEMPTS,
+    API_RETRY_BASE_DELAY_SECONDS,
+    API_RETRY_MAX_DELAY_SECONDS,
+    API_RETRY_AFTER_MAX_SECONDS,
+    API_BREAKER_FAILURE_THRESHOLD,
+    API_BREAKER_RESET_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+# Métodos que podem ser repetidos sem risco de duplicar efeitos no servidor. O DELETE fica de fora:
+# um DELETE repetido depois de o primeiro ter sido aplicado (resposta perdida) devolveria 404.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# Respostas que indicam uma falha passageira (throttling, cold start da Lambda, gateway indisponível)
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+BREAKER_CLOSED = "closed"       # Normal: os pedidos passam
+BREAKER_OPEN = "open"           # Backend em falha: os pedidos falham de imediato até ao fim do período de espera
+BREAKER_HALF_OPEN = "half_open" # Fim da espera: um único pedido de teste decide se fecha ou volta a abrir
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Pedido recusado localmente porque o circuito do endpoint está aberto. É uma ConnectionError para
+    que os serviços o tratem como qualquer erro de comunicação (e a outbox o repita mais tarde).
+    """
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"Serviço temporariamente indisponível ({endpoint}); nova tentativa possível em {retry_in:.0f}s.")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Estado do circuito de um endpoint. Não é thread-safe por si: o ResiliencePolicy protege-o com o seu lock."""
+    __slots__ = ("endpoint", "state", "consecutive_failures", "opened_at", "trial_in_flight", "times_opened")
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.times_opened = 0
+
+
+class ResiliencePolicy:
+    """
+    Política de repetição e circuit breaker aplicada pelo ApiTransport a todos os pedidos.
+
+    - Pedidos idempotentes (GET/HEAD/OPTIONS) que falham por rede, timeout ou 408/429/5xx são repetidos
+      até max_attempts vezes, com backoff exponencial com jitter ("full jitter") e respeitando o header
+      Retry-After (limitado a retry_after_max segundos).
+    - Cada endpoint (caminho com os IDs normalizados, ex: /users/{id}/processes/{id}) tem um circuit
+      breaker: após failure_threshold falhas seguidas abre e os pedidos falham de imediato com
+      CircuitOpenError durante reset_seconds; depois um pedido de teste fecha-o ou volta a abri-lo.
+      Um 429 não conta como falha do backend (é limitação de taxa, já tratada pelo Retry-After).
+
+    stats() e breaker_states() expõem os contadores e o estado dos circuitos. Thread-safe.
+    """
+
+    def __init__(self, max_attempts: int = API_RETRY_MAX_ATTEMPTS,
+                 base_delay: float = API_RETRY_BASE_DELAY_SECONDS,
+                 max_delay: float = API_RETRY_MAX_DELAY_SECONDS,
+                 retry_after_max: float = API_RETRY_AFTER_MAX_SECONDS,
+                 failure_threshold: int = API_BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = API_BREAKER_RESET_SECONDS):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_after_max = retry_after_max
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "gave_up": 0, "short_circuited": 0, "breaker_opened": 0}
+
+    # --- Endpoints ---
+
+    @staticmethod
+    def endpoint_key(url: str, base_path: str = "") -> str:
+        """
+        Agrupa os URLs pelo recurso: nos caminhos REST aninhados (/colecao/id/colecao/id) os segmentos
+        nas posições ímpares são IDs. base_path (o estágio do API Gateway, ex: /dev) não entra na conta.
+        """
+        parts = urlsplit(url)
+        path = parts.path
+        if base_path and path.startswith(base_path.rstrip("/") + "/"):
+            path = path[len(base_path.rstrip("/")):]
+        segments = [segment for segment in path.split("/") if segment]
+        normalized = [segment if index % 2 == 0 else "{id}" for index, segment in enumerate(segments)]
+        return f"{parts.netloc}/{'/'.join(normalized)}"
+
+    # --- Circuit breaker ---
+
+    def before_request(self, endpoint: str):
+        """Levanta CircuitOpenError se o circuito do endpoint estiver aberto (ou com um teste em curso)."""
+        with self._lock:
+            self._stats["requests"] += 1
+            breaker = self._breakers.get(endpoint)
+            if breaker is None or breaker.state == BREAKER_CLOSED:
+                return
+            elapsed = time.monotonic() - breaker.opened_at
+            if breaker.state == BREAKER_OPEN and elapsed >= self.reset_seconds:
+                breaker.state = BREAKER_HALF_OPEN
+                logger.info("Circuito de %s meio-aberto; a enviar pedido de teste.", endpoint)
+            if breaker.state == BREAKER_HALF_OPEN and not breaker.trial_in_flight:
+                breaker.trial_in_flight = True
+                return
+            self._stats["short_circuited"] += 1
+            retry_in = max(0.0, self.reset_seconds - elapsed)
+        raise CircuitOpenError(endpoint, retry_in)
+
+    def record_success(self, endpoint: str):
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                return
+            if breaker.state != BREAKER_CLOSED:
+                logger.info("Circuito de %s fechado; o backend respondeu.", endpoint)
+            breaker.state = BREAKER_CLOSED
+            breaker.consecutive_failures = 0
+            breaker.trial_in_flight = False
+
+    def record_failure(self, endpoint: str):
+        with self._lock:
+            breaker = self._breakers.setdefault(endpoint, CircuitBreaker(endpoint))
+            breaker.consecutive_failures += 1
+            breaker.trial_in_flight = False
+            if breaker.state == BREAKER_HALF_OPEN or (
+                    breaker.state == BREAKER_CLOSED and breaker.consecutive_failures >= self.failure_threshold):
+                breaker.state = BREAKER_OPEN
+                breaker.opened_at = time.monotonic()
+                breaker.times_opened += 1
+                self._stats["breaker_opened"] += 1
+                logger.warning("Circuito de %s aberto após %s falhas seguidas; pedidos recusados durante %.0fs.",
+                               endpoint, breaker.consecutive_failures, self.reset_seconds)
+
+    def release_trial(self, endpoint: str):
+        """
+        Liberta o pedido de teste de um circuito meio-aberto sem decidir o estado (o pedido terminou com
+        um erro que não diz nada sobre o backend); o pedido seguinte volta a ser o teste.
+        """
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is not None:
+                breaker.trial_in_flight = False
+
+    # --- Repetição ---
+
+    @staticmethod
+    def is_retryable_method(method: str) -> bool:
+        return method.upper() in IDEMPOTENT_METHODS
+
+    @staticmethod
+    def is_retryable_response(response: requests.Response) -> bool:
+        return response.status_code in RETRYABLE_STATUS_CODES
+
+    @staticmethod
+    def is_backend_failure(response: requests.Response) -> bool:
+        """Respostas que contam para abrir o circuito (o 429 é limitação de taxa, não falha)."""
+        return response.status_code >= 500 or response.status_code == 408
+
+    def retry_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Espera antes da tentativa seguinte: o Retry-After do servidor, se houver, senão backoff com jitter."""
+        retry_after = self.parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.retry_after_max)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Retry-After em segundos ou como data HTTP; None se ausente ou inválido."""
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at is None:
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+    def note_retry(self, method: str, url: str, attempt: int, delay: float, reason: str):
+        with self._lock:
+            self._stats["retries"] += 1
+        logger.info("%s %s falhou (%s); tentativa %s/%s em %.1fs.", method, url, reason, attempt + 1, self.max_attempts, delay)
+
+    def note_gave_up(self):
+        with self._lock:
+            self._stats["gave_up"] += 1
+
+    # --- Observabilidade ---
+
+    def breaker_states(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                endpoint: {"state": breaker.state, "consecutive_failures": breaker.consecutive_failures,
+                           "times_opened": breaker.times_opened}
+                for endpoint, breaker in self._breakers.items()
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["open_breakers"] = [endpoint for endpoint, breaker in self._breakers.items() if breaker.state != BREAKER_CLOSED]
+        return stats
+
+    def reset(self):
+        """Fecha todos os circuitos (ex: no logout), mantendo as estatísticas."""
+        with self._lock:
+            self._breakers.clear()
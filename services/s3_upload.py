@@ -0,0 +1,340 @@
+# advocacia_app/services/s3_upload.py
+
+import concurrent.futures
+import contextvars
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from config.constants import (
+    UPLOAD_PART_SIZE_BYTES,
+    UPLOAD_MAX_CONCURRENCY,
+    UPLOAD_PART_MAX_ATTEMPTS,
+    UPLOAD_PART_TIMEOUT
+)
+from .api_transport import ApiTransport
+from .json_codec import decode_json_response
+
+logger = logging.getLogger(__name__)
+
+# Callback de progresso do upload: (bytes_enviados, bytes_totais); chamado nas threads do upload
+UploadProgressCallback = Callable[[int, int], None]
+
+
+class UploadError(Exception):
+    """O envio de um documento falhou; as partes já enviadas ficam registadas para retomar."""
+
+
+class DirectUploadUnsupported(UploadError):
+    """A API não tem o endpoint de uploads diretos (403/404/405): usa-se o envio multipart pela API."""
+
+
+class _UploadExpired(UploadError):
+    """O upload_id guardado já não existe (concluído, abortado ou expirado no S3)."""
+
+
+class _FileUpload:
+    __slots__ = ("file_name", "path", "content_type", "size", "mtime", "s3_key", "upload_id", "part_size",
+                 "single_url", "single_headers", "part_urls", "etags")
+
+    def __init__(self, file_name: str, path: str, content_type: str):
+        self.file_name = file_name
+        self.path = os.path.abspath(path)
+        self.content_type = content_type
+        stat = os.stat(self.path)
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.s3_key: Optional[str] = None
+        self.upload_id: Optional[str] = None # None = upload numa só parte (single_url)
+        self.part_size = 0
+        self.single_url: Optional[str] = None
+        self.single_headers: Dict[str, str] = {}
+        self.part_urls: Dict[int, str] = {} # Partes por enviar: número -> URL pré-assinada
+        self.etags: Dict[int, str] = {} # Partes já no S3: número -> ETag
+
+    def part_range(self, part_number: int) -> Tuple[int, int]:
+        offset = (part_number - 1) * self.part_size
+        return offset, min(self.part_size, self.size - offset)
+
+    def part_count(self) -> int:
+        return max(1, math.ceil(self.size / self.part_size)) if self.part_size else 1
+
+    def metadata(self) -> Dict[str, Any]:
+        """O que fica gravado no processo (a API de processos só recebe isto, sem o conteúdo)."""
+        return {"filename": self.file_name, "s3_key": self.s3_key, "content_type": self.content_type, "size": self.size}
+
+
+class _ProgressAggregator:
+    """
+    Soma os bytes enviados por todas as threads e chama o callback quando muda pelo menos 1%.
+    Aceita valores negativos: os bytes de uma tentativa falhada são descontados antes de a repetir.
+    """
+
+    def __init__(self, total: int, callback: Optional[UploadProgressCallback]):
+        self.total = total
+        self.callback = callback
+        self._done = 0
+        self._last_percent = -1
+        self._lock = threading.Lock()
+
+    def add(self, sent: int):
+        if self.callback is None:
+            return
+        with self._lock:
+            self._done += sent
+            done = self._done
+            percent = done * 100 // self.total if self.total else 100
+            if percent == self._last_percent:
+                return
+            self._last_percent = percent
+        self.callback(done, self.total)
+
+
+class _FileSliceReader:
+    """
+    Corpo do PUT: o bloco [offset, offset + length) do ficheiro, lido pelo requests em pedaços à medida
+    que é enviado (sem carregar a parte em memória). Cada pedaço lido conta logo no progresso.
+    __len__ dá o Content-Length (o S3 não aceita corpos 'chunked' em URLs pré-assinadas).
+    """
+
+    def __init__(self, path: str, offset: int, length: int, progress: _ProgressAggregator):
+        self._file = open(path, "rb")
+        self._file.seek(offset)
+        self._remaining = length
+        self.length = length
+        self.progress = progress
+        self.sent = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        chunk = self._file.read(size)
+        self._remaining -= len(chunk)
+        self.sent += len(chunk)
+        if chunk:
+            self.progress.add(len(chunk))
+        return chunk
+
+    def close(self):
+        self._file.close()
+
+
+class S3DirectUploader:
+    """
+    Envia documentos diretamente para o S3 por URLs pré-assinadas pedidas à API, em vez de os passar
+    pelo API Gateway e pela Lambda (limite de tamanho do corpo e tempo de execução da Lambda).
+
+    Contrato com a API (os ficheiros nunca passam por ela):
+      POST   /users/{u}/uploads                  {file_name, content_type, size, part_size}
+             -> {s3_key, url[, headers]} (uma parte) ou {s3_key, upload_id, part_size, parts: [{part_number, url}]}
+      POST   /users/{u}/uploads/{upload_id}/parts    {s3_key, part_numbers}
+             -> {uploaded: [{part_number, etag}], parts: [{part_number, url}]} (retomar; 404 = upload expirado)
+      POST   /users/{u}/uploads/{upload_id}/complete {s3_key, parts: [{part_number, etag}]}
+      DELETE /users/{u}/uploads/{upload_id}?s3_key=...   (aborta um upload que não vai ser retomado)
+
+    As partes de todos os ficheiros são enviadas em paralelo (max_concurrency) pelo ApiTransport, logo
+    contam para o teto do host do S3 no RequestScheduler, com a prioridade de quem pediu o upload.
+    Com um state_store (UploadStateStore), cada parte enviada é registada; um novo envio do mesmo
+    ficheiro retoma o upload_id e só envia as partes em falta.
+    """
+
+    def __init__(self, transport: ApiTransport, auth_headers: Callable[[], Dict[str, str]],
+                 state_store: Optional[Any] = None, part_size: int = UPLOAD_PART_SIZE_BYTES,
+                 max_concurrency: int = UPLOAD_MAX_CONCURRENCY, part_attempts: int = UPLOAD_PART_MAX_ATTEMPTS,
+                 part_timeout: float = UPLOAD_PART_TIMEOUT):
+        self.transport = transport
+        self.auth_headers = auth_headers
+        self.state_store = state_store
+        self.part_size = part_size
+        self.max_concurrency = max(1, max_concurrency)
+        self.part_attempts = max(1, part_attempts)
+        self.part_timeout = part_timeout
+
+    def upload_files(self, user_id: str, files_to_upload: List[Tuple[str, Any]],
+                     progress_callback: Optional[UploadProgressCallback] = None) -> List[Dict[str, Any]]:
+        """
+        Envia os ficheiros (campo, (nome, caminho, content_type)) e devolve os metadados de cada
+        documento ({filename, s3_key, content_type, size}) para gravar no processo.
+        Levanta DirectUploadUnsupported se a API não tiver uploads diretos e UploadError noutras falhas.
+        """
+        uploads: List[_FileUpload] = []
+        for _field_name, (file_name, source, content_type) in files_to_upload:
+            if not isinstance(source, (str, os.PathLike)):
+                raise DirectUploadUnsupported("Upload direto só a partir de ficheiros em disco.")
+            try:
+                uploads.append(_FileUpload(file_name, os.fspath(source), content_type or "application/octet-stream"))
+            except OSError as e:
+                raise UploadError(f"Não foi possível ler '{file_name}': {e}") from e
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="s3-upload") as executor:
+            def submit(fn: Callable[..., Any], *args: Any) -> "concurrent.futures.Future[Any]":
+                # Cada tarefa com uma cópia do contexto: mantém a prioridade do pedido no scheduler
+                return executor.submit(contextvars.copy_context().run, fn, *args)
+
+            self._wait_all([submit(self._prepare, user_id, upload) for upload in uploads])
+
+            progress = _ProgressAggregator(sum(upload.size for upload in uploads), progress_callback)
+            already_sent = sum(upload.part_range(number)[1] for upload in uploads if upload.upload_id for number in upload.etags)
+            if already_sent:
+                logger.info("A retomar uploads interrompidos: %s bytes já estavam no S3.", already_sent)
+                progress.add(already_sent)
+
+            part_futures = []
+            for upload in uploads:
+                if upload.upload_id is None:
+                    part_futures.append(submit(self._put_single, upload, progress))
+                    continue
+                for part_number, url in upload.part_urls.items():
+                    part_futures.append(submit(self._put_part, user_id, upload, part_number, url, progress))
+            self._wait_all(part_futures)
+
+            self._wait_all([submit(self._complete, user_id, upload) for upload in uploads if upload.upload_id is not None])
+        return [upload.metadata() for upload in uploads]
+
+    @staticmethod
+    def _wait_all(futures: List["concurrent.futures.Future[Any]"]):
+        """Espera por todas as tarefas; à primeira falha cancela as que ainda não começaram e levanta-a."""
+        for future in concurrent.futures.as_completed(futures):
+            if future.exception() is not None:
+                for other in futures:
+                    other.cancel()
+                error = future.exception()
+                if isinstance(error, UploadError):
+                    raise error
+                if isinstance(error, requests.exceptions.RequestException):
+                    raise UploadError(f"Erro de comunicação no upload: {error}") from error
+                raise error
+
+    # --- Chamadas à API ---
+
+    def _api_post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        headers = self.auth_headers()
+        headers["Content-Type"] = "application/json"
+        response = self.transport.post(path, headers=headers, json=payload, timeout=15)
+        # O API Gateway (REST) responde 403 "Missing Authentication Token" a rotas que não existem
+        if response.status_code in (403, 404, 405) and path.endswith("/uploads"):
+            raise DirectUploadUnsupported(f"Endpoint de uploads indisponível (HTTP {response.status_code}).")
+        if response.status_code == 404:
+            raise _UploadExpired(f"Upload não encontrado no servidor ({path}).")
+        try:
+            body = decode_json_response(response)
+        except ValueError:
+            body = None
+        if not response.ok or not isinstance(body, dict) or body.get("success") is False:
+            message = body.get("message") if isinstance(body, dict) else None
+            raise UploadError(message or f"Erro HTTP {response.status_code} ao preparar o upload.")
+        return body
+
+    def _abort(self, user_id: str, upload_id: str, s3_key: str):
+        """Aborta no S3 um upload multipart abandonado (as partes já enviadas deixam de ocupar espaço)."""
+        try:
+            response = self.transport.delete(f"/users/{user_id}/uploads/{upload_id}", headers=self.auth_headers(),
+                                             params={"s3_key": s3_key}, timeout=15)
+            if not response.ok and response.status_code != 404:
+                logger.warning("Não foi possível abortar o upload %s (HTTP %s).", upload_id, response.status_code)
+        except requests.exceptions.RequestException as e:
+            logger.warning("Não foi possível abortar o upload %s: %s", upload_id, e)
+
+    def _prepare(self, user_id: str, upload: _FileUpload):
+        """Retoma o upload guardado deste ficheiro (se ainda existir no S3) ou inicia um novo."""
+        session = self.state_store.load(user_id, upload.path) if self.state_store else None
+        if session is not None and (session["file_size"] != upload.size or session["file_mtime"] != upload.mtime):
+            logger.info("'%s' mudou desde o upload %s interrompido; a abortá-lo e a recomeçar.", upload.file_name, session["upload_id"])
+            self._abort(user_id, session["upload_id"], session["s3_key"])
+            self.state_store.delete(user_id, upload.path)
+            session = None
+        if session is not None:
+            upload.s3_key, upload.upload_id, upload.part_size = session["s3_key"], session["upload_id"], session["part_size"]
+            upload.etags = dict(session["parts"])
+            missing = [number for number in range(1, upload.part_count() + 1) if number not in upload.etags]
+            try:
+                body = self._api_post(f"/users/{user_id}/uploads/{upload.upload_id}/parts",
+                                      {"s3_key": upload.s3_key, "part_numbers": missing})
+            except _UploadExpired:
+                logger.info("Upload %s de '%s' já não existe no S3; a recomeçar.", upload.upload_id, upload.file_name)
+                self._abort(user_id, upload.upload_id, upload.s3_key) # Pode ter só expirado o registo da API
+                self.state_store.delete(user_id, upload.path)
+                upload.upload_id, upload.etags = None, {}
+            else:
+                # O S3 é a fonte de verdade: partes que o registo local não tinha também contam
+                for part in body.get("uploaded") or []:
+                    upload.etags[int(part["part_number"])] = part["etag"]
+                upload.part_urls = {int(part["part_number"]): part["url"] for part in body.get("parts") or []
+                                    if int(part["part_number"]) not in upload.etags}
+                return
+
+        body = self._api_post(f"/users/{user_id}/uploads", {
+            "file_name": upload.file_name, "content_type": upload.content_type,
+            "size": upload.size, "part_size": self.part_size,
+        })
+        upload.s3_key = body["s3_key"]
+        if not body.get("upload_id"):
+            upload.single_url = body["url"]
+            upload.single_headers = dict(body.get("headers") or {})
+            return
+        upload.upload_id = body["upload_id"]
+        upload.part_size = int(body.get("part_size") or self.part_size)
+        upload.part_urls = {int(part["part_number"]): part["url"] for part in body.get("parts") or []}
+        if self.state_store is not None:
+            self.state_store.save(user_id, upload.path, upload.size, upload.mtime, upload.upload_id, upload.s3_key, upload.part_size)
+
+    def _complete(self, user_id: str, upload: _FileUpload):
+        parts = [{"part_number": number, "etag": upload.etags[number]} for number in sorted(upload.etags)]
+        if len(parts) != upload.part_count():
+            raise UploadError(f"Upload de '{upload.file_name}' incompleto ({len(parts)} de {upload.part_count()} partes).")
+        self._api_post(f"/users/{user_id}/uploads/{upload.upload_id}/complete", {"s3_key": upload.s3_key, "parts": parts})
+        if self.state_store is not None:
+            self.state_store.delete(user_id, upload.path)
+
+    # --- Envio para o S3 ---
+
+    def _put_single(self, upload: _FileUpload, progress: _ProgressAggregator):
+        headers = {"Content-Type": upload.content_type}
+        headers.update(upload.single_headers)
+        self._put(upload.single_url, upload, 0, upload.size, headers, progress)
+
+    def _put_part(self, user_id: str, upload: _FileUpload, part_number: int, url: str, progress: _ProgressAggregator):
+        offset, length = upload.part_range(part_number)
+        etag = self._put(url, upload, offset, length, {}, progress)
+        upload.etags[part_number] = etag
+        if self.state_store is not None:
+            self.state_store.record_part(user_id, upload.path, part_number, etag)
+
+    def _put(self, url: str, upload: _FileUpload, offset: int, length: int, headers: Dict[str, str],
+             progress: _ProgressAggregator) -> str:
+        """PUT de um bloco do ficheiro na URL pré-assinada, com novas tentativas; devolve o ETag."""
+        attempt = 1
+        while True:
+            response = None
+            body = _FileSliceReader(upload.path, offset, length, progress) # Um leitor novo por tentativa
+            try:
+                # Sem Authorization: a assinatura está na própria URL
+                response = self.transport.put(url, headers=headers, data=body, timeout=self.part_timeout)
+                if response.ok:
+                    return response.headers.get("ETag", "")
+                if response.status_code < 500 and response.status_code not in (408, 429):
+                    raise UploadError(f"S3 recusou '{upload.file_name}' (HTTP {response.status_code}).")
+                reason = f"HTTP {response.status_code}"
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.part_attempts:
+                    raise UploadError(f"Falha de rede ao enviar '{upload.file_name}': {e}") from e
+                reason = type(e).__name__
+            finally:
+                body.close()
+                if response is None or not response.ok:
+                    progress.add(-body.sent) # Tentativa perdida: o progresso volta atrás
+            if attempt >= self.part_attempts:
+                raise UploadError(f"Falha ao enviar '{upload.file_name}' ({reason}).")
+            delay = self.transport.resilience.retry_delay(attempt, response)
+            logger.debug("Parte de '%s' (offset %s) falhou (%s); nova tentativa em %.1fs.", upload.file_name, offset, reason, delay)
+            time.sleep(delay)
+            attempt += 1
+
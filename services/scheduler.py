@@ -0,0 +1,218 @@
+# advocacia_app/services/scheduler.py
+
+import contextlib
+import contextvars
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from config.constants import (
+    API_MAX_CONCURRENT_REQUESTS,
+    API_MAX_CONCURRENT_PER_HOST,
+    API_INTERACTIVE_RESERVED_SLOTS,
+    API_BACKGROUND_MAX_CONCURRENT
+)
+
+logger = logging.getLogger(__name__)
+
+# Classes de prioridade dos pedidos (menor = mais urgente)
+PRIORITY_INTERACTIVE = 0 # O utilizador está à espera (clique num cliente, abrir um diálogo para editar, guardar)
+PRIORITY_VISIBLE = 1     # Atualização do que está no ecrã (lista da aba aberta, pesquisa)
+PRIORITY_PREFETCH = 2    # Dados que ainda ninguém pediu (carregamento antecipado das coleções)
+PRIORITY_SYNC = 3        # Sincronização em segundo plano (envio da outbox)
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_VISIBLE: "visible",
+    PRIORITY_PREFETCH: "prefetch",
+    PRIORITY_SYNC: "sync",
+}
+
+
+class TaskPriority:
+    """
+    Prioridade de uma tarefa, lida a cada pedido: promote() torna mais urgentes os pedidos seguintes
+    de uma tarefa já em curso (ex: o prefetch de uma coleção que entretanto passou a estar no ecrã).
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value: int = PRIORITY_VISIBLE):
+        self.value = value
+
+    def promote(self, priority: int):
+        if priority < self.value:
+            self.value = priority
+
+    def __repr__(self) -> str:
+        return f"TaskPriority({PRIORITY_NAMES.get(self.value, self.value)})"
+
+
+# Sem default partilhado: um TaskPriority comum a todos os contextos seria promovido para todos
+_current_priority: "contextvars.ContextVar[Optional[TaskPriority]]" = contextvars.ContextVar(
+    "api_request_priority", default=None)
+
+
+def current_priority() -> int:
+    """Prioridade dos pedidos feitos no contexto atual (thread ou tarefa asyncio); PRIORITY_VISIBLE fora de request_priority()."""
+    priority = _current_priority.get()
+    return PRIORITY_VISIBLE if priority is None else priority.value
+
+
+@contextlib.contextmanager
+def request_priority(priority: Union[int, TaskPriority]) -> Iterator[None]:
+    """
+    Define a prioridade dos pedidos feitos dentro do bloco (o ApiWorker usa-o à volta da função):
+        with request_priority(PRIORITY_PREFETCH):
+            service.get_clients_by_user(user_id)
+    """
+    token = _current_priority.set(priority if isinstance(priority, TaskPriority) else TaskPriority(priority))
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def is_background_priority(priority: int) -> bool:
+    return priority >= PRIORITY_PREFETCH
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "host", "enqueued_at")
+
+    def __init__(self, priority: int, seq: int, host: str):
+        self.priority = priority
+        self.seq = seq
+        self.host = host
+        self.enqueued_at = time.monotonic()
+
+
+class RequestScheduler:
+    """
+    Orçamento de concorrência dos pedidos HTTP, partilhado por todos os serviços (ApiTransport).
+
+    Cada envio ocupa uma vaga durante o pedido (slot()). Há um teto global e um teto por host; as
+    últimas 'interactive_reserved' vagas (no total e por host) ficam reservadas aos pedidos interativos,
+    e o prefetch e a sincronização juntos nunca passam de 'background_limit'. Quando não há vaga, o
+    pedido espera numa fila ordenada por prioridade (e por ordem de chegada dentro da mesma classe):
+    uma vaga libertada vai sempre para o pedido mais urgente que caiba nela.
+
+    Não há interrupção de pedidos em curso: o trabalho de baixa prioridade é adiado nas fronteiras
+    entre pedidos (as listas paginadas pedem uma vaga por página, logo um clique passa à frente do
+    resto do prefetch) e uma tarefa em curso pode ser promovida (TaskPriority.promote).
+    stats() devolve a profundidade das filas e o tempo de espera por classe.
+    """
+
+    def __init__(self, max_concurrent: int = API_MAX_CONCURRENT_REQUESTS,
+                 max_per_host: int = API_MAX_CONCURRENT_PER_HOST,
+                 interactive_reserved: int = API_INTERACTIVE_RESERVED_SLOTS,
+                 background_limit: int = API_BACKGROUND_MAX_CONCURRENT):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_per_host = max(1, max_per_host)
+        # Pelo menos uma vaga fica sempre disponível para os pedidos não interativos
+        self.interactive_reserved = max(0, min(interactive_reserved, self.max_concurrent - 1, self.max_per_host - 1))
+        self.background_limit = max(1, background_limit)
+        self._condition = threading.Condition()
+        self._seq = itertools.count()
+        self._waiters: List[_Waiter] = []
+        self._in_flight = {priority: 0 for priority in PRIORITY_NAMES}
+        self._in_flight_by_host: Dict[str, int] = {}
+        self._total_in_flight = 0
+        self._stats = {name: {"admitted": 0, "deferred": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+                       for name in PRIORITY_NAMES.values()}
+
+    def _fits(self, priority: int, host: str) -> bool:
+        reserved = 0 if priority == PRIORITY_INTERACTIVE else self.interactive_reserved
+        if self._total_in_flight >= self.max_concurrent - reserved:
+            return False
+        if self._in_flight_by_host.get(host, 0) >= self.max_per_host - reserved:
+            return False
+        if is_background_priority(priority):
+            background = sum(count for p, count in self._in_flight.items() if is_background_priority(p))
+            if background >= self.background_limit:
+                return False
+        return True
+
+    def _is_next(self, waiter: _Waiter) -> bool:
+        """O pedido cabe e nenhum pedido mais urgente (ou mais antigo da mesma classe) que também caiba está à espera."""
+        if not self._fits(waiter.priority, waiter.host):
+            return False
+        rank = (waiter.priority, waiter.seq)
+        return not any((other.priority, other.seq) < rank and self._fits(other.priority, other.host)
+                       for other in self._waiters)
+
+    def acquire(self, host: str, priority: int):
+        with self._condition:
+            waiter = _Waiter(priority, next(self._seq), host)
+            self._waiters.append(waiter)
+            waited = False
+            try:
+                while not self._is_next(waiter):
+                    waited = True
+                    self._condition.wait()
+            finally:
+                self._waiters.remove(waiter)
+            self._in_flight[priority] = self._in_flight.get(priority, 0) + 1
+            self._in_flight_by_host[host] = self._in_flight_by_host.get(host, 0) + 1
+            self._total_in_flight += 1
+
+            stats = self._stats.get(PRIORITY_NAMES.get(priority, ""))
+            if stats is not None:
+                stats["admitted"] += 1
+                if waited:
+                    wait = time.monotonic() - waiter.enqueued_at
+                    stats["deferred"] += 1
+                    stats["wait_seconds"] += wait
+                    stats["max_wait_seconds"] = max(stats["max_wait_seconds"], wait)
+            if waited:
+                self._condition.notify_all() # Pode haver vaga para mais alguém atrás deste
+        if waited:
+            logger.debug("Pedido %s para %s admitido após %.3fs na fila.", PRIORITY_NAMES.get(priority, priority), host,
+                         time.monotonic() - waiter.enqueued_at)
+
+    def release(self, host: str, priority: int):
+        with self._condition:
+            self._in_flight[priority] -= 1
+            self._in_flight_by_host[host] -= 1
+            if not self._in_flight_by_host[host]:
+                del self._in_flight_by_host[host]
+            self._total_in_flight -= 1
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self, host: str, priority: Optional[int] = None) -> Iterator[None]:
+        """Ocupa uma vaga para um envio ao 'host'; sem prioridade explícita usa a do contexto atual."""
+        if priority is None:
+            priority = current_priority()
+        self.acquire(host, priority)
+        try:
+            yield
+        finally:
+            self.release(host, priority)
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Pedidos à espera de vaga, por classe de prioridade."""
+        with self._condition:
+            depths = {name: 0 for name in PRIORITY_NAMES.values()}
+            for waiter in self._waiters:
+                name = PRIORITY_NAMES.get(waiter.priority, str(waiter.priority))
+                depths[name] = depths.get(name, 0) + 1
+            return depths
+
+    def stats(self) -> Dict[str, Any]:
+        depths = self.queue_depths()
+        with self._condition:
+            classes: Dict[str, Any] = {}
+            for priority, name in PRIORITY_NAMES.items():
+                stats = dict(self._stats[name])
+                stats["queued"] = depths.get(name, 0)
+                stats["in_flight"] = self._in_flight.get(priority, 0)
+                stats["avg_wait_seconds"] = stats["wait_seconds"] / stats["deferred"] if stats["deferred"] else 0.0
+                classes[name] = stats
+            return {
+                "in_flight": self._total_in_flight,
+                "queued": len(self._waiters),
+                "in_flight_by_host": dict(self._in_flight_by_host),
+                "classes": classes,
+            }
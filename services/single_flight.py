@@ -0,0 +1,107 @@
+# advocacia_app/services/single_flight.py
+
+import functools
+import hashlib
+import inspect
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class _InFlightCall:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+def share_result(result: Any) -> Any:
+    """
+    Cópia barata do resultado para quem o recebe por partilha: o dict da resposta e as listas de
+    registos são novos (um chamador pode acrescentar/remover itens ou alterar um registo sem afetar
+    os outros); os valores dentro de cada registo continuam partilhados.
+    """
+    if isinstance(result, dict):
+        return {key: share_result(value) if isinstance(value, (dict, list)) else value for key, value in result.items()}
+    if isinstance(result, list):
+        return [dict(item) if isinstance(item, dict) else item for item in result]
+    return result
+
+
+class SingleFlight:
+    """
+    Junta pedidos idênticos em curso: enquanto o primeiro chamador (líder) executa a função, os
+    seguintes com a mesma chave esperam pelo mesmo resultado em vez de repetirem a chamada à API.
+    Só junta chamadas simultâneas; não é um cache (depois de concluída, a chave é esquecida).
+    Thread-safe. stats() conta as chamadas e as que foram servidas por partilha.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _InFlightCall] = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "coalesced": 0}
+
+    def run(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _InFlightCall()
+                leader = True
+
+        if not leader:
+            logger.debug("Pedido idêntico já em curso; a aguardar o resultado partilhado (%s).", key[:2] if isinstance(key, tuple) else key)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return share_result(call.result)
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                shared = call.followers > 0 # Depois de retirada a chave já não entram seguidores
+            call.done.set()
+        # Os seguidores copiam call.result depois de done.set(): o líder também recebe a sua cópia
+        return share_result(call.result) if shared else call.result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        stats["coalesced_rate"] = stats["coalesced"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+
+def coalesced(method: F) -> F:
+    """
+    Decorador dos GETs dos serviços de API: chamadas simultâneas com os mesmos argumentos e o mesmo
+    token partilham um único pedido (e um único parse) pelo SingleFlight do transporte.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+        token = getattr(self, "auth_token", None) or ""
+        token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()[:16] if token else ""
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults() # f(u) e f(u, cursor=None) são o mesmo pedido
+        arguments = [(name, value) for name, value in bound.arguments.items() if name != "self"]
+        key = (type(self).__name__, method.__name__, token_hash, repr(arguments))
+        return self.transport.single_flight.run(key, lambda: method(self, *args, **kwargs))
+    return wrapper  # type: ignore[return-value]
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Os módulos da aplicação são importados a partir da raiz do projeto (como em main.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
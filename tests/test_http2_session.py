@@ -0,0 +1,41 @@
+import io
+
+import pytest
+
+from services.api_transport import ApiTransport
+from services.http2_session import Http2Session
+
+
+@pytest.mark.parametrize("kwargs", [
+    {},
+    {"headers": {"A": "1"}, "params": {"q": "x"}, "timeout": 10},
+    {"data": "{}"},
+    {"data": b"{}"},
+    {"json": {"a": 1}},
+    {"allow_redirects": None}, # None é o mesmo que não passar
+])
+def test_can_send_translatable_requests(kwargs):
+    assert Http2Session.can_send(kwargs)
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"allow_redirects": False},
+    {"files": [("f", ("a.pdf", b"x"))]},
+    {"stream": True},
+    {"verify": False},
+    {"data": io.BytesIO(b"corpo em streaming")},
+])
+def test_requests_with_untranslated_options_stay_on_http1(kwargs):
+    assert not Http2Session.can_send(kwargs)
+
+
+def test_transport_routes_untranslated_options_to_the_requests_session():
+    transport = ApiTransport(base_url="https://api.example.test/dev", http2=False)
+    http2_session = object()
+    transport._http2_session = http2_session
+    try:
+        assert transport._session_for({"timeout": 5}) is http2_session
+        assert transport._session_for({"timeout": 5, "allow_redirects": False}) is not http2_session
+    finally:
+        transport._http2_session = None
+        transport.close()
@@ -0,0 +1,120 @@
+import pytest
+
+from database.local_replica import LocalReplica
+
+USER = "u"
+
+
+@pytest.fixture
+def replica(tmp_path):
+    replica = LocalReplica(str(tmp_path / "replica.db"))
+    yield replica
+    replica.shutdown()
+
+
+def client(cpf, updated_at, **fields):
+    return {"client_cpf": cpf, "updated_at": updated_at, **fields}
+
+
+def stored(replica, entity="clients"):
+    return {record["client_cpf"]: record for record in replica.load_all(entity, USER)}
+
+
+def full_sync(replica, pages, protected_keys=None):
+    seen, changed = set(), []
+    for page in pages:
+        result = replica.reconcile_page("clients", USER, page, protected_keys)
+        changed.extend(result.changed_keys)
+        seen.update(record["client_cpf"] for record in page)
+    removed = replica.finish_full_sync("clients", USER, seen, protected_keys, sync_cursor="2024-01-02")
+    return changed, removed
+
+
+def test_full_sync_reports_only_changes_and_removes_missing_records(replica):
+    full_sync(replica, [[client("1", "2024-01-01", nome="A"), client("2", "2024-01-01", nome="B")]])
+
+    changed, removed = full_sync(replica, [[client("1", "2024-01-01", nome="A")], [client("3", "2024-01-02", nome="C")]])
+
+    assert changed == ["3"]
+    assert removed == ["2"]
+    assert set(stored(replica)) == {"1", "3"}
+    assert replica.sync_state("clients", USER)[0] == "2024-01-02"
+
+
+def test_full_sync_keeps_protected_records(replica):
+    replica.upsert("clients", USER, client("local-1", None, nome="Novo"))
+
+    _changed, removed = full_sync(replica, [[client("1", "2024-01-01")]], protected_keys={"local-1"})
+
+    assert removed == []
+    assert "local-1" in stored(replica)
+
+
+def test_newer_local_record_is_not_overwritten(replica):
+    replica.upsert("clients", USER, client("1", "2024-01-05", nome="Editado"))
+
+    result = replica.reconcile_page("clients", USER, [client("1", "2024-01-01", nome="Antigo")])
+
+    assert result.changed_keys == []
+    assert stored(replica)["1"]["nome"] == "Editado"
+
+
+def test_projection_with_same_version_does_not_truncate_cached_record(replica):
+    replica.upsert("clients", USER, client("1", "2024-01-01", nome="A", email="a@x", telefone="123"))
+
+    # A listagem com projeção só traz alguns campos da mesma versão do documento
+    result = replica.reconcile_page("clients", USER, [client("1", "2024-01-01", nome="A")])
+
+    assert result.changed_keys == []
+    assert stored(replica)["1"] == client("1", "2024-01-01", nome="A", email="a@x", telefone="123")
+
+
+def test_projection_with_same_version_merges_new_fields(replica):
+    replica.upsert("clients", USER, client("1", "2024-01-01", nome="A", email="a@x"))
+
+    result = replica.reconcile_page("clients", USER, [client("1", "2024-01-01", nome="A", status="ativo")])
+
+    assert result.changed_keys == ["1"]
+    assert result.records["1"] == client("1", "2024-01-01", nome="A", email="a@x", status="ativo")
+    assert stored(replica)["1"] == result.records["1"]
+
+
+def test_newer_remote_version_replaces_cached_record(replica):
+    replica.upsert("clients", USER, client("1", "2024-01-01", nome="A", email="a@x"))
+
+    replica.reconcile_page("clients", USER, [client("1", "2024-01-03", nome="B")])
+
+    assert stored(replica)["1"] == client("1", "2024-01-03", nome="B")
+
+
+def test_delta_applies_changes_and_tombstones_and_advances_cursor(replica):
+    full_sync(replica, [[client("1", "2024-01-01", nome="A"), client("2", "2024-01-01", nome="B")]])
+
+    result = replica.apply_delta("clients", USER, [client("1", "2024-01-04", nome="A2"), client("4", "2024-01-05")],
+                                 deleted_keys=["2", "nunca-existiu"])
+
+    assert sorted(result.changed_keys) == ["1", "4"]
+    assert result.removed_keys == ["2"]
+    assert set(stored(replica)) == {"1", "4"}
+    assert replica.sync_state("clients", USER)[0] == "2024-01-05"
+
+
+def test_delta_tombstone_wins_over_change_in_the_same_response(replica):
+    full_sync(replica, [[client("1", "2024-01-01")]])
+
+    result = replica.apply_delta("clients", USER, [client("1", "2024-01-02")], deleted_keys=["1"])
+
+    assert result.changed_keys == []
+    assert result.removed_keys == ["1"]
+    assert stored(replica) == {}
+
+
+def test_delta_does_not_touch_protected_records(replica):
+    replica.upsert("clients", USER, client("1", "2024-01-01", nome="Local"))
+    replica.upsert("clients", USER, client("2", "2024-01-01", nome="Local"))
+
+    result = replica.apply_delta("clients", USER, [client("1", "2024-01-09", nome="Remoto")], deleted_keys=["2"],
+                                 protected_keys={"1", "2"})
+
+    assert not result.has_changes
+    assert {key: record["nome"] for key, record in stored(replica).items()} == {"1": "Local", "2": "Local"}
@@ -0,0 +1,108 @@
+import pytest
+
+from database.outbox import (
+    MutationOutbox,
+    OPERATION_CREATE,
+    OPERATION_DELETE,
+    OPERATION_UPDATE,
+    STATUS_FAILED,
+    STATUS_PENDING,
+)
+
+USER = "u"
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    outbox = MutationOutbox(str(tmp_path / "outbox.db"))
+    yield outbox
+    outbox.shutdown()
+
+
+def send(outbox, now=None):
+    """Simula o worker: devolve a próxima mutação a enviar, já marcada como em envio."""
+    mutation = outbox.next_due(USER, now=now)
+    if mutation is not None:
+        outbox.mark_sending(mutation["id"])
+    return mutation
+
+
+def test_mutations_are_sent_in_creation_order(outbox):
+    first = outbox.enqueue(USER, "clients", OPERATION_CREATE, "local-1", {"nome": "A"})
+    second = outbox.enqueue(USER, "processes", OPERATION_UPDATE, "P1", {"status": "x"})
+
+    assert send(outbox)["id"] == first
+    outbox.complete(first)
+    assert send(outbox)["id"] == second
+
+
+def test_oldest_mutation_waiting_for_retry_holds_the_queue(outbox):
+    first = outbox.enqueue(USER, "clients", OPERATION_UPDATE, "C1", {"nome": "A"})
+    outbox.enqueue(USER, "clients", OPERATION_UPDATE, "C2", {"nome": "B"})
+    outbox.reschedule(first, 1, next_attempt_at=100.0, error="HTTP 503")
+
+    assert outbox.next_due(USER, now=50.0) is None
+    assert outbox.next_attempt_at(USER) == 100.0
+    assert outbox.next_due(USER, now=100.0)["id"] == first
+
+
+def test_failed_create_blocks_later_mutations_of_the_same_entity(outbox):
+    create = outbox.enqueue(USER, "clients", OPERATION_CREATE, "local-1", {"nome": "A"})
+    assert send(outbox)["id"] == create
+    outbox.enqueue(USER, "clients", OPERATION_UPDATE, "local-1", {"nome": "B"}) # Editado durante o envio
+    other = outbox.enqueue(USER, "clients", OPERATION_UPDATE, "C2", {"nome": "C"})
+    outbox.mark_failed(create, 1, "HTTP 400")
+
+    # A edição de 'local-1' não pode chegar à API antes da criação: só a outra entidade segue
+    assert send(outbox)["id"] == other
+    outbox.complete(other)
+    assert outbox.next_due(USER) is None
+    assert outbox.next_attempt_at(USER) is None # Nada para agendar: o worker não fica em ciclo
+    assert outbox.counts(USER) == (1, 1)
+
+
+def test_retrying_failed_mutation_releases_blocked_ones_in_order(outbox):
+    create = outbox.enqueue(USER, "clients", OPERATION_CREATE, "local-1", {"nome": "A"})
+    send(outbox)
+    update = outbox.enqueue(USER, "clients", OPERATION_UPDATE, "local-1", {"nome": "B"})
+    outbox.mark_failed(create, 1, "HTTP 400")
+
+    outbox.retry_failed(USER)
+
+    assert send(outbox)["id"] == create
+    outbox.complete(create)
+    assert send(outbox)["id"] == update
+
+
+def test_discarding_failed_mutation_also_discards_the_blocked_ones(outbox):
+    create = outbox.enqueue(USER, "clients", OPERATION_CREATE, "local-1", {"nome": "A"})
+    send(outbox)
+    update = outbox.enqueue(USER, "clients", OPERATION_UPDATE, "local-1", {"nome": "B"})
+    other = outbox.enqueue(USER, "clients", OPERATION_UPDATE, "C2", {"nome": "C"})
+    outbox.mark_failed(create, 1, "HTTP 400")
+
+    discarded = outbox.discard_failed(USER)
+
+    assert [(m["id"], m["status"]) for m in discarded] == [(create, STATUS_FAILED), (update, STATUS_PENDING)]
+    assert send(outbox)["id"] == other
+    assert outbox.counts(USER) == (1, 0)
+
+
+def test_failure_of_one_entity_does_not_block_another_with_the_same_key(outbox):
+    failed = outbox.enqueue(USER, "clients", OPERATION_UPDATE, "1", {"nome": "A"})
+    send(outbox)
+    outbox.mark_failed(failed, 1, "HTTP 400")
+    hearing = outbox.enqueue(USER, "hearings", OPERATION_UPDATE, "1", {"local": "B"})
+
+    assert send(outbox)["id"] == hearing
+
+
+def test_pending_mutations_are_merged(outbox):
+    create = outbox.enqueue(USER, "clients", OPERATION_CREATE, "local-1", {"nome": "A"})
+    assert outbox.enqueue(USER, "clients", OPERATION_UPDATE, "local-1", {"email": "a@x"}) == create
+    mutation = outbox.next_due(USER)
+    assert mutation["operation"] == OPERATION_CREATE
+    assert mutation["payload"] == {"nome": "A", "email": "a@x"}
+
+    assert outbox.enqueue(USER, "clients", OPERATION_DELETE, "local-1") is None
+    assert outbox.next_due(USER) is None
@@ -0,0 +1,123 @@
+import pytest
+import requests
+
+from services.api_transport import ApiTransport
+from services.resilience import BREAKER_CLOSED, BREAKER_OPEN, CircuitOpenError, ResiliencePolicy
+
+BASE_URL = "https://api.example.test/dev"
+ENDPOINT = "api.example.test/users/{id}/clients"
+
+
+def make_response(status):
+    response = requests.Response()
+    response.status_code = status
+    response._content = b"{}"
+    response._content_consumed = True
+    return response
+
+
+class FakeSession:
+    """Session que devolve (ou levanta) os resultados pela ordem dada, registando os métodos pedidos."""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append(method)
+        result = self.results.pop(0)
+        if isinstance(result, BaseException):
+            raise result
+        return make_response(result)
+
+
+@pytest.fixture
+def transport():
+    policy = ResiliencePolicy(max_attempts=3, base_delay=0, max_delay=0, failure_threshold=2, reset_seconds=60)
+    transport = ApiTransport(base_url=BASE_URL, resilience=policy, http2=False)
+    yield transport
+    transport.close()
+
+
+def use_session(transport, monkeypatch, results):
+    session = FakeSession(results)
+    monkeypatch.setattr(transport, "_session_for", lambda kwargs: session)
+    return session
+
+
+def open_breaker(policy, monkeypatch):
+    policy.record_failure(ENDPOINT)
+    policy.record_failure(ENDPOINT)
+    assert policy.breaker_states()[ENDPOINT]["state"] == BREAKER_OPEN
+    # Fim do período de espera: o pedido seguinte é o teste do circuito meio-aberto
+    monkeypatch.setattr(policy, "reset_seconds", 0)
+
+
+def test_breaker_opens_after_threshold_and_short_circuits(transport, monkeypatch):
+    session = use_session(transport, monkeypatch, [503, 503, 503])
+
+    assert transport.get("/users/u/clients").status_code == 503
+    assert transport.resilience.breaker_states()[ENDPOINT]["state"] == BREAKER_OPEN
+    assert len(session.calls) == 2 # O circuito abriu entre tentativas: a terceira não chega a sair
+
+    with pytest.raises(CircuitOpenError):
+        transport.get("/users/u/clients")
+    assert len(session.calls) == 2
+
+
+def test_half_open_trial_closes_breaker_on_success(transport, monkeypatch):
+    open_breaker(transport.resilience, monkeypatch)
+    use_session(transport, monkeypatch, [200])
+
+    assert transport.get("/users/u/clients").status_code == 200
+    assert transport.resilience.breaker_states()[ENDPOINT]["state"] == BREAKER_CLOSED
+
+
+@pytest.mark.parametrize("error", [
+    requests.exceptions.TooManyRedirects("loop"),
+    requests.exceptions.ContentDecodingError("gzip"),
+    RuntimeError("scheduler"),
+])
+def test_unexpected_error_releases_half_open_trial(transport, monkeypatch, error):
+    open_breaker(transport.resilience, monkeypatch)
+    session = use_session(transport, monkeypatch, [error, 200])
+
+    with pytest.raises(type(error)):
+        transport.get("/users/u/clients")
+
+    # Sem libertar o teste, todos os pedidos seguintes seriam recusados com CircuitOpenError
+    assert transport.get("/users/u/clients").status_code == 200
+    assert len(session.calls) == 2
+    assert transport.resilience.breaker_states()[ENDPOINT]["state"] == BREAKER_CLOSED
+
+
+def test_chunked_encoding_error_counts_as_failure_and_is_retried(transport, monkeypatch):
+    session = use_session(transport, monkeypatch, [requests.exceptions.ChunkedEncodingError("cut"), 200])
+
+    assert transport.get("/users/u/clients").status_code == 200
+    assert session.calls == ["GET", "GET"]
+
+
+def test_post_is_not_retried(transport, monkeypatch):
+    session = use_session(transport, monkeypatch, [503, 200])
+
+    assert transport.post("/users/u/clients", json={}).status_code == 503
+    assert session.calls == ["POST"]
+
+
+def test_delete_is_not_retried(transport, monkeypatch):
+    # Um DELETE repetido depois de o primeiro ter sido aplicado devolveria 404 por um recurso já apagado
+    session = use_session(transport, monkeypatch, [requests.exceptions.ReadTimeout("lost"), 404])
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        transport.delete("/users/u/clients/1")
+    assert session.calls == ["DELETE"]
+
+
+def test_get_retries_until_success(transport, monkeypatch):
+    session = use_session(transport, monkeypatch, [requests.exceptions.ConnectionError("reset"), 200])
+
+    assert transport.get("/users/u/clients").status_code == 200
+    assert len(session.calls) == 2
+    assert transport.resilience.stats()["retries"] == 1
+    assert transport.resilience.breaker_states()[ENDPOINT]["consecutive_failures"] == 0
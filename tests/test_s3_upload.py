@@ -0,0 +1,262 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from database.upload_state import UploadStateStore
+from services.api_transport import ApiTransport
+from services.process_api_service import ProcessApiService
+from services.s3_upload import DirectUploadUnsupported, S3DirectUploader, UploadError
+
+PART_SIZE = 1024
+
+
+class FakeBackend:
+    """Substituto local da API de uploads e do S3 (URLs "pré-assinadas" no mesmo servidor)."""
+
+    def __init__(self):
+        self.uploads_status = 200       # Resposta de POST /uploads (403/404 = endpoint inexistente)
+        self.part_failures = {}         # (s3_key, part_number) -> [códigos HTTP a devolver antes de aceitar]
+        self.parts = {}                 # s3_key -> {part_number: bytes}
+        self.objects = {}               # s3_key -> bytes (uploads concluídos)
+        self.requests = []              # (método, caminho, query)
+        self.processes = []             # Corpos recebidos em POST /processes
+        self._upload_seq = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def _part_url(self, key, number, upload_id):
+        return f"{self.base}/s3/{key}?partNumber={number}&uploadId={upload_id}"
+
+    def _handler(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body=None, headers=None):
+                data = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _read(self):
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                raw = self._read()
+                backend.requests.append(("POST", url.path, url.query))
+                if url.path.endswith("/processes"):
+                    backend.processes.append((self.headers.get("Content-Type"), raw))
+                    return self._reply(200, {"success": True, "process_id": "P1"})
+                body = json.loads(raw or b"{}")
+                if url.path.endswith("/uploads"):
+                    if backend.uploads_status != 200:
+                        return self._reply(backend.uploads_status, {"message": "Missing Authentication Token"})
+                    key = body["file_name"]
+                    if body["size"] <= body["part_size"]:
+                        return self._reply(200, {"success": True, "s3_key": key, "url": f"{backend.base}/s3/{key}"})
+                    backend._upload_seq += 1
+                    upload_id = f"U{backend._upload_seq}"
+                    backend.parts[key] = {}
+                    count = -(-body["size"] // body["part_size"])
+                    return self._reply(200, {"success": True, "s3_key": key, "upload_id": upload_id, "part_size": body["part_size"],
+                                             "parts": [{"part_number": n, "url": backend._part_url(key, n, upload_id)}
+                                                       for n in range(1, count + 1)]})
+                upload_id = url.path.split("/")[-2]
+                key = body["s3_key"]
+                if key not in backend.parts:
+                    return self._reply(404, {"message": "NoSuchUpload"})
+                if url.path.endswith("/parts"):
+                    uploaded = backend.parts[key]
+                    return self._reply(200, {"success": True,
+                                             "uploaded": [{"part_number": n, "etag": f'"e{n}"'} for n in uploaded],
+                                             "parts": [{"part_number": n, "url": backend._part_url(key, n, upload_id)}
+                                                       for n in body["part_numbers"] if n not in uploaded]})
+                if url.path.endswith("/complete"):
+                    numbers = [part["part_number"] for part in body["parts"]]
+                    assert numbers == sorted(backend.parts[key])
+                    uploaded = backend.parts.pop(key)
+                    backend.objects[key] = b"".join(uploaded[n] for n in numbers)
+                    return self._reply(200, {"success": True})
+                return self._reply(404, {"message": "not found"})
+
+            def do_PUT(self):
+                url = urlparse(self.path)
+                data = self._read()
+                query = parse_qs(url.query)
+                backend.requests.append(("PUT", url.path, url.query))
+                assert "Authorization" not in self.headers
+                key = url.path.rsplit("/", 1)[-1]
+                if "partNumber" not in query:
+                    backend.objects[key] = data
+                    return self._reply(200, headers={"ETag": '"single"'})
+                number = int(query["partNumber"][0])
+                failures = backend.part_failures.get((key, number))
+                if failures:
+                    return self._reply(failures.pop(0))
+                backend.parts[key][number] = data
+                return self._reply(200, headers={"ETag": f'"e{number}"'})
+
+            def do_DELETE(self):
+                url = urlparse(self.path)
+                backend.requests.append(("DELETE", url.path, url.query))
+                backend.parts.pop(parse_qs(url.query).get("s3_key", [""])[0], None)
+                return self._reply(204)
+
+        return Handler
+
+    def puts(self):
+        return [(path, query) for method, path, query in self.requests if method == "PUT"]
+
+
+@pytest.fixture
+def backend():
+    fake = FakeBackend()
+    yield fake
+    fake.server.shutdown()
+
+
+@pytest.fixture
+def transport(backend):
+    transport = ApiTransport(base_url=f"{backend.base}/dev")
+    transport.resilience.base_delay = 0.01
+    yield transport
+    transport.close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = UploadStateStore(str(tmp_path / "uploads.db"))
+    yield store
+    store.shutdown()
+
+
+def make_file(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(os.urandom(size))
+    return str(path)
+
+
+def make_uploader(transport, store):
+    return S3DirectUploader(transport, lambda: {"Authorization": "Bearer t"}, state_store=store, part_size=PART_SIZE)
+
+
+def test_interrupted_multipart_upload_resumes_only_missing_parts(backend, transport, store, tmp_path):
+    path = make_file(tmp_path, "big.pdf", 5 * PART_SIZE - 100)
+    backend.part_failures[("big.pdf", 3)] = [403] # Recusa definitiva: o primeiro envio falha
+    files = [("process_documents", ("big.pdf", path, "application/pdf"))]
+
+    with pytest.raises(UploadError):
+        make_uploader(transport, store).upload_files("u", files)
+    assert sorted(store.load("u", path)["parts"]) == [1, 2, 4, 5]
+
+    backend.requests.clear()
+    documents = make_uploader(transport, store).upload_files("u", files)
+
+    assert [query for _path, query in backend.puts()] == ["partNumber=3&uploadId=U1"]
+    assert backend.objects["big.pdf"] == open(path, "rb").read()
+    assert documents == [{"filename": "big.pdf", "s3_key": "big.pdf", "content_type": "application/pdf", "size": 5 * PART_SIZE - 100}]
+    assert store.load("u", path) is None
+
+
+def test_failed_part_attempt_is_retried_and_progress_rolls_back(backend, transport, store, tmp_path):
+    path = make_file(tmp_path, "big.pdf", 3 * PART_SIZE)
+    backend.part_failures[("big.pdf", 2)] = [500]
+    progress = []
+
+    make_uploader(transport, store).upload_files("u", [("f", ("big.pdf", path, "application/pdf"))],
+                                                 lambda done, total: progress.append((done, total)))
+
+    assert backend.objects["big.pdf"] == open(path, "rb").read()
+    assert progress[-1] == (3 * PART_SIZE, 3 * PART_SIZE)
+    assert all(done <= total for done, total in progress)
+
+
+def test_progress_is_reported_while_the_body_streams(backend, transport, store, tmp_path):
+    size = 256 * 1024 # Uma só parte: sem leitura em pedaços haveria um único salto para 100%
+    path = make_file(tmp_path, "small.pdf", size)
+    uploader = S3DirectUploader(transport, lambda: {}, state_store=store, part_size=size)
+    progress = []
+
+    uploader.upload_files("u", [("f", ("small.pdf", path, "application/pdf"))], lambda done, total: progress.append(done))
+
+    assert len(progress) > 2
+    assert 0 < progress[0] < size
+    assert progress[-1] == size
+
+
+def test_changed_file_aborts_the_stale_upload_before_starting_again(backend, transport, store, tmp_path):
+    path = make_file(tmp_path, "big.pdf", 3 * PART_SIZE)
+    backend.part_failures[("big.pdf", 2)] = [403]
+    files = [("f", ("big.pdf", path, "application/pdf"))]
+    with pytest.raises(UploadError):
+        make_uploader(transport, store).upload_files("u", files)
+
+    with open(path, "ab") as file: # O ficheiro muda: as partes antigas já não servem
+        file.write(b"mais")
+    os.utime(path, (1, 1))
+    backend.requests.clear()
+    make_uploader(transport, store).upload_files("u", files)
+
+    methods = [(method, path_) for method, path_, _query in backend.requests]
+    assert methods.index(("DELETE", "/dev/users/u/uploads/U1")) < methods.index(("POST", "/dev/users/u/uploads"))
+    assert backend.objects["big.pdf"] == open(path, "rb").read()
+
+
+def test_expired_upload_is_aborted_and_restarted(backend, transport, store, tmp_path):
+    path = make_file(tmp_path, "big.pdf", 3 * PART_SIZE)
+    backend.part_failures[("big.pdf", 2)] = [403]
+    files = [("f", ("big.pdf", path, "application/pdf"))]
+    with pytest.raises(UploadError):
+        make_uploader(transport, store).upload_files("u", files)
+    backend.parts.clear() # O S3 já não conhece o upload U1
+
+    make_uploader(transport, store).upload_files("u", files)
+
+    assert ("DELETE", "/dev/users/u/uploads/U1", "s3_key=big.pdf") in backend.requests
+    assert backend.objects["big.pdf"] == open(path, "rb").read()
+
+
+@pytest.mark.parametrize("status", [403, 404, 405])
+def test_missing_uploads_endpoint_is_unsupported(backend, transport, store, tmp_path, status):
+    backend.uploads_status = status
+    path = make_file(tmp_path, "doc.pdf", 10)
+    with pytest.raises(DirectUploadUnsupported):
+        make_uploader(transport, store).upload_files("u", [("f", ("doc.pdf", path, "application/pdf"))])
+
+
+def test_process_service_falls_back_to_multipart_without_uploads_endpoint(backend, transport, store, tmp_path):
+    backend.uploads_status = 403 # API Gateway: "Missing Authentication Token" numa rota inexistente
+    path = make_file(tmp_path, "doc.pdf", 10)
+    service = ProcessApiService(auth_token="t", transport=transport, upload_state=store, direct_uploads=True)
+
+    response = service.add_process("u", {"numero_processo": "1"}, [("process_documents", ("doc.pdf", path, "application/pdf"))])
+
+    assert response["success"] is True
+    content_type, _body = backend.processes[-1]
+    assert content_type.startswith("multipart/form-data")
+    assert service.uploader is None
+
+
+def test_process_service_commits_only_metadata_after_direct_upload(backend, transport, store, tmp_path):
+    path = make_file(tmp_path, "doc.pdf", 10)
+    service = ProcessApiService(auth_token="t", transport=transport, upload_state=store, direct_uploads=True)
+
+    response = service.add_process("u", {"numero_processo": "1", "documents": [{"s3_key": "old"}]},
+                                   [("process_documents", ("doc.pdf", path, "application/pdf"))])
+
+    assert response["success"] is True
+    content_type, body = backend.processes[-1]
+    assert content_type == "application/json"
+    assert json.loads(body)["documents"] == [
+        {"s3_key": "old"}, {"filename": "doc.pdf", "s3_key": "doc.pdf", "content_type": "application/pdf", "size": 10}]
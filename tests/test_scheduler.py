@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+
+from services.scheduler import (
+    PRIORITY_INTERACTIVE,
+    PRIORITY_PREFETCH,
+    PRIORITY_SYNC,
+    PRIORITY_VISIBLE,
+    RequestScheduler,
+    TaskPriority,
+    current_priority,
+    request_priority,
+)
+
+
+def test_priority_outside_a_task_is_visible_and_not_shared():
+    assert current_priority() == PRIORITY_VISIBLE
+    task = TaskPriority(PRIORITY_PREFETCH)
+    with request_priority(task):
+        task.promote(PRIORITY_INTERACTIVE)
+        assert current_priority() == PRIORITY_INTERACTIVE
+    # A promoção de uma tarefa não muda a prioridade dos outros contextos
+    assert current_priority() == PRIORITY_VISIBLE
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(current_priority()))
+    thread.start()
+    thread.join()
+    assert seen == [PRIORITY_VISIBLE]
+
+
+def test_freed_slot_goes_to_the_most_urgent_waiter():
+    scheduler = RequestScheduler(max_concurrent=2, max_per_host=2, interactive_reserved=0, background_limit=2)
+    scheduler.acquire("h", PRIORITY_VISIBLE)
+    scheduler.acquire("h", PRIORITY_VISIBLE)
+    admitted = []
+
+    def wait_for_slot(priority):
+        scheduler.acquire("h", priority)
+        admitted.append(priority)
+
+    sync = threading.Thread(target=wait_for_slot, args=(PRIORITY_SYNC,))
+    sync.start()
+    while scheduler.queue_depths()["sync"] < 1:
+        time.sleep(0.001)
+    interactive = threading.Thread(target=wait_for_slot, args=(PRIORITY_INTERACTIVE,))
+    interactive.start()
+    while scheduler.queue_depths()["interactive"] < 1:
+        time.sleep(0.001)
+
+    scheduler.release("h", PRIORITY_VISIBLE)
+    interactive.join(5)
+    assert admitted == [PRIORITY_INTERACTIVE]
+    scheduler.release("h", PRIORITY_VISIBLE)
+    sync.join(5)
+    assert admitted == [PRIORITY_INTERACTIVE, PRIORITY_SYNC]
+    assert scheduler.stats()["classes"]["sync"]["deferred"] == 1
+
+
+def test_reserved_slots_are_kept_for_interactive_requests():
+    scheduler = RequestScheduler(max_concurrent=2, max_per_host=2, interactive_reserved=1, background_limit=2)
+    scheduler.acquire("h", PRIORITY_VISIBLE)
+    blocked = threading.Thread(target=scheduler.acquire, args=("h", PRIORITY_VISIBLE), daemon=True)
+    blocked.start()
+    while scheduler.queue_depths()["visible"] < 1:
+        time.sleep(0.001)
+
+    scheduler.acquire("h", PRIORITY_INTERACTIVE) # Não espera: usa a vaga reservada
+    assert scheduler.stats()["in_flight"] == 2
+    scheduler.release("h", PRIORITY_INTERACTIVE)
+    scheduler.release("h", PRIORITY_VISIBLE)
+    blocked.join(5)
+    assert not blocked.is_alive()
+
+
+@pytest.fixture
+def qt_app():
+    from PySide6.QtCore import QCoreApplication
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def test_promoted_worker_is_discarded_from_the_pool_it_was_queued_in(qt_app):
+    from PySide6.QtCore import QObject
+    from ui.workers import BackgroundTaskRunner, get_api_thread_pool
+
+    owner = QObject()
+    runner = BackgroundTaskRunner(owner)
+    release = threading.Event()
+    background_pool = get_api_thread_pool(background=True)
+    # Ocupa todas as threads do pool de fundo: a tarefa seguinte fica na fila
+    for index in range(background_pool.maxThreadCount()):
+        runner.run(release.wait, 5, priority=PRIORITY_SYNC, key=f"busy-{index}")
+    queued = runner.run(lambda: None, priority=PRIORITY_PREFETCH, key="prefetch")
+
+    queued.promote(PRIORITY_INTERACTIVE) # Passou a estar no ecrã enquanto esperava
+    runner.cancel("prefetch")
+
+    assert queued.pool is background_pool
+    assert id(queued) not in runner._active # Retirado da fila: nunca chega a correr
+    release.set()
+    background_pool.waitForDone(5000)
@@ -0,0 +1,72 @@
+import threading
+import time
+
+from services.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call_but_not_the_result_objects():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"success": True, "clients": [{"client_cpf": "1", "nome": "A"}]}
+
+    results = [None] * 3
+
+    def caller(index):
+        results[index] = flight.run("clients", fetch)
+
+    threads = [threading.Thread(target=caller, args=(index,)) for index in range(3)]
+    for thread in threads:
+        thread.start()
+    while flight.stats()["coalesced"] < 2:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    # O líder altera a sua resposta (como faz a GUI): os seguidores não podem ver a alteração
+    leader = next(result for result in results if result is not None)
+    leader["clients"][0]["nome"] = "Alterado"
+    leader["clients"].append({"client_cpf": "2"})
+    assert all(result["clients"] == [{"client_cpf": "1", "nome": "A"}] for result in results if result is not leader)
+    assert len({id(result) for result in results}) == 3
+
+
+def test_leader_error_is_raised_to_followers_and_key_is_forgotten():
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        release.wait(5)
+        raise ValueError("falhou")
+
+    def caller():
+        try:
+            flight.run("k", failing)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    while flight.stats()["coalesced"] < 1:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(errors) == 2
+    assert flight.run("k", lambda: "ok") == "ok"
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_uncontended_call_returns_the_result_itself():
+    flight = SingleFlight()
+    result = {"success": True}
+    assert flight.run("k", lambda: result) is result
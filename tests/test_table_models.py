@@ -0,0 +1,123 @@
+import random
+
+import pytest
+from PySide6.QtCore import QCoreApplication, Qt
+
+from ui.table_models import RecordTableModel, portuguese_sort_key
+
+COLUMNS = [("Nome", lambda record: record.get("nome", ""), lambda record: portuguese_sort_key(record.get("nome")))]
+
+
+@pytest.fixture
+def model():
+    QCoreApplication.instance() or QCoreApplication([])
+    model = RecordTableModel(COLUMNS, "id")
+    model.set_records([{"id": "1", "nome": "Carla"}, {"id": "2", "nome": "Álvaro"}])
+    model.sort(0, Qt.SortOrder.AscendingOrder)
+    return model
+
+
+def names(model):
+    return [model.data(model.index(row, 0)) for row in range(model.rowCount())]
+
+
+def test_append_records_updates_existing_rows_and_sorts_once(model):
+    sorts = []
+    model.layoutChanged.connect(lambda *args: sorts.append(1))
+
+    model.append_records([{"id": "1", "nome": "Bruno"}, {"id": "2", "nome": "Zélia"},
+                          {"id": "3", "nome": "Ana"}, {"id": "4", "nome": "Conceição"}])
+
+    assert sorts == [1]
+    assert names(model) == ["Ana", "Bruno", "Conceição", "Zélia"]
+    assert [model.row_for_id(key) for key in ("3", "1", "4", "2")] == [0, 1, 2, 3]
+
+
+def test_append_records_with_only_existing_rows_still_sorts_once(model):
+    sorts = []
+    model.layoutChanged.connect(lambda *args: sorts.append(1))
+
+    model.append_records([{"id": "1", "nome": "Alice"}, {"id": "2", "nome": "Beatriz"}])
+
+    assert sorts == [1]
+    assert names(model) == ["Alice", "Beatriz"]
+
+
+def test_append_records_without_records_does_nothing(model):
+    sorts = []
+    model.layoutChanged.connect(lambda *args: sorts.append(1))
+
+    model.append_records([])
+
+    assert sorts == []
+    assert names(model) == ["Álvaro", "Carla"]
+
+
+def sorted_names(model, reverse=False):
+    return sorted(names(model), key=portuguese_sort_key, reverse=reverse)
+
+
+def test_upsert_with_unchanged_sort_key_does_not_relayout(model):
+    signals = []
+    model.layoutChanged.connect(lambda *args: signals.append("layout"))
+    model.rowsMoved.connect(lambda *args: signals.append("moved"))
+    model.dataChanged.connect(lambda *args: signals.append("data"))
+
+    model.upsert_record({"id": "1", "nome": "Carla", "email": "c@x"})
+
+    assert signals == ["data"]
+    assert model.record(model.row_for_id("1"))["email"] == "c@x"
+
+
+@pytest.mark.parametrize("order", [Qt.SortOrder.AscendingOrder, Qt.SortOrder.DescendingOrder])
+def test_upsert_moves_only_the_changed_row(model, order):
+    model.append_records([{"id": str(key), "nome": name} for key, name in
+                          enumerate(["Bruno", "Diana", "Eva", "Fábio", "Gil"], start=3)])
+    model.sort(0, order)
+    reverse = order == Qt.SortOrder.DescendingOrder
+    layouts, moves = [], []
+    model.layoutChanged.connect(lambda *args: layouts.append(1))
+    model.rowsMoved.connect(lambda *args: moves.append(1))
+
+    model.upsert_record({"id": "2", "nome": "Érica"}) # Álvaro -> Érica: muda de posição
+    model.upsert_record({"id": "7", "nome": "Aurora"}) # Gil -> Aurora
+
+    assert layouts == []
+    assert moves == [1, 1]
+    assert names(model) == sorted_names(model, reverse)
+    assert all(model.row_for_id(model.record_id(row)) == row for row in range(model.rowCount()))
+
+
+def test_upsert_inserts_new_row_at_its_sorted_position(model):
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append(first))
+
+    model.upsert_record({"id": "3", "nome": "Bia"})
+    model.upsert_record({"id": "4", "nome": "Carla"}) # Chave igual: fica depois da existente
+
+    assert inserted == [1, 3]
+    assert names(model) == ["Álvaro", "Bia", "Carla", "Carla"]
+    assert [model.row_for_id(key) for key in ("2", "3", "1", "4")] == [0, 1, 2, 3]
+
+
+def test_remove_record_reindexes_following_rows(model):
+    model.append_records([{"id": "3", "nome": "Bia"}, {"id": "4", "nome": "Davi"}])
+
+    model.remove_record("3")
+
+    assert names(model) == ["Álvaro", "Carla", "Davi"]
+    assert model.row_for_id("3") == -1
+    assert [model.row_for_id(key) for key in ("2", "1", "4")] == [0, 1, 2]
+
+
+def test_random_upserts_and_removals_keep_the_same_order_as_a_full_sort(model):
+    rng = random.Random(7)
+    model.sort(0, Qt.SortOrder.DescendingOrder)
+    for _ in range(300):
+        key = str(rng.randrange(30))
+        if rng.random() < 0.2:
+            model.remove_record(key)
+        else:
+            model.upsert_record({"id": key, "nome": rng.choice(["Ana", "Bia", "Caio", "Dora", "Élio"]) + str(rng.randrange(5))})
+        assert names(model) == sorted_names(model, reverse=True)
+    assert all(model.row_for_id(model.record_id(row)) == row for row in range(model.rowCount()))
@@ -1,11 +1,18 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
-    QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox,
+    QPushButton, QTableView, QHeaderView, QMessageBox,
     QDialog, QDialogButtonBox, QFormLayout, QScrollArea, QFrame, QSplitter,
-    QTextEdit, QSpacerItem, QSizePolicy, QApplication
+    QTextEdit, QSpacerItem, QSizePolicy
 )
 from PySide6.QtCore import Qt, Slot, QTimer
 from PySide6.QtGui import QFont
+from typing import Any, Dict, List, Optional, Tuple
+
+from .workers import BackgroundTaskRunner
+from services.scheduler import PRIORITY_INTERACTIVE
+from .table_models import (
+    RecordTableModel, RecordFilterProxyModel, configure_record_table_view, selected_record_id
+)
 
 # Este ficheiro NÃO DEVE importar DynamoDBClientHandler diretamente
 # Ele recebe e usa uma instância de ClientApiService
@@ -45,12 +52,16 @@ class ClientFormDialog_pyside(QDialog):
     ]
 
     # O construtor agora recebe client_api_service
-    def __init__(self, client_api_service, user_id, client_cpf_to_edit=None, parent=None):
+    def __init__(self, client_api_service, user_id, client_cpf_to_edit=None, entity_store=None, parent=None):
         super().__init__(parent)
         self.client_api_service = client_api_service # Armazena a instância do serviço de API
         self.user_id = user_id
         self.client_cpf_to_edit = client_cpf_to_edit 
         self.client_data_to_edit = None
+        self.entity_store = entity_store # Com write_behind, a gravação fica na outbox e o diálogo fecha logo
+        self.saved_client_cpf: Optional[str] = None # CPF gravado com sucesso (para a aba atualizar o EntityStore)
+        self.saved_via_outbox = False # True se a alteração ficou na outbox (o EntityStore já foi atualizado)
+        self.task_runner = BackgroundTaskRunner(self, busy_widget=self) # Chamadas à API fora da thread da GUI
 
         self.setWindowTitle("Adicionar Novo Cliente" if not client_cpf_to_edit else "Editar Cliente")
         self.setMinimumWidth(550) 
@@ -58,15 +69,15 @@ class ClientFormDialog_pyside(QDialog):
 
         self.layout = QVBoxLayout(self)
         
-        scroll_area = QScrollArea(self)
-        scroll_area.setWidgetResizable(True)
-        self.layout.addWidget(scroll_area)
+        self.scroll_area = QScrollArea(self)
+        self.scroll_area.setWidgetResizable(True)
+        self.layout.addWidget(self.scroll_area)
         
         form_widget = QWidget()
         self.form_layout = QFormLayout(form_widget)
         self.form_layout.setRowWrapPolicy(QFormLayout.RowWrapPolicy.WrapAllRows) 
         form_widget.setLayout(self.form_layout)
-        scroll_area.setWidget(form_widget)
+        self.scroll_area.setWidget(form_widget)
         
         self.entries = {}
         for label, attr_name, WidgetClass, _, placeholder in ClientFormDialog_pyside.STATIC_FIELDS_CONFIG:
@@ -79,25 +90,43 @@ class ClientFormDialog_pyside(QDialog):
             self.form_layout.addRow(label, entry)
             self.entries[attr_name] = entry
         
+        self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        self.button_box.accepted.connect(self.accept_data) # Conecta ao método que usa a API
+        self.button_box.rejected.connect(self.reject)
+        self.layout.addWidget(self.button_box)
+
         if self.client_cpf_to_edit:
             self.load_client_data_for_edit() # Este método usará self.client_api_service
             if "client_cpf" in self.entries: 
                 self.entries["client_cpf"].setReadOnly(True) # CPF não editável na edição
 
-        self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
-        self.button_box.accepted.connect(self.accept_data) # Conecta ao método que usa a API
-        self.button_box.rejected.connect(self.reject)
-        self.layout.addWidget(self.button_box)
+    def _set_form_busy(self, busy: bool, status_text: str = ""):
+        """Bloqueia o formulário enquanto uma chamada à API está em curso (a janela continua a responder)."""
+        self.scroll_area.setEnabled(not busy)
+        ok_button = self.button_box.button(QDialogButtonBox.StandardButton.Ok)
+        if ok_button:
+            ok_button.setEnabled(not busy)
+            ok_button.setText(status_text if busy and status_text else "OK")
 
     def load_client_data_for_edit(self):
         print(f"ClientFormDialog: Carregando dados para editar cliente CPF {self.client_cpf_to_edit} para utilizador {self.user_id}")
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        try:
-            # USA O CLIENT_API_SERVICE
-            api_response = self.client_api_service.get_client(self.user_id, self.client_cpf_to_edit)
-        finally:
-            QApplication.restoreOverrideCursor()
-        
+        local_response = self.entity_store.pending_response("clients", self.client_cpf_to_edit) if self.entity_store is not None else None
+        if local_response is not None: # Alterações ainda por enviar: a API teria a versão anterior
+            self._on_client_data_loaded(local_response)
+            return
+        self._set_form_busy(True, "A carregar...")
+        # USA O CLIENT_API_SERVICE (numa thread do pool)
+        self.task_runner.run(
+            self.client_api_service.get_client, self.user_id, self.client_cpf_to_edit,
+            on_result=self._on_client_data_loaded,
+            on_error=lambda msg: self._on_client_data_loaded({"success": False, "message": f"Erro ao buscar dados do cliente: {msg}"}),
+            key="load_client",
+            priority=PRIORITY_INTERACTIVE
+        )
+
+    @Slot(object)
+    def _on_client_data_loaded(self, api_response):
+        self._set_form_busy(False)
         if api_response and api_response.get("success") and "client" in api_response:
             self.client_data_to_edit = api_response["client"]
             for label, attr_name, WidgetClass, _, _ in ClientFormDialog_pyside.STATIC_FIELDS_CONFIG:
@@ -151,21 +180,37 @@ class ClientFormDialog_pyside(QDialog):
             client_data_payload.pop('client_cpf', None)
 
         print(f"ClientFormDialog: Dados do cliente para API (payload): {client_data_payload}")
+        self.saved_client_cpf = self.client_cpf_to_edit or client_data_payload.get('client_cpf')
+
+        write_behind = self.entity_store.write_behind if self.entity_store is not None else None
+        if write_behind is not None:
+            write_behind.submit("clients", "update" if self.client_cpf_to_edit else "create",
+                                self.saved_client_cpf, client_data_payload)
+            self.saved_via_outbox = True
+            self.accept() # A API é atualizada em segundo plano (indicador de sincronização na janela principal)
+            return
 
-        api_response = None
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        try:
-            if self.client_cpf_to_edit:
-                # USA O CLIENT_API_SERVICE
-                print(f"ClientFormDialog: Chamando client_api_service.update_client para user: {self.user_id}, cpf: {self.client_cpf_to_edit}")
-                api_response = self.client_api_service.update_client(self.user_id, self.client_cpf_to_edit, client_data_payload)
-            else:
-                # USA O CLIENT_API_SERVICE
-                print(f"ClientFormDialog: Chamando client_api_service.add_client para user: {self.user_id}")
-                api_response = self.client_api_service.add_client(self.user_id, client_data_payload)
-        finally:
-            QApplication.restoreOverrideCursor()
-
+        if self.client_cpf_to_edit:
+            # USA O CLIENT_API_SERVICE
+            print(f"ClientFormDialog: Chamando client_api_service.update_client para user: {self.user_id}, cpf: {self.client_cpf_to_edit}")
+            save_call = (self.client_api_service.update_client, self.user_id, self.client_cpf_to_edit, client_data_payload)
+        else:
+            # USA O CLIENT_API_SERVICE
+            print(f"ClientFormDialog: Chamando client_api_service.add_client para user: {self.user_id}")
+            save_call = (self.client_api_service.add_client, self.user_id, client_data_payload)
+
+        self._set_form_busy(True, "A guardar...")
+        self.task_runner.run(
+            *save_call,
+            on_result=self._on_save_finished,
+            on_error=lambda msg: self._on_save_finished({"success": False, "message": f"Erro ao comunicar com a API: {msg}"}),
+            key="save_client",
+            priority=PRIORITY_INTERACTIVE
+        )
+
+    @Slot(object)
+    def _on_save_finished(self, api_response):
+        self._set_form_busy(False)
         print(f"ClientFormDialog: Resposta da API: {api_response}")
         if api_response and api_response.get("success"):
             msg = api_response.get("message", f"Cliente {'atualizado' if self.client_cpf_to_edit else 'adicionado'} com sucesso!")
@@ -179,12 +224,24 @@ class ClientFormDialog_pyside(QDialog):
 
 
 class ClientsTab_pyside(QWidget):
-    # O construtor agora recebe client_api_service
-    def __init__(self, user_id, client_api_service, parent=None):
+    SEARCH_DEBOUNCE_MS = 250 # Intervalo sem digitação antes de aplicar o filtro
+
+    # O construtor recebe client_api_service (detalhes e alterações) e o EntityStore partilhado (lista de clientes)
+    def __init__(self, user_id, client_api_service, entity_store, parent=None):
         super().__init__(parent)
         self.user_id = user_id
         self.client_api_service = client_api_service # Armazena a instância do serviço de API
+        self.entity_store = entity_store
         self.selected_client_cpf = None
+        self._displayed_client_cpf = None # CPF cujos detalhes estão no painel (ou a ser carregados)
+        
+        # Debounce da busca: só filtra quando o utilizador para de digitar
+        self.search_debounce_timer = QTimer(self)
+        self.search_debounce_timer.setSingleShot(True)
+        self.search_debounce_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self.search_debounce_timer.timeout.connect(self.apply_clients_filter)
+
+        self.task_runner = BackgroundTaskRunner(self, busy_widget=self) # Chamadas à API fora da thread da GUI
         
         print(f"ClientsTab_pyside: Instanciada com user_id: {self.user_id} e client_api_service: {type(self.client_api_service)}")
 
@@ -197,23 +254,44 @@ class ClientsTab_pyside(QWidget):
         self.search_entry.textChanged.connect(self.filter_clients_display)
         action_bar_layout.addWidget(self.search_entry)
 
+        refresh_btn = QPushButton("Atualizar")
+        refresh_btn.setToolTip("Recarrega a lista de clientes do servidor.")
+        refresh_btn.clicked.connect(self.load_clients_from_api)
+        action_bar_layout.addWidget(refresh_btn)
+
         add_client_btn = QPushButton("Adicionar Cliente")
         add_client_btn.clicked.connect(self.open_add_client_dialog) # Chama o método que usa a API
         action_bar_layout.addWidget(add_client_btn)
         main_layout.addLayout(action_bar_layout)
 
+        # Indicador de carregamento (placeholder) exibido enquanto a lista é buscada
+        self.loading_label = QLabel("A carregar clientes...")
+        self.loading_label.setStyleSheet("color: #555; font-style: italic;")
+        self.loading_label.setVisible(False)
+        main_layout.addWidget(self.loading_label)
+
         self.splitter = QSplitter(Qt.Orientation.Horizontal)
 
-        self.clients_table = QTableWidget()
-        self.clients_table.setColumnCount(3) 
-        self.clients_table.setHorizontalHeaderLabels(["Nome Completo", "CPF", "Celular"])
+        # Modelo sobre a lista em memória; a busca é um filtro do proxy (chaves pré-calculadas por linha)
+        self.clients_model = RecordTableModel(
+            [
+                ("Nome Completo", lambda c: c.get("nome_completo", "N/A"), None),
+                ("CPF", lambda c: c.get("client_cpf", "N/A"), None),
+                ("Celular", lambda c: c.get("telefone_celular", "N/A"), None),
+            ],
+            id_field="client_cpf",
+            search_key_fn=self._client_search_key,
+            parent=self
+        )
+        self.clients_proxy = RecordFilterProxyModel(self)
+        self.clients_proxy.setSourceModel(self.clients_model)
+
+        self.clients_table = QTableView()
+        configure_record_table_view(self.clients_table, self.clients_proxy, sort_column=0)
         self.clients_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.clients_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Interactive)
         self.clients_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
-        self.clients_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.clients_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.clients_table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
-        self.clients_table.itemSelectionChanged.connect(self.on_client_selected_from_table)
+        self.clients_table.selectionModel().selectionChanged.connect(self.on_client_selected_from_table)
         self.splitter.addWidget(self.clients_table)
 
         self.client_details_area = QScrollArea()
@@ -243,72 +321,130 @@ class ClientsTab_pyside(QWidget):
         main_layout.addWidget(self.splitter)
         self.setLayout(main_layout)
 
-        self.load_clients_from_api() # Carrega clientes ao iniciar, usando a API
+        # A lista vem do EntityStore (partilhado com as outras abas); a aba só reage às alterações
+        clients = self.entity_store.clients
+        clients.reset.connect(self._on_clients_reset)
+        clients.items_added.connect(self._on_clients_added)
+        clients.item_changed.connect(self._on_client_changed)
+        clients.item_removed.connect(self._on_client_removed)
+        clients.loading_changed.connect(self.loading_label.setVisible)
+        clients.load_failed.connect(self._on_clients_load_failed)
+        self.loading_label.setVisible(clients.is_loading())
+        if clients.is_loaded():
+            self._on_clients_reset()
+        else:
+            clients.ensure_loaded()
+
+    @property
+    def all_clients_cache(self) -> List[Dict[str, Any]]:
+        """Lista completa de clientes em memória (do EntityStore); a busca filtra-a localmente."""
+        return self.entity_store.clients.items()
 
-    def load_clients_from_api(self, search_term=""):
-        print(f"ClientsTab: load_clients_from_api. User ID: {self.user_id}, Busca: '{search_term}'")
-        self.clients_table.setRowCount(0)
+    @Slot()
+    def load_clients_from_api(self):
+        """Refresh explícito: volta a baixar a lista de clientes para todas as abas."""
+        print(f"ClientsTab: load_clients_from_api. User ID: {self.user_id}")
         if not self.user_id:
             print("ClientsTab: ERRO - user_id não definido em load_clients_from_api.")
             QMessageBox.critical(self, "Erro Interno", "ID do utilizador não está disponível para carregar clientes.")
             return
-        
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        try:
-            # USA O CLIENT_API_SERVICE
-            api_response = self.client_api_service.get_clients_by_user(self.user_id)
-        finally:
-            QApplication.restoreOverrideCursor()
-        
-        all_clients_data = []
-        if api_response and api_response.get("success") and "clients" in api_response:
-            all_clients_data = api_response["clients"]
-            print(f"ClientsTab: {len(all_clients_data)} clientes recebidos da API.")
-        elif api_response and not api_response.get("success"): # Erro da API, mas resposta recebida
-             QMessageBox.warning(self, "Erro ao Carregar Clientes", api_response.get("message", "Não foi possível buscar os clientes do servidor."))
-        else: # Resposta inesperada ou None
-             QMessageBox.warning(self, "Erro ao Carregar Clientes", "Resposta inesperada ou falha de comunicação ao buscar clientes.")
-
-        filtered_clients = []
+        self.entity_store.clients.refresh()
+
+    @Slot()
+    def _on_clients_reset(self):
+        print(f"ClientsTab: {len(self.entity_store.clients)} clientes no EntityStore.")
+        self.set_clients_cache(self.all_clients_cache)
+        self.apply_clients_filter()
+
+    @Slot(list)
+    def _on_clients_added(self, client_cpfs: List[str]):
+        """Página da primeira carga: as linhas aparecem sem esperar pelo resto da lista."""
+        clients = self.entity_store.clients
+        self.clients_model.append_records([clients.get(cpf) for cpf in client_cpfs if cpf in clients])
+
+    @Slot(str)
+    def _on_client_changed(self, client_cpf: str):
+        client = self.entity_store.clients.get(client_cpf)
+        if client is None: return
+        self.clients_model.upsert_record(client)
+        if client_cpf == self.selected_client_cpf:
+            self.display_client_details(client_cpf) # Dados alterados: volta a buscar os detalhes
+
+    @Slot(str)
+    def _on_client_removed(self, client_cpf: str):
+        self.clients_model.remove_record(client_cpf)
+        if client_cpf == self.selected_client_cpf:
+            self.clients_table.clearSelection()
+
+    @Slot(str)
+    def _on_clients_load_failed(self, message: str):
+        QMessageBox.warning(self, "Erro ao Carregar Clientes", message)
+
+    @staticmethod
+    def _client_search_key(client: Dict[str, Any]) -> Tuple[str, str, str]:
+        """Chave de busca pré-calculada: nome em minúsculas, CPF, CPF só com dígitos."""
+        cpf = str(client.get("client_cpf", ""))
+        return (str(client.get("nome_completo", "")).lower(), cpf, "".join(ch for ch in cpf if ch.isdigit()))
+
+    def set_clients_cache(self, clients_data: List[Dict[str, Any]]):
+        """Substitui as linhas do modelo (com as chaves de busca e ordenação)."""
+        selection_model = self.clients_table.selectionModel()
+        selection_model.blockSignals(True) # A seleção é restaurada em apply_clients_filter
+        self.clients_model.set_records(clients_data)
+        selection_model.blockSignals(False)
+
+    @Slot()
+    def apply_clients_filter(self):
+        """Filtra a lista em memória pelo termo de busca atual, sem chamar a API."""
+        self.search_debounce_timer.stop()
+        search_term = self.search_entry.text().strip()
+
+        filter_fn = None
         if search_term:
             search_lower = search_term.lower()
-            for client in all_clients_data:
-                if (search_lower in client.get("nome_completo", "").lower() or
-                    search_lower in client.get("client_cpf", "")):
-                    filtered_clients.append(client)
-        else:
-            filtered_clients = all_clients_data
-
-        self.clients_table.setSortingEnabled(False)
-        for row, client_item in enumerate(filtered_clients):
-            self.clients_table.insertRow(row)
-            self.clients_table.setItem(row, 0, QTableWidgetItem(client_item.get("nome_completo", "N/A")))
-            self.clients_table.setItem(row, 1, QTableWidgetItem(client_item.get("client_cpf", "N/A")))
-            self.clients_table.setItem(row, 2, QTableWidgetItem(client_item.get("telefone_celular", "N/A")))
-        self.clients_table.setSortingEnabled(True)
+            # Busca por CPF ignora a pontuação (ex: "12345678901" encontra "123.456.789-01")
+            search_digits = "" if any(ch.isalpha() for ch in search_term) else "".join(ch for ch in search_term if ch.isdigit())
+            def filter_fn(search_key: Tuple[str, str, str]) -> bool:
+                name_lower, cpf, cpf_digits = search_key
+                return bool(search_lower in name_lower or search_lower in cpf or
+                            (search_digits and search_digits in cpf_digits))
+
+        previous_cpf = self.selected_client_cpf
+        selection_model = self.clients_table.selectionModel()
+        selection_model.blockSignals(True) # Evita limpar a seleção/detalhes enquanto o filtro muda
+        self.clients_proxy.set_filter_function(filter_fn)
+        selection_model.blockSignals(False)
+
+        # Mantém o cliente selecionado se ele continuar visível após o filtro/recarregamento
+        if previous_cpf:
+            proxy_row = self.clients_proxy.proxy_row_for_id(previous_cpf)
+            if proxy_row >= 0:
+                if selected_record_id(self.clients_table) != previous_cpf:
+                    self.clients_table.selectRow(proxy_row)
+                return
         
+        self.clients_table.clearSelection()
+        self.selected_client_cpf = None
         self.clear_client_details()
         self.edit_client_btn.setEnabled(False)
         self.delete_client_btn.setEnabled(False)
 
     @Slot()
     def filter_clients_display(self):
-        search_term = self.search_entry.text()
-        self.load_clients_from_api(search_term)
+        # Reinicia o debounce a cada tecla; o filtro local corre quando a digitação pausa
+        self.search_debounce_timer.start()
 
     @Slot() 
     def on_client_selected_from_table(self):
-        selected_items = self.clients_table.selectedItems()
-        if selected_items:
-            selected_row = self.clients_table.row(selected_items[0]) 
-            cpf_item = self.clients_table.item(selected_row, 1) 
-            if cpf_item:
-                self.selected_client_cpf = cpf_item.text()
-                print(f"ClientsTab: Cliente selecionado da tabela - CPF {self.selected_client_cpf}")
+        selected_cpf = selected_record_id(self.clients_table)
+        if selected_cpf:
+            self.selected_client_cpf = selected_cpf
+            print(f"ClientsTab: Cliente selecionado da tabela - CPF {self.selected_client_cpf}")
+            if self.selected_client_cpf != self._displayed_client_cpf:
                 self.display_client_details(self.selected_client_cpf) # Usa a API
-                self.edit_client_btn.setEnabled(True)
-                self.delete_client_btn.setEnabled(True)
-                return
+            self.edit_client_btn.setEnabled(True)
+            self.delete_client_btn.setEnabled(True)
+            return
         
         self.selected_client_cpf = None
         self.clear_client_details()
@@ -318,13 +454,31 @@ class ClientsTab_pyside(QWidget):
     def display_client_details(self, client_cpf_to_display):
         self.clear_client_details_content() 
         print(f"ClientsTab: display_client_details para CPF {client_cpf_to_display}")
+        self._displayed_client_cpf = client_cpf_to_display
 
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        try:
-            # USA O CLIENT_API_SERVICE
-            api_response = self.client_api_service.get_client(self.user_id, client_cpf_to_display)
-        finally:
-            QApplication.restoreOverrideCursor()
+        loading_label = QLabel("<i>A carregar detalhes do cliente...</i>")
+        self.client_details_layout.addWidget(loading_label)
+        self.details_labels_widgets.append(loading_label)
+
+        local_response = self.entity_store.pending_response("clients", client_cpf_to_display)
+        if local_response is not None:
+            self.task_runner.cancel("client_details")
+            self._render_client_details(client_cpf_to_display, local_response)
+            return
+
+        # USA O CLIENT_API_SERVICE (cliques rápidos cancelam a busca anterior)
+        self.task_runner.run(
+            self.client_api_service.get_client, self.user_id, client_cpf_to_display,
+            on_result=lambda api_response, cpf=client_cpf_to_display: self._render_client_details(cpf, api_response),
+            on_error=lambda msg, cpf=client_cpf_to_display: self._render_client_details(cpf, {"success": False, "message": f"Erro ao buscar detalhes: {msg}"}),
+            key="client_details",
+            priority=PRIORITY_INTERACTIVE
+        )
+
+    def _render_client_details(self, client_cpf, api_response):
+        if client_cpf != self._displayed_client_cpf:
+            return # Resposta de uma seleção que já não está ativa
+        self.clear_client_details_content()
 
         if api_response and api_response.get("success") and "client" in api_response:
             client_info = api_response["client"]
@@ -373,24 +527,27 @@ class ClientsTab_pyside(QWidget):
                 self.client_details_layout.takeAt(last_item_index)
 
     def clear_client_details(self):
+        self._displayed_client_cpf = None
+        self.task_runner.cancel("client_details")
         self.clear_client_details_content()
 
     def open_add_client_dialog(self):
         print("ClientsTab: open_add_client_dialog chamado.")
         # Passa self.client_api_service e self.user_id para o diálogo
-        dialog = ClientFormDialog_pyside(self.client_api_service, self.user_id, parent=self)
-        if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_clients_from_api() # Recarrega da API
+        dialog = ClientFormDialog_pyside(self.client_api_service, self.user_id, entity_store=self.entity_store, parent=self)
+        if dialog.exec() == QDialog.DialogCode.Accepted and not dialog.saved_via_outbox:
+            self.entity_store.clients.refresh_item(dialog.saved_client_cpf) # Só o cliente novo, não a lista
 
     def open_edit_client_dialog(self):
         if not self.selected_client_cpf:
             QMessageBox.warning(self, "Seleção Necessária", "Por favor, selecione um cliente na lista para editar.")
             return
         print(f"ClientsTab: open_edit_client_dialog para CPF {self.selected_client_cpf}")
-        dialog = ClientFormDialog_pyside(self.client_api_service, self.user_id, client_cpf_to_edit=self.selected_client_cpf, parent=self)
-        if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_clients_from_api() 
-            self.display_client_details(self.selected_client_cpf) 
+        dialog = ClientFormDialog_pyside(self.client_api_service, self.user_id, client_cpf_to_edit=self.selected_client_cpf,
+                                         entity_store=self.entity_store, parent=self)
+        if dialog.exec() == QDialog.DialogCode.Accepted and not dialog.saved_via_outbox:
+            # O EntityStore notifica item_changed; a linha é atualizada e os detalhes buscados de novo
+            self.entity_store.clients.refresh_item(dialog.saved_client_cpf)
 
     def delete_selected_client(self):
         if not self.selected_client_cpf:
@@ -398,12 +555,10 @@ class ClientsTab_pyside(QWidget):
             return
         print(f"ClientsTab: delete_selected_client para CPF {self.selected_client_cpf}")
 
-        current_row = self.clients_table.currentRow()
         nome_cliente_para_confirmacao = self.selected_client_cpf
-        if current_row >= 0:
-            nome_item = self.clients_table.item(current_row, 0)
-            if nome_item:
-                nome_cliente_para_confirmacao = nome_item.text()
+        source_row = self.clients_model.row_for_id(self.selected_client_cpf)
+        if source_row >= 0:
+            nome_cliente_para_confirmacao = self.clients_model.record(source_row).get("nome_completo", nome_cliente_para_confirmacao)
         
         confirm_msg = (f"Tem certeza que deseja remover o cliente:\n"
                        f"Nome: {nome_cliente_para_confirmacao}\n"
@@ -415,18 +570,26 @@ class ClientsTab_pyside(QWidget):
                                      QMessageBox.StandardButton.No)
         
         if reply == QMessageBox.StandardButton.Yes:
-            QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-            try:
-                # USA O CLIENT_API_SERVICE
-                api_response = self.client_api_service.delete_client(self.user_id, self.selected_client_cpf)
-            finally:
-                QApplication.restoreOverrideCursor()
-
-            if api_response and api_response.get("success"):
-                QMessageBox.information(self, "Sucesso", api_response.get("message", "Cliente removido com sucesso."))
-                self.load_clients_from_api() 
-            else:
-                error_msg = "Falha na remoção via API."
-                if isinstance(api_response, dict): 
-                    error_msg = api_response.get("message", "Não foi possível remover o cliente via API.")
-                QMessageBox.critical(self, "Erro na Remoção", error_msg)
+            self.delete_client_btn.setEnabled(False)
+            if self.entity_store.write_behind is not None:
+                self.entity_store.write_behind.submit("clients", "delete", self.selected_client_cpf)
+                return
+            # USA O CLIENT_API_SERVICE
+            self.task_runner.run(
+                self.client_api_service.delete_client, self.user_id, self.selected_client_cpf,
+                on_result=lambda api_response, cpf=self.selected_client_cpf: self._on_client_deleted(cpf, api_response),
+                on_error=lambda msg, cpf=self.selected_client_cpf: self._on_client_deleted(cpf, {"success": False, "message": f"Erro ao remover cliente: {msg}"}),
+                key="delete_client",
+                priority=PRIORITY_INTERACTIVE
+            )
+
+    def _on_client_deleted(self, client_cpf: str, api_response):
+        if api_response and api_response.get("success"):
+            QMessageBox.information(self, "Sucesso", api_response.get("message", "Cliente removido com sucesso."))
+            self.entity_store.clients.remove(client_cpf) 
+        else:
+            self.delete_client_btn.setEnabled(self.selected_client_cpf is not None)
+            error_msg = "Falha na remoção via API."
+            if isinstance(api_response, dict): 
+                error_msg = api_response.get("message", "Não foi possível remover o cliente via API.")
+            QMessageBox.critical(self, "Erro na Remoção", error_msg)
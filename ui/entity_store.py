@@ -0,0 +1,544 @@
+# advocacia_app/ui/entity_store.py
+
+import datetime
+import itertools
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from config.constants import DELTA_SYNC_FULL_RESYNC_HOURS
+from database.local_replica import LocalReplica, ReconcileResult
+from database.outbox import MutationOutbox
+from services.scheduler import PRIORITY_PREFETCH, PRIORITY_VISIBLE
+from .workers import BackgroundTaskRunner
+from .write_behind import WriteBehindQueue
+
+# Acima deste número de alterações numa sincronização, a coleção emite 'reset' em vez de sinais por registo
+MAX_INCREMENTAL_SYNC_CHANGES = 200
+
+# Projeções das listas ('fields='): só os atributos usados pelas tabelas, buscas, combos e pelos detalhes
+# renderizados a partir da coleção. Os registos completos vêm de fetch_one (detalhes/edição), quando abertos.
+# 'updated_at' é necessário para a reconciliação e para o cursor da sincronização incremental.
+CLIENT_LIST_FIELDS = ("client_cpf", "nome_completo", "telefone_celular", "updated_at")
+PROCESS_LIST_FIELDS = ("process_id", "numero_processo", "client_cpf", "client_nome_completo", "vara", "fase_atual", "updated_at")
+HEARING_LIST_FIELDS = ("hearing_id", "process_id", "data_hora", "local", "vara", "tipo", "notas", "updated_at")
+
+
+def normalize_cpf(cpf: Any) -> str:
+    """Só os dígitos do CPF/CNPJ: "123.456.789-00", "12345678900" e " 123 456 789 00" dão a mesma chave."""
+    return "".join(ch for ch in str(cpf or "") if ch.isdigit())
+
+
+class EntityCollection(QObject):
+    """
+    Cópia em memória de uma coleção da API (clientes, processos ou audiências), indexada pela chave
+    da entidade e partilhada por todas as abas e diálogos.
+
+    - A lista completa é baixada uma vez (ensure_loaded) e só volta a ser baixada em refresh()/invalidate().
+    - Depois de uma alteração, quem a fez atualiza a coleção (upsert/remove/refresh_item) e todos os
+      subscritores são notificados pelos sinais, sem cada widget voltar a baixar a lista.
+    - Com uma LocalReplica (SQLite), a coleção abre logo com a cópia local e a sincronização com a API
+      corre em segundo plano (reconcile por 'updated_at'); só os registos alterados geram sinais.
+      Depois da primeira sincronização, os refresh pedem só o delta desde o cursor guardado na réplica
+      ('updated_since', com tombstones para as remoções); a lista completa volta a ser pedida a cada
+      DELTA_SYNC_FULL_RESYNC_HOURS ou se a API recusar o cursor.
+    - As listas são pedidas página a página (limit/cursor); sem nada em memória, cada página aparece
+      nas tabelas assim que chega (items_added), em vez de esperar pela coleção inteira.
+      Sem rede, a cópia local continua utilizável (sync_failed em vez de load_failed).
+    - Opcionalmente mantém um índice secundário (lookup()) sobre a chave normalizada por 'normalize_key',
+      atualizado registo a registo em upsert/remove, sem varrer a coleção.
+    - Todos os métodos devem ser chamados na thread da GUI; as chamadas à API correm no pool.
+    """
+    reset = Signal()            # Conteúdo substituído por completo (carregamento/refresh)
+    items_added = Signal(list)  # Página de registos acrescentada durante a primeira carga (chaves)
+    loaded = Signal()           # Primeira carga concluída (da réplica local ou da API)
+    item_changed = Signal(str)  # Registo adicionado ou atualizado (chave)
+    item_removed = Signal(str)  # Registo removido (chave)
+    changed = Signal()          # Emitido depois de qualquer um dos três sinais acima
+    loading_changed = Signal(bool)
+    load_failed = Signal(str)   # Sem dados para mostrar (nem da API nem da réplica local)
+    sync_failed = Signal(str)   # A API falhou, mas a coleção continua com a cópia local
+
+    def __init__(self, entity_name: str, key_field: str, list_field: str, item_field: str,
+                 fetch_pages: Callable[..., Iterable[Dict[str, Any]]],
+                 fetch_one: Callable[[str], Dict[str, Any]],
+                 normalize_key: Optional[Callable[[Any], str]] = None,
+                 replica: Optional[LocalReplica] = None, replica_user_id: str = "",
+                 parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.entity_name = entity_name
+        self.key_field = key_field
+        self.list_field = list_field
+        self.item_field = item_field
+        self._fetch_pages = fetch_pages # fetch_pages(updated_since=None): gerador das páginas da lista
+        self._fetch_one = fetch_one
+        self.normalize_key = normalize_key
+        self.replica = replica
+        self.replica_user_id = replica_user_id
+        # Chaves com alterações locais ainda na outbox: a sincronização não as sobrepõe (WriteBehindQueue)
+        self.protected_keys_fn: Optional[Callable[[], Set[str]]] = None
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._index: Dict[str, Dict[str, Any]] = {} # Chave normalizada -> registo (só com normalize_key)
+        self._loaded = False
+        self._synced = False # Confirmado pela API nesta sessão (e não apenas lido da réplica local)
+        self._loading = False
+        self._reload_pending = False
+        self._load_worker = None # ApiWorker da sincronização em curso (para promover a prioridade)
+        self._generation = 0 # Incrementado em clear(): descarta respostas de uma sessão anterior
+        self.task_runner = BackgroundTaskRunner(self)
+
+    # --- Leitura ---
+
+    def items(self) -> List[Dict[str, Any]]:
+        return list(self._items.values())
+
+    def get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        return self._items.get(str(key)) if key is not None else None
+
+    def lookup(self, value: Any) -> Optional[Dict[str, Any]]:
+        """Procura pela chave normalizada (ex: CPF com ou sem pontuação); O(1)."""
+        if self.normalize_key is None:
+            return self.get(value)
+        normalized = self.normalize_key(value)
+        return self._index.get(normalized) if normalized else None
+
+    def __contains__(self, key: object) -> bool:
+        return str(key) in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def is_loading(self) -> bool:
+        return self._loading
+
+    def is_synced(self) -> bool:
+        return self._synced
+
+    def when_loaded(self, callback: Callable[[], None]):
+        """Chama 'callback' já, se a coleção estiver carregada, ou assim que o carregamento terminar (com ou sem sucesso)."""
+        if self._loaded:
+            callback()
+            return
+        def fire_once(*_args):
+            self.loaded.disconnect(fire_once)
+            self.load_failed.disconnect(fire_once)
+            callback()
+        self.loaded.connect(fire_once)
+        self.load_failed.connect(fire_once)
+        self.ensure_loaded()
+
+    # --- Carregamento ---
+
+    def ensure_loaded(self, priority: int = PRIORITY_VISIBLE):
+        """
+        Abre a coleção (réplica local e/ou API) se ainda não estiver sincronizada nesta sessão.
+        Se já estiver a carregar (ex: pelo prefetch), as páginas seguintes passam a 'priority'.
+        """
+        if self.is_loading():
+            self._promote_load(priority)
+        elif not self._synced:
+            self.refresh(priority)
+
+    def _load_from_replica(self):
+        """Abre a coleção com a cópia local (SQLite), antes de qualquer resposta da API."""
+        records = self.replica.load_all(self.list_field, self.replica_user_id)
+        if not records:
+            return
+        self._items = {str(record.get(self.key_field)): record for record in records if record.get(self.key_field) is not None}
+        self._rebuild_index()
+        self._loaded = True
+        print(f"EntityStore: {len(self._items)} {self.entity_name} lidos da réplica local.")
+        self.reset.emit()
+        self.changed.emit()
+        self.loaded.emit()
+
+    def refresh(self, priority: int = PRIORITY_VISIBLE):
+        """
+        Sincroniza com a API (delta desde o último cursor, se a coleção já estiver aberta da réplica;
+        senão a lista completa, página a página). Sem nada em memória, cada página é mostrada assim que
+        chega (items_added); com a coleção já aberta, o resultado é aplicado de uma vez no fim.
+        Se já houver um carregamento em curso, repete-o quando este terminar.
+        'priority' é a classe dos pedidos no RequestScheduler (PRIORITY_PREFETCH no prefetch da sessão).
+        """
+        if self.is_loading():
+            self._promote_load(priority)
+            self._reload_pending = True
+            return
+        if not self._loaded and self.replica is not None:
+            self._load_from_replica()
+        print(f"EntityStore: Carregando {self.entity_name}...")
+        generation = self._generation
+        self._loading = True
+        self.loading_changed.emit(True)
+        self._load_worker = self.task_runner.run(
+            self._fetch_and_reconcile, generation, self._loaded,
+            on_result=lambda result, gen=generation: self._on_all_fetched(gen, *result),
+            on_progress=lambda records, _unused, gen=generation: self._on_page_loaded(gen, records),
+            on_error=lambda msg, gen=generation: self._on_all_fetched(gen, {"success": False, "message": f"Erro ao buscar {self.entity_name}: {msg}"}),
+            key="load_all",
+            priority=priority
+        )
+
+    def _promote_load(self, priority: int):
+        if self._load_worker is not None:
+            self._load_worker.promote(priority)
+
+    def _fetch_and_reconcile(self, generation: int, loaded: bool, progress_callback: Optional[Callable[[Any, Any], None]] = None):
+        """
+        Executado no pool: percorre as páginas da lista (ou do delta) e, com réplica, grava-as no SQLite fora da GUI.
+        Retorna (última resposta, ReconcileResult a aplicar ou None, True se as páginas já foram enviadas à GUI).
+        O delta só é pedido quando a memória ('loaded') já espelha a réplica, porque não traz a coleção inteira.
+        """
+        cursor = None
+        if loaded and self.replica is not None:
+            cursor, full_synced_at = self.replica.sync_state(self.list_field, self.replica_user_id)
+            if cursor and self._full_resync_due(full_synced_at):
+                print(f"EntityStore: Sincronização completa periódica de {self.entity_name}.")
+                cursor = None
+        if not cursor:
+            return self._sync_full(generation, loaded, progress_callback, self._fetch_pages())
+
+        pages = iter(self._fetch_pages(updated_since=cursor))
+        first_page = next(pages)
+        if self._is_delta_response(first_page):
+            return self._sync_delta(generation, itertools.chain([first_page], pages))
+        if isinstance(first_page, dict) and first_page.get("http_status") == 410:
+            print(f"EntityStore: Cursor de {self.entity_name} expirado no servidor; baixando a lista completa.")
+            return self._sync_full(generation, loaded, progress_callback, self._fetch_pages())
+        if not (isinstance(first_page, dict) and first_page.get("success")):
+            return first_page, None, False
+        # Sem 'deleted', a API ignorou o updated_since e está a devolver a lista completa
+        return self._sync_full(generation, loaded, progress_callback, itertools.chain([first_page], pages))
+
+    def _sync_delta(self, generation: int, pages: Iterable[Dict[str, Any]]):
+        """Junta as páginas do delta e aplica-as à réplica numa só transação (o cursor só avança no fim)."""
+        changed_records: List[Dict[str, Any]] = []
+        deleted_keys: List[Any] = []
+        sync_cursor = None
+        response: Any = None
+        for response in pages:
+            if generation != self._generation:
+                return {"success": False, "message": "Sincronização cancelada."}, None, False
+            if not (isinstance(response, dict) and response.get("success")):
+                return response, None, False
+            changed_records.extend(response.get(self.list_field) or [])
+            deleted_keys.extend(response.get("deleted") or [])
+            sync_cursor = sync_cursor or response.get("sync_cursor") # O da 1ª página: nada feito depois dela se perde
+        reconciled = self.replica.apply_delta(self.list_field, self.replica_user_id, changed_records, deleted_keys,
+                                              protected_keys=self._protected_keys(), sync_cursor=sync_cursor)
+        return response, reconciled, False
+
+    def _sync_full(self, generation: int, loaded: bool, progress_callback: Optional[Callable[[Any, Any], None]],
+                   pages: Iterable[Dict[str, Any]]):
+        """
+        Percorre a listagem completa. Cada página é gravada na réplica assim que chega; sem nada em memória
+        ('loaded' False) é também enviada à GUI por progress_callback. No fim, a réplica remove o que a API
+        já não tem e guarda o cursor para os próximos deltas.
+        """
+        stream = not loaded and progress_callback is not None
+        protected_keys = self._protected_keys() if self.replica is not None else None
+        seen_keys: Set[str] = set()
+        accumulated = ReconcileResult({}, [], [], is_delta=True)
+        all_records: List[Dict[str, Any]] = [] # Só sem réplica e sem streaming (substitui a coleção no fim)
+        sync_cursor = None
+        max_updated_at = None
+        streamed = False
+        response: Any = None
+        for response in pages:
+            if generation != self._generation:
+                return {"success": False, "message": "Sincronização cancelada."}, None, streamed
+            if not (isinstance(response, dict) and response.get("success") and self.list_field in response):
+                return response, None, streamed
+            records = response.get(self.list_field) or []
+            sync_cursor = sync_cursor or response.get("sync_cursor")
+            if self.replica is not None:
+                page_result = self.replica.reconcile_page(self.list_field, self.replica_user_id, records, protected_keys=protected_keys)
+                seen_keys.update(str(record.get(self.key_field)) for record in records if record.get(self.key_field) is not None)
+                max_updated_at = LocalReplica.next_cursor(None, records, max_updated_at)
+            else:
+                page_records = {str(record.get(self.key_field)): record for record in records if record.get(self.key_field) is not None}
+                page_result = ReconcileResult(page_records, list(page_records), [], is_delta=True)
+                if not stream:
+                    all_records.extend(records)
+            if stream:
+                progress_callback(page_result.records, None)
+                streamed = True
+            elif self.replica is not None:
+                accumulated.records.update(page_result.records)
+                accumulated.changed_keys.extend(page_result.changed_keys)
+
+        if self.replica is None:
+            return ({"success": True, self.list_field: all_records}, None, False) if not stream else (response, None, True)
+        accumulated.removed_keys.extend(self.replica.finish_full_sync(
+            self.list_field, self.replica_user_id, seen_keys, protected_keys=protected_keys,
+            sync_cursor=sync_cursor or max_updated_at
+        ))
+        print(f"LocalReplica: {self.list_field} sincronizados ({len(accumulated.changed_keys)} alterados, {len(accumulated.removed_keys)} removidos).")
+        return response, accumulated, streamed
+
+    def _protected_keys(self) -> Optional[Set[str]]:
+        return self.protected_keys_fn() if self.protected_keys_fn else None
+
+    def _is_delta_response(self, response: Any) -> bool:
+        return (isinstance(response, dict) and bool(response.get("success"))
+                and self.list_field in response and "deleted" in response)
+
+    @staticmethod
+    def _full_resync_due(full_synced_at: Optional[str]) -> bool:
+        if not full_synced_at:
+            return True
+        try:
+            last_full = datetime.datetime.fromisoformat(full_synced_at)
+        except ValueError:
+            return True
+        age = datetime.datetime.now(datetime.timezone.utc) - last_full
+        return age > datetime.timedelta(hours=DELTA_SYNC_FULL_RESYNC_HOURS)
+
+    def invalidate(self):
+        """Marca a coleção como desatualizada e volta a baixá-la (ex: após uma criação sem chave conhecida)."""
+        self._synced = False
+        self.refresh()
+
+    def _on_page_loaded(self, generation: int, records: Dict[str, Dict[str, Any]]):
+        """Página da primeira carga: acrescenta os registos e notifica já, sem esperar pelas páginas seguintes."""
+        if generation != self._generation or not records:
+            return
+        for key, record in records.items():
+            previous = self._items.get(key)
+            if previous is not None:
+                self._unindex(previous)
+            self._items[key] = record
+            self._index_record(record)
+        self.items_added.emit(list(records))
+        self.changed.emit()
+
+    def _on_all_fetched(self, generation: int, response: Any, reconciled: Optional[ReconcileResult] = None,
+                        streamed: bool = False):
+        if generation != self._generation:
+            return
+        self._loading = False
+        self._load_worker = None
+        self.loading_changed.emit(False)
+        if response and isinstance(response, dict) and response.get("success"):
+            self._synced = True
+            if streamed: # As páginas já estão em memória (_on_page_loaded); falta só o que a réplica removeu
+                if reconciled is not None and reconciled.has_changes:
+                    self._apply_reconciled(reconciled)
+                self._loaded = True
+                print(f"EntityStore: {len(self._items)} {self.entity_name} em memória.")
+                self.loaded.emit()
+            elif reconciled is not None and self._loaded:
+                self._apply_reconciled(reconciled)
+            else:
+                records = response.get(self.list_field) or []
+                self._items = {str(record.get(self.key_field)): record for record in records if record.get(self.key_field) is not None}
+                self._rebuild_index()
+                was_loaded = self._loaded
+                self._loaded = True
+                print(f"EntityStore: {len(self._items)} {self.entity_name} em memória.")
+                self.reset.emit()
+                self.changed.emit()
+                if not was_loaded:
+                    self.loaded.emit()
+        else:
+            msg = f"Não foi possível buscar {self.entity_name} do servidor."
+            if isinstance(response, dict) and response.get("message"):
+                msg = response.get("message")
+            if self._items and not self._loaded:
+                # Falhou a meio da primeira carga: as páginas já recebidas continuam utilizáveis
+                self._loaded = True
+                self.loaded.emit()
+            if self._loaded:
+                print(f"EntityStore: Sincronização de {self.entity_name} falhou; mantendo a cópia local. {msg}")
+                self.sync_failed.emit(msg)
+            else:
+                print(f"EntityStore: Falha ao carregar {self.entity_name}: {msg}")
+                self.load_failed.emit(msg)
+        if self._reload_pending:
+            self._reload_pending = False
+            self.refresh()
+
+    def _apply_reconciled(self, reconciled: ReconcileResult):
+        """Aplica o resultado da sincronização sobre a cópia já exibida (aberta da réplica local)."""
+        if not reconciled.has_changes:
+            print(f"EntityStore: {self.entity_name} já estavam atualizados na réplica local.")
+            return
+        if len(reconciled.changed_keys) + len(reconciled.removed_keys) > MAX_INCREMENTAL_SYNC_CHANGES:
+            if reconciled.is_delta: # 'records' só tem os alterados: aplica-os sobre a cópia atual
+                for key in reconciled.removed_keys:
+                    self._items.pop(key, None)
+                for key in reconciled.changed_keys:
+                    self._items[key] = reconciled.records[key]
+            else:
+                self._items = dict(reconciled.records)
+            self._rebuild_index()
+            self.reset.emit()
+            self.changed.emit()
+            return
+        for key in reconciled.removed_keys:
+            record = self._items.pop(key, None)
+            if record is not None:
+                self._unindex(record)
+                self.item_removed.emit(key)
+        for key in reconciled.changed_keys:
+            previous = self._items.get(key)
+            if previous is not None:
+                self._unindex(previous)
+            self._items[key] = reconciled.records[key]
+            self._index_record(reconciled.records[key])
+            self.item_changed.emit(key)
+        self.changed.emit()
+
+    def refresh_item(self, key: str, on_done: Optional[Callable[[bool], None]] = None):
+        """Busca um único registo (após uma edição) e atualiza-o na coleção."""
+        generation = self._generation
+        def handle_response(response):
+            if generation != self._generation:
+                return
+            ok = bool(response and isinstance(response, dict) and response.get("success") and self.item_field in response)
+            if ok:
+                self.upsert(response[self.item_field])
+            else:
+                print(f"EntityStore: Não foi possível atualizar {self.entity_name} '{key}'; recarregando a lista.")
+                self.invalidate()
+            if on_done:
+                on_done(ok)
+        self.task_runner.run(
+            self._fetch_one, key,
+            on_result=handle_response,
+            on_error=lambda msg: handle_response({"success": False, "message": msg}),
+            key=f"item:{key}"
+        )
+
+    # --- Alterações locais (após sucesso na API) ---
+
+    def upsert(self, record: Dict[str, Any]):
+        key = record.get(self.key_field)
+        if key is None:
+            return
+        previous = self._items.get(str(key))
+        if previous is not None:
+            self._unindex(previous)
+        self._items[str(key)] = record
+        self._index_record(record)
+        if self.replica is not None:
+            self.replica.upsert(self.list_field, self.replica_user_id, record)
+        self.item_changed.emit(str(key))
+        self.changed.emit()
+
+    def remove(self, key: str):
+        record = self._items.pop(str(key), None)
+        if record is not None:
+            self._unindex(record)
+            if self.replica is not None:
+                self.replica.delete(self.list_field, self.replica_user_id, str(key))
+            self.item_removed.emit(str(key))
+            self.changed.emit()
+
+    def remove_where(self, predicate: Callable[[Dict[str, Any]], bool]):
+        for key in [k for k, record in self._items.items() if predicate(record)]:
+            self.remove(key)
+
+    def clear(self):
+        self._generation += 1
+        self.task_runner.cancel_all()
+        self._items = {}
+        self._index = {}
+        self._loaded = False
+        self._synced = False
+        self._loading = False
+        self._reload_pending = False
+        self._load_worker = None
+        self.reset.emit()
+        self.changed.emit()
+
+    # --- Índice secundário ---
+
+    def _rebuild_index(self):
+        self._index = {}
+        for record in self._items.values():
+            self._index_record(record)
+
+    def _index_record(self, record: Dict[str, Any]):
+        if self.normalize_key is not None:
+            normalized = self.normalize_key(record.get(self.key_field))
+            if normalized:
+                self._index[normalized] = record
+
+    def _unindex(self, record: Dict[str, Any]):
+        if self.normalize_key is not None:
+            normalized = self.normalize_key(record.get(self.key_field))
+            if self._index.get(normalized) is record:
+                del self._index[normalized]
+
+
+class EntityStore(QObject):
+    """
+    Dados partilhados da sessão, criados pelo AppController após o login:
+    clientes (por CPF), processos (por process_id) e audiências (por hearing_id).
+    Com uma LocalReplica, as coleções abrem com a cópia local e sincronizam com a API em segundo plano;
+    com uma MutationOutbox, as alterações passam pelo write_behind (WriteBehindQueue).
+    """
+
+    def __init__(self, user_id: str, client_api_service, process_api_service, hearings_api_service,
+                 replica: Optional[LocalReplica] = None, outbox: Optional[MutationOutbox] = None,
+                 parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.user_id = user_id
+        self.clients = EntityCollection(
+            "clientes", "client_cpf", "clients", "client",
+            fetch_pages=lambda updated_since=None: client_api_service.iter_clients_by_user(
+                user_id, updated_since=updated_since, fields=CLIENT_LIST_FIELDS),
+            fetch_one=lambda cpf: client_api_service.get_client(user_id, cpf),
+            normalize_key=normalize_cpf, # Os processos podem guardar o CPF com outra formatação
+            replica=replica, replica_user_id=user_id,
+            parent=self
+        )
+        self.processes = EntityCollection(
+            "processos", "process_id", "processes", "process",
+            fetch_pages=lambda updated_since=None: process_api_service.iter_processes_by_user(
+                user_id, updated_since=updated_since, fields=PROCESS_LIST_FIELDS),
+            fetch_one=lambda process_id: process_api_service.get_process_details(user_id, process_id),
+            replica=replica, replica_user_id=user_id,
+            parent=self
+        )
+        self.hearings = EntityCollection(
+            "audiências", "hearing_id", "hearings", "hearing",
+            fetch_pages=lambda updated_since=None: hearings_api_service.iter_hearings_by_user(
+                user_id, updated_since=updated_since, fields=HEARING_LIST_FIELDS),
+            fetch_one=lambda hearing_id: hearings_api_service.get_hearing_details(user_id, hearing_id),
+            replica=replica, replica_user_id=user_id,
+            parent=self
+        )
+        # Alterações gravadas em segundo plano (outbox persistente); None = os diálogos chamam a API diretamente
+        self.write_behind = None
+        if outbox is not None:
+            self.write_behind = WriteBehindQueue(outbox, user_id, self, {
+                "clients": client_api_service, "processes": process_api_service, "hearings": hearings_api_service
+            }, parent=self)
+        print(f"EntityStore: Instanciado para user_id: {user_id} (réplica local: {'Sim' if replica else 'Não'}, outbox: {'Sim' if outbox else 'Não'})")
+
+    def collections(self) -> List[EntityCollection]:
+        return [self.clients, self.processes, self.hearings]
+
+    def pending_response(self, entity: str, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Versão local de uma entidade com alterações ainda na outbox (None se não houver ou sem outbox)."""
+        return self.write_behind.pending_response(entity, key) if self.write_behind is not None else None
+
+    def prefetch(self):
+        """
+        Dispara o carregamento de todas as coleções em paralelo (cada uma no seu worker do pool), com
+        prioridade de prefetch: a aba que as mostrar promove a sua coleção (ensure_loaded).
+        """
+        for collection in self.collections():
+            collection.ensure_loaded(PRIORITY_PREFETCH)
+
+    @Slot()
+    def clear(self):
+        if self.write_behind is not None:
+            self.write_behind.stop() # O que ficar por enviar continua na outbox para a próxima sessão
+        for collection in self.collections():
+            collection.clear()
@@ -3,11 +3,14 @@
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QFormLayout, QLineEdit, QTextEdit,
     QDialogButtonBox, QMessageBox, QPushButton, QComboBox, QLabel,
-    QApplication, QDateTimeEdit, QCompleter # QCalendarWidget removido, QCompleter adicionado
+    QDateTimeEdit, QCompleter, QWidget # QCalendarWidget removido, QCompleter adicionado
 )
 from PySide6.QtCore import Qt, Slot, QDateTime, QDate, QTime, QStringListModel 
 from typing import List, Dict, Optional, Any
 
+from .workers import BackgroundTaskRunner
+from services.scheduler import PRIORITY_INTERACTIVE
+
 class HearingFormDialog_pyside(QDialog):
     """
     Diálogo para adicionar ou editar uma audiência.
@@ -25,6 +28,7 @@ class HearingFormDialog_pyside(QDialog):
     def __init__(self, hearings_api_service, process_api_service, user_id: str, 
                  hearing_id_to_edit: Optional[str] = None, 
                  initial_process_id: Optional[str] = None, 
+                 entity_store=None,
                  parent=None):
         super().__init__(parent)
         self.hearings_api_service = hearings_api_service
@@ -33,8 +37,14 @@ class HearingFormDialog_pyside(QDialog):
         self.hearing_id_to_edit = hearing_id_to_edit
         self.hearing_data_to_edit: Optional[Dict[str, Any]] = None
         self.initial_process_id = initial_process_id
+        self.entity_store = entity_store # Se fornecido, a lista de processos vem do EntityStore (sem nova chamada à API)
+        self.saved_hearing_id: Optional[str] = None # ID gravado com sucesso (None se a API não o devolver)
+        self.saved_via_outbox = False # True se a alteração ficou na outbox (o EntityStore já foi atualizado)
         
         self.all_processes_cache: List[Dict[str, Any]] = [] 
+        self.processes_loaded = False
+        self._pending_process_id: Optional[str] = None # Pré-seleção aguardando a lista de processos
+        self.task_runner = BackgroundTaskRunner(self, busy_widget=self) # Chamadas à API fora da thread da GUI
 
         self.setWindowTitle("Adicionar Nova Audiência" if not self.hearing_id_to_edit else "Editar Audiência")
         self.setMinimumWidth(600)
@@ -47,8 +57,6 @@ class HearingFormDialog_pyside(QDialog):
 
         self.entries: Dict[str, QLineEdit | QTextEdit | QComboBox | QDateTimeEdit] = {}
 
-        self._fetch_processes_for_combobox()
-
         for config_item in HearingFormDialog_pyside.STATIC_HEARING_FIELDS_CONFIG:
             # Desempacotar corretamente os 6 elementos
             label_text, attr_name, WidgetClass, is_required, placeholder, widget_config = config_item
@@ -85,9 +93,9 @@ class HearingFormDialog_pyside(QDialog):
             self.entries[attr_name] = widget
             form_layout.addRow(label_widget, widget)
         
-        self._populate_processes_combobox()
-
-        main_layout.addLayout(form_layout)
+        self.form_container = QWidget() # Agrupa os campos para poderem ser bloqueados durante chamadas à API
+        self.form_container.setLayout(form_layout)
+        main_layout.addWidget(self.form_container)
         
         self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
         self.button_box.button(QDialogButtonBox.StandardButton.Ok).setText("Salvar Audiência")
@@ -98,33 +106,64 @@ class HearingFormDialog_pyside(QDialog):
 
         self.setLayout(main_layout)
 
+        self._fetch_processes_for_combobox()
+
         if self.hearing_id_to_edit:
             self.load_hearing_data_for_edit()
         elif self.initial_process_id: 
             self._preselect_process(self.initial_process_id)
 
     def _fetch_processes_for_combobox(self):
+        if self.entity_store is not None:
+            processes = self.entity_store.processes
+            def on_store_loaded():
+                if processes.is_loaded():
+                    self._on_processes_fetched({"success": True, "processes": processes.items()})
+                else:
+                    self._on_processes_fetched({"success": False, "message": "Não foi possível buscar a lista de processos."})
+            processes.when_loaded(on_store_loaded)
+            return
         print("HearingFormDialog: Buscando processos para ComboBox...")
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        try:
-            response = self.process_api_service.get_processes_by_user(self.user_id) 
-            if response and response.get("success") and "processes" in response:
-                self.all_processes_cache = sorted(
-                    response["processes"], 
-                    key=lambda p: p.get("numero_processo", "").lower()
-                ) 
-                print(f"HearingFormDialog: {len(self.all_processes_cache)} processos carregados para ComboBox.")
-            else:
-                self.all_processes_cache = []
-                msg = "Não foi possível buscar a lista de processos."
-                if response and isinstance(response, dict) and response.get("message"):
-                    msg = response.get("message")
-                QMessageBox.warning(self, "Erro ao Carregar Processos", msg)
-        except Exception as e:
+        self.task_runner.run(
+            self.process_api_service.get_processes_by_user, self.user_id,
+            on_result=self._on_processes_fetched,
+            on_error=self._on_processes_fetch_error,
+            key="fetch_processes"
+        )
+
+    @Slot(object)
+    def _on_processes_fetched(self, response):
+        if response and response.get("success") and "processes" in response:
+            self.all_processes_cache = sorted(
+                response["processes"], 
+                key=lambda p: p.get("numero_processo", "").lower()
+            ) 
+            print(f"HearingFormDialog: {len(self.all_processes_cache)} processos carregados para ComboBox.")
+        else:
             self.all_processes_cache = []
-            QMessageBox.critical(self, "Erro Crítico", f"Erro ao buscar processos para o formulário: {e}")
-        finally:
-            QApplication.restoreOverrideCursor()
+            msg = "Não foi possível buscar a lista de processos."
+            if response and isinstance(response, dict) and response.get("message"):
+                msg = response.get("message")
+            QMessageBox.warning(self, "Erro ao Carregar Processos", msg)
+        self.processes_loaded = True
+        self._populate_processes_combobox()
+        if self._pending_process_id:
+            self._preselect_process(self._pending_process_id)
+
+    @Slot(str)
+    def _on_processes_fetch_error(self, error_message: str):
+        self.all_processes_cache = []
+        QMessageBox.critical(self, "Erro Crítico", f"Erro ao buscar processos para o formulário: {error_message}")
+        self.processes_loaded = True
+        self._populate_processes_combobox()
+
+    def _set_form_busy(self, busy: bool, status_text: str = ""):
+        """Bloqueia o formulário enquanto uma chamada à API está em curso (a janela continua a responder)."""
+        self.form_container.setEnabled(not busy)
+        ok_button = self.button_box.button(QDialogButtonBox.StandardButton.Ok)
+        if ok_button:
+            ok_button.setEnabled(not busy)
+            ok_button.setText(status_text if busy and status_text else "Salvar Audiência")
 
     def _populate_processes_combobox(self):
         process_combo_box = self.entries.get("process_id")
@@ -151,6 +190,10 @@ class HearingFormDialog_pyside(QDialog):
         process_combo_box.setCompleter(completer)
 
     def _preselect_process(self, process_id_to_select: str):
+        if not self.processes_loaded:
+            # A lista ainda está a ser buscada; a seleção é aplicada em _on_processes_fetched
+            self._pending_process_id = process_id_to_select
+            return
         process_combo_box = self.entries.get("process_id")
         if isinstance(process_combo_box, QComboBox):
             for i in range(process_combo_box.count()):
@@ -161,12 +204,22 @@ class HearingFormDialog_pyside(QDialog):
     def load_hearing_data_for_edit(self):
         if not self.hearing_id_to_edit: return
         print(f"HearingFormDialog: Carregando dados para editar audiência ID {self.hearing_id_to_edit}")
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        try:
-            api_response = self.hearings_api_service.get_hearing_details(self.user_id, self.hearing_id_to_edit)
-        finally:
-            QApplication.restoreOverrideCursor()
-        
+        local_response = self.entity_store.pending_response("hearings", self.hearing_id_to_edit) if self.entity_store is not None else None
+        if local_response is not None: # Alterações ainda por enviar: a API teria a versão anterior
+            self._on_hearing_data_loaded(local_response)
+            return
+        self._set_form_busy(True, "A carregar...")
+        self.task_runner.run(
+            self.hearings_api_service.get_hearing_details, self.user_id, self.hearing_id_to_edit,
+            on_result=self._on_hearing_data_loaded,
+            on_error=lambda msg: self._on_hearing_data_loaded({"success": False, "message": f"Erro ao buscar dados da audiência: {msg}"}),
+            key="load_hearing",
+            priority=PRIORITY_INTERACTIVE
+        )
+
+    @Slot(object)
+    def _on_hearing_data_loaded(self, api_response):
+        self._set_form_busy(False)
         if api_response and api_response.get("success") and "hearing" in api_response: 
             self.hearing_data_to_edit = api_response["hearing"]
             
@@ -235,22 +288,38 @@ class HearingFormDialog_pyside(QDialog):
         if has_errors: return
 
         print(f"HearingFormDialog: Dados da audiência para API (payload): {hearing_data_payload}")
+
+        write_behind = self.entity_store.write_behind if self.entity_store is not None else None
+        if write_behind is not None:
+            self.saved_hearing_id = write_behind.submit("hearings", "update" if self.hearing_id_to_edit else "create",
+                                                        self.hearing_id_to_edit, hearing_data_payload)
+            self.saved_via_outbox = True
+            self.accept() # A API é atualizada em segundo plano (indicador de sincronização na janela principal)
+            return
         
-        api_response = None
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        try:
-            if self.hearing_id_to_edit:
-                print(f"HearingFormDialog: Chamando hearings_api_service.update_hearing para user: {self.user_id}, hearing_id: {self.hearing_id_to_edit}")
-                api_response = self.hearings_api_service.update_hearing(self.user_id, self.hearing_id_to_edit, hearing_data_payload)
-            else:
-                print(f"HearingFormDialog: Chamando hearings_api_service.add_hearing para user: {self.user_id}")
-                api_response = self.hearings_api_service.add_hearing(self.user_id, hearing_data_payload)
-        finally:
-            QApplication.restoreOverrideCursor()
+        if self.hearing_id_to_edit:
+            print(f"HearingFormDialog: Chamando hearings_api_service.update_hearing para user: {self.user_id}, hearing_id: {self.hearing_id_to_edit}")
+            save_call = (self.hearings_api_service.update_hearing, self.user_id, self.hearing_id_to_edit, hearing_data_payload)
+        else:
+            print(f"HearingFormDialog: Chamando hearings_api_service.add_hearing para user: {self.user_id}")
+            save_call = (self.hearings_api_service.add_hearing, self.user_id, hearing_data_payload)
+
+        self._set_form_busy(True, "A guardar...")
+        self.task_runner.run(
+            *save_call,
+            on_result=self._on_save_finished,
+            on_error=lambda msg: self._on_save_finished({"success": False, "message": f"Erro ao comunicar com a API de Audiências: {msg}"}),
+            key="save_hearing",
+            priority=PRIORITY_INTERACTIVE
+        )
 
+    @Slot(object)
+    def _on_save_finished(self, api_response):
+        self._set_form_busy(False)
         print(f"HearingFormDialog: Resposta da API: {api_response}")
         if api_response and api_response.get("success"):
             msg = api_response.get("message", f"Audiência {'atualizada' if self.hearing_id_to_edit else 'adicionada'} com sucesso!")
+            self.saved_hearing_id = self.hearing_id_to_edit or api_response.get("hearing_id") or (api_response.get("hearing") or {}).get("hearing_id")
             QMessageBox.information(self, "Sucesso", msg)
             self.accept() 
         else:
@@ -3,29 +3,37 @@
 from typing import Any, Dict, List, Optional
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
-    QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox,
-    QScrollArea, QTextBrowser, QApplication, QDialog, QSplitter,
+    QPushButton, QTableView, QHeaderView, QMessageBox,
+    QScrollArea, QTextBrowser, QDialog, QSplitter,
     QCalendarWidget
 )
-from PySide6.QtCore import Qt, Slot, QDate, QTime, QDateTime
+from PySide6.QtCore import Qt, Slot, QDate, QTime, QDateTime, QTimer
 from PySide6.QtGui import QFont, QColor, QTextCharFormat, QBrush
 import json
 import datetime
 
 from .hearing_form_dialog_pyside import HearingFormDialog_pyside
+from .workers import BackgroundTaskRunner
+from services.scheduler import PRIORITY_INTERACTIVE
+from .table_models import (
+    RecordTableModel, RecordFilterProxyModel, configure_record_table_view, selected_record_id
+)
 # from services.process_api_service import ProcessApiService 
 # from services.hearings_api_service import HearingsApiService
 
 class HearingsTab_pyside(QWidget):
-    def __init__(self, user_id: str, hearings_api_service, process_api_service, parent=None):
+    def __init__(self, user_id: str, hearings_api_service, process_api_service, entity_store, parent=None):
         super().__init__(parent)
         self.user_id = user_id
         self.hearings_api_service = hearings_api_service
         self.process_api_service = process_api_service 
+        self.entity_store = entity_store # Audiências e processos (rótulos) partilhados com as outras abas
         
         self.selected_hearing_id: Optional[str] = None
-        self.all_hearings_cache: List[Dict[str, Any]] = [] 
-        self.process_details_cache: Dict[str, Dict[str, Any]] = {} 
+        # Filtros atuais; aplicados localmente sobre as audiências do EntityStore
+        self._search_term: Optional[str] = None
+        self._date_filter: Optional[QDate] = None
+        self.task_runner = BackgroundTaskRunner(self, busy_widget=self) # Chamadas à API fora da thread da GUI
 
         print(f"HearingsTab_pyside: Instanciada com user_id: {self.user_id}")
 
@@ -43,6 +51,12 @@ class HearingsTab_pyside(QWidget):
         action_bar_layout.addWidget(add_hearing_btn)
         main_layout.addLayout(action_bar_layout)
 
+        # Indicador de carregamento (placeholder) exibido enquanto as audiências são buscadas
+        self.loading_label = QLabel("A carregar audiências...")
+        self.loading_label.setStyleSheet("color: #555; font-style: italic;")
+        self.loading_label.setVisible(False)
+        main_layout.addWidget(self.loading_label)
+
         self.splitter = QSplitter(Qt.Orientation.Horizontal)
 
         left_panel_widget = QWidget()
@@ -57,20 +71,31 @@ class HearingsTab_pyside(QWidget):
         left_panel_layout.addWidget(self.calendar_widget)
 
         self.show_all_hearings_button = QPushButton("Mostrar Todas as Audiências")
-        self.show_all_hearings_button.clicked.connect(self.load_all_hearings_from_api)
+        self.show_all_hearings_button.clicked.connect(self.show_all_hearings)
         left_panel_layout.addWidget(self.show_all_hearings_button)
         
-        self.hearings_table = QTableWidget()
-        self.hearings_table.setColumnCount(6) 
-        self.hearings_table.setHorizontalHeaderLabels(["ID", "Nº Processo", "Data e Hora", "Local", "Vara", "Tipo"])
+        # O ID da audiência fica no ID_ROLE; a coluna de data ordena pelo valor ISO, não pelo texto dd/MM/yyyy
+        self.hearings_model = RecordTableModel(
+            [
+                ("Nº Processo", lambda h: self._get_process_display_info(h.get("process_id")), None),
+                ("Data e Hora", lambda h: self._format_data_hora(h.get("data_hora", "N/A")), lambda h: str(h.get("data_hora") or "")),
+                ("Local", lambda h: h.get("local", "N/A"), None),
+                ("Vara", lambda h: h.get("vara", "N/A"), None),
+                ("Tipo", lambda h: h.get("tipo", "N/A"), None),
+            ],
+            id_field="hearing_id",
+            search_key_fn=self._hearing_search_key,
+            parent=self
+        )
+        self.hearings_proxy = RecordFilterProxyModel(self)
+        self.hearings_proxy.setSourceModel(self.hearings_model)
+
+        self.hearings_table = QTableView()
+        configure_record_table_view(self.hearings_table, self.hearings_proxy, sort_column=1)
         self.hearings_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.hearings_table.setColumnHidden(0, True) 
-        self.hearings_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Interactive) 
-        self.hearings_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents) 
-        self.hearings_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.hearings_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.hearings_table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
-        self.hearings_table.itemSelectionChanged.connect(self.on_hearing_selected_from_table)
+        self.hearings_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Interactive) 
+        self.hearings_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents) 
+        self.hearings_table.selectionModel().selectionChanged.connect(self.on_hearing_selected_from_table)
         left_panel_layout.addWidget(self.hearings_table)
         
         self.splitter.addWidget(left_panel_widget)
@@ -102,54 +127,79 @@ class HearingsTab_pyside(QWidget):
         main_layout.addWidget(self.splitter)
         self.setLayout(main_layout)
 
+        # Vários eventos seguidos (delta sincronizado, páginas da primeira carga) recalculam o calendário uma só vez
+        self.calendar_highlight_timer = QTimer(self)
+        self.calendar_highlight_timer.setSingleShot(True)
+        self.calendar_highlight_timer.setInterval(0)
+        self.calendar_highlight_timer.timeout.connect(self._highlight_calendar_dates)
+
+        hearings = self.entity_store.hearings
+        hearings.reset.connect(self._apply_hearings_view)
+        hearings.items_added.connect(self._on_hearings_added)
+        hearings.item_changed.connect(self._on_hearing_changed)
+        hearings.item_removed.connect(self._on_hearing_removed)
+        hearings.loading_changed.connect(self.loading_label.setVisible)
+        hearings.load_failed.connect(self._on_hearings_load_error)
+        # Os rótulos "Nº Processo (Cliente)" vêm da lista de processos (uma única chamada, sem N+1)
+        self.entity_store.processes.changed.connect(self._refresh_process_labels)
+        self.entity_store.processes.ensure_loaded()
+
         self.load_all_hearings_from_api() 
 
+    @property
+    def all_hearings_cache(self) -> List[Dict[str, Any]]:
+        """Todas as audiências em memória (EntityStore), independentemente do filtro da tabela."""
+        return self.entity_store.hearings.items()
+
     def _get_process_display_info(self, process_id: str) -> str:
+        """Texto de exibição do processo, lido da lista de processos do EntityStore (sem chamadas por linha)."""
         if not process_id: return "Processo não associado"
-        if process_id in self.process_details_cache:
-            proc_info = self.process_details_cache[process_id]
+        proc_info = self.entity_store.processes.get(process_id)
+        if proc_info:
             client_name = proc_info.get('client_nome_completo', proc_info.get('client_cpf', 'N/A'))
             return f"{proc_info.get('numero_processo', 'N/P Desconhecido')} (Cliente: {client_name})"
+        return f"Processo ID: {process_id} (Detalhes não encontrados)"
 
-        print(f"HearingsTab: Buscando detalhes do processo ID {process_id} para exibição...")
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        try:
-            response = self.process_api_service.get_process_details(self.user_id, process_id)
-            if response and response.get("success") and "process" in response:
-                process_data = response["process"]
-                self.process_details_cache[process_id] = process_data 
-                client_name = process_data.get('client_nome_completo', process_data.get('client_cpf', 'N/A'))
-                return f"{process_data.get('numero_processo', 'N/P Desconhecido')} (Cliente: {client_name})"
-            else:
-                return f"Processo ID: {process_id} (Detalhes não encontrados)"
-        except Exception as e:
-            print(f"Erro ao buscar detalhes do processo {process_id}: {e}")
-            return f"Processo ID: {process_id} (Erro ao buscar detalhes)"
-        finally:
-            QApplication.restoreOverrideCursor()
-
-    def _populate_hearings_table(self, hearings_data: List[Dict[str, Any]]):
-        self.hearings_table.setRowCount(0)
-        self.hearings_table.setSortingEnabled(False)
-        for row, hearing_item in enumerate(hearings_data):
-            self.hearings_table.insertRow(row)
-            self.hearings_table.setItem(row, 0, QTableWidgetItem(str(hearing_item.get("hearing_id", "N/A"))))
-            
-            process_display_text = self._get_process_display_info(hearing_item.get("process_id"))
-            self.hearings_table.setItem(row, 1, QTableWidgetItem(process_display_text))
-            
-            data_hora_str = hearing_item.get("data_hora", "N/A")
-            display_data_hora = data_hora_str
-            try: 
-                dt_obj = QDateTime.fromString(data_hora_str, Qt.DateFormat.ISODate)
-                if dt_obj.isValid(): display_data_hora = dt_obj.toString("dd/MM/yyyy HH:mm")
-            except: pass 
-            self.hearings_table.setItem(row, 2, QTableWidgetItem(display_data_hora))
-            
-            self.hearings_table.setItem(row, 3, QTableWidgetItem(hearing_item.get("local", "N/A")))
-            self.hearings_table.setItem(row, 4, QTableWidgetItem(hearing_item.get("vara", "N/A")))
-            self.hearings_table.setItem(row, 5, QTableWidgetItem(hearing_item.get("tipo", "N/A")))
-        self.hearings_table.setSortingEnabled(True)
+    @Slot()
+    def _refresh_process_labels(self):
+        if self.hearings_model.rowCount():
+            self.hearings_model.refresh_columns([0])
+
+    @staticmethod
+    def _format_data_hora(data_hora_str: str) -> str:
+        try: 
+            dt_obj = QDateTime.fromString(data_hora_str, Qt.DateFormat.ISODate)
+            if dt_obj.isValid(): return dt_obj.toString("dd/MM/yyyy HH:mm")
+        except: pass 
+        return data_hora_str
+
+    def _hearing_search_key(self, hearing: Dict[str, Any]) -> str:
+        """Texto de busca pré-calculado (local, tipo, vara e processo), em minúsculas."""
+        return "\n".join((
+            str(hearing.get("local", "")), str(hearing.get("tipo", "")), str(hearing.get("vara", "")),
+            self._get_process_display_info(hearing.get("process_id", ""))
+        )).lower()
+
+    def _populate_hearings_table(self, hearings_data: List[Dict[str, Any]], search_term: Optional[str] = None):
+        previous_hearing_id = self.selected_hearing_id
+        selection_model = self.hearings_table.selectionModel()
+        selection_model.blockSignals(True) # Evita limpar a seleção/detalhes durante o repovoamento
+        self.hearings_model.set_records(hearings_data)
+        if search_term: # Filtro de busca local (o proxy compara com a chave pré-calculada de cada linha)
+            search_lower = search_term.lower()
+            self.hearings_proxy.set_filter_function(lambda search_key: search_lower in search_key)
+        else:
+            self.hearings_proxy.set_filter_function(None)
+        selection_model.blockSignals(False)
+
+        # Mantém a audiência selecionada se ela continuar na lista (ex: após edição)
+        if previous_hearing_id:
+            proxy_row = self.hearings_proxy.proxy_row_for_id(previous_hearing_id)
+            if proxy_row >= 0:
+                self.hearings_table.selectRow(proxy_row)
+                return
+
+        self.selected_hearing_id = None
         self.clear_hearing_details_display()
         self.edit_hearing_btn.setEnabled(False)
         self.delete_hearing_btn.setEnabled(False)
@@ -237,50 +287,71 @@ class HearingsTab_pyside(QWidget):
 
 
     def load_all_hearings_from_api(self, search_term: Optional[str] = None, date_filter: Optional[QDate] = None):
+        """Aplica o termo de busca / a data às audiências do EntityStore (baixadas uma vez por sessão)."""
         print(f"HearingsTab: load_all_hearings_from_api. User ID: {self.user_id}, Busca: '{search_term}', Data: {date_filter.toString('yyyy-MM-dd') if date_filter else 'N/A'}")
         if not self.user_id:
             QMessageBox.critical(self, "Erro Interno", "ID do utilizador não está disponível.")
             return
         
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        api_response = None
-        try:
-            start_date_str = date_filter.toString("yyyy-MM-dd") if date_filter else None
-            end_date_str = start_date_str 
-            
-            api_response = self.hearings_api_service.get_hearings_by_user(self.user_id, start_date=start_date_str, end_date=end_date_str)
-        except Exception as e:
-            print(f"Erro ao chamar API para buscar audiências: {e}")
-            QMessageBox.critical(self, "Erro de API", f"Erro ao buscar audiências: {e}")
-            self.all_hearings_cache = [] # Limpa cache em caso de erro de API
-        finally:
-            QApplication.restoreOverrideCursor()
+        self._search_term = search_term
+        self._date_filter = date_filter
+        hearings = self.entity_store.hearings
+        if hearings.is_loaded():
+            self._apply_hearings_view()
+        self.loading_label.setVisible(hearings.is_loading())
+        hearings.ensure_loaded()
 
-        if api_response and api_response.get("success"):
-            self.all_hearings_cache = api_response.get("hearings", [])
-            print(f"HearingsTab: {len(self.all_hearings_cache)} audiências recebidas da API.")
-        elif api_response: # Se houve resposta, mas não sucesso
-            QMessageBox.warning(self, "Erro ao Carregar Audiências", 
-                                api_response.get("message", "Não foi possível buscar as audiências."))
-            self.all_hearings_cache = []
-        # Se api_response for None (devido a exceção), o cache não é alterado ou já foi limpo.
-            
-        filtered_for_display = self.all_hearings_cache
-        if date_filter: # Se filtrando por data, a API já deve ter filtrado.
-            pass # A API já filtrou por data
-        elif search_term: # Filtro de busca local se a API não suportar ou para refinar
-            search_lower = search_term.lower()
-            filtered_for_display = [
-                h for h in self.all_hearings_cache if
-                search_lower in h.get("local", "").lower() or
-                search_lower in h.get("tipo", "").lower() or
-                search_lower in h.get("vara", "").lower() or
-                search_lower in self._get_process_display_info(h.get("process_id","")).lower()
-            ]
-        
-        self._populate_hearings_table(filtered_for_display)
+    @Slot()
+    def show_all_hearings(self):
+        """Remove os filtros e volta a baixar as audiências do servidor."""
+        self.search_entry.blockSignals(True)
+        self.search_entry.clear()
+        self.search_entry.blockSignals(False)
+        self.load_all_hearings_from_api()
+        self.entity_store.hearings.refresh()
+
+    def _matches_date_filter(self, hearing: Dict[str, Any]) -> bool:
+        if not self._date_filter:
+            return True
+        return str(hearing.get("data_hora", "")).startswith(self._date_filter.toString("yyyy-MM-dd"))
+
+    @Slot()
+    def _apply_hearings_view(self):
+        hearings_data = [h for h in self.all_hearings_cache if self._matches_date_filter(h)]
+        # Com data selecionada, mostra todas as audiências do dia; senão o termo de busca filtra localmente
+        self._populate_hearings_table(hearings_data, None if self._date_filter else self._search_term)
         self._highlight_calendar_dates() 
 
+    @Slot(str)
+    def _on_hearing_changed(self, hearing_id: str):
+        hearing = self.entity_store.hearings.get(hearing_id)
+        if hearing is None: return
+        if self._matches_date_filter(hearing):
+            self.hearings_model.upsert_record(hearing)
+        else:
+            self.hearings_model.remove_record(hearing_id)
+        if hearing_id == self.selected_hearing_id:
+            self.display_hearing_details(hearing_id)
+        self.calendar_highlight_timer.start()
+
+    @Slot(list)
+    def _on_hearings_added(self, hearing_ids: List[str]):
+        """Página da primeira carga: acrescenta as audiências que passam no filtro de data atual."""
+        hearings = self.entity_store.hearings
+        page = [hearings.get(hid) for hid in hearing_ids if hid in hearings]
+        self.hearings_model.append_records([hearing for hearing in page if self._matches_date_filter(hearing)])
+        self.calendar_highlight_timer.start()
+
+    @Slot(str)
+    def _on_hearing_removed(self, hearing_id: str):
+        self.hearings_model.remove_record(hearing_id)
+        self.calendar_highlight_timer.start()
+
+    @Slot(str)
+    def _on_hearings_load_error(self, error_message: str):
+        self.loading_label.setVisible(False)
+        print(f"Erro ao buscar audiências: {error_message}")
+        QMessageBox.critical(self, "Erro de API", f"Erro ao buscar audiências: {error_message}")
 
     @Slot(QDate)
     def on_calendar_date_selected(self, date: QDate):
@@ -301,17 +372,14 @@ class HearingsTab_pyside(QWidget):
 
     @Slot() 
     def on_hearing_selected_from_table(self):
-        selected_items = self.hearings_table.selectedItems()
-        if selected_items:
-            selected_row = self.hearings_table.currentRow() 
-            hearing_id_item = self.hearings_table.item(selected_row, 0) 
-            if hearing_id_item and hearing_id_item.text() != "N/A":
-                self.selected_hearing_id = hearing_id_item.text()
-                print(f"HearingsTab: Audiência selecionada da tabela - ID {self.selected_hearing_id}")
-                self.display_hearing_details(self.selected_hearing_id)
-                self.edit_hearing_btn.setEnabled(True)
-                self.delete_hearing_btn.setEnabled(True)
-                return
+        selected_hearing_id = selected_record_id(self.hearings_table)
+        if selected_hearing_id and selected_hearing_id != "N/A":
+            self.selected_hearing_id = selected_hearing_id
+            print(f"HearingsTab: Audiência selecionada da tabela - ID {self.selected_hearing_id}")
+            self.display_hearing_details(self.selected_hearing_id)
+            self.edit_hearing_btn.setEnabled(True)
+            self.delete_hearing_btn.setEnabled(True)
+            return
         
         self.selected_hearing_id = None
         self.clear_hearing_details_display()
@@ -320,7 +388,7 @@ class HearingsTab_pyside(QWidget):
 
     def display_hearing_details(self, hearing_id_to_display: str):
         self.clear_hearing_details_display()
-        hearing_info = next((h for h in self.all_hearings_cache if h.get("hearing_id") == hearing_id_to_display), None)
+        hearing_info = self.hearings_model.record(self.hearings_model.row_for_id(hearing_id_to_display))
 
         if hearing_info:
             html_parts = ["<h3>Detalhes da Audiência:</h3><table width='100%' cellspacing='0' cellpadding='3' style='border-collapse: collapse;'>"]
@@ -356,10 +424,14 @@ class HearingsTab_pyside(QWidget):
             self.process_api_service, 
             self.user_id,
             initial_process_id=preselect_id,
+            entity_store=self.entity_store,
             parent=self
         )
-        if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_all_hearings_from_api()
+        if dialog.exec() == QDialog.DialogCode.Accepted and not dialog.saved_via_outbox:
+            if dialog.saved_hearing_id:
+                self.entity_store.hearings.refresh_item(dialog.saved_hearing_id)
+            else:
+                self.entity_store.hearings.invalidate() # A API não devolveu o ID: recarrega a lista uma vez
 
     def open_edit_hearing_dialog(self):
         if not self.selected_hearing_id:
@@ -372,17 +444,12 @@ class HearingsTab_pyside(QWidget):
             self.process_api_service, 
             self.user_id, 
             hearing_id_to_edit=self.selected_hearing_id, 
+            entity_store=self.entity_store,
             parent=self
         )
-        if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_all_hearings_from_api()
-            # Tenta manter a seleção ou recarregar os detalhes
-            if self.selected_hearing_id in [h.get('hearing_id') for h in self.all_hearings_cache]:
-                 self.display_hearing_details(self.selected_hearing_id)
-            else: # Audiência pode ter sido alterada de forma que não está mais no cache com mesmo ID, ou deletada
-                 self.clear_hearing_details_display()
-                 self.edit_hearing_btn.setEnabled(False)
-                 self.delete_hearing_btn.setEnabled(False)
+        if dialog.exec() == QDialog.DialogCode.Accepted and not dialog.saved_via_outbox:
+            # O EntityStore notifica item_changed; a linha e os detalhes são atualizados
+            self.entity_store.hearings.refresh_item(dialog.saved_hearing_id)
 
 
     def delete_selected_hearing(self):
@@ -390,7 +457,7 @@ class HearingsTab_pyside(QWidget):
             QMessageBox.warning(self, "Seleção Necessária", "Por favor, selecione uma audiência para remover.")
             return
         
-        hearing_info = next((h for h in self.all_hearings_cache if h.get("hearing_id") == self.selected_hearing_id), None)
+        hearing_info = self.hearings_model.record(self.hearings_model.row_for_id(self.selected_hearing_id))
         confirm_text = f"Tem certeza que deseja remover esta audiência?"
         if hearing_info:
             dt_display = hearing_info.get("data_hora", "Data desconhecida")
@@ -409,22 +476,34 @@ class HearingsTab_pyside(QWidget):
                                      QMessageBox.StandardButton.No)
         
         if reply == QMessageBox.StandardButton.Yes:
-            QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-            api_response = None
-            try:
-                api_response = self.hearings_api_service.delete_hearing(self.user_id, self.selected_hearing_id)
-            except Exception as e:
-                print(f"Erro ao chamar delete_hearing: {e}")
-                QMessageBox.critical(self, "Erro na Remoção", f"Erro ao tentar remover audiência: {e}")
-            finally:
-                QApplication.restoreOverrideCursor()
-
-            if api_response and api_response.get("success"):
+            self.delete_hearing_btn.setEnabled(False)
+            if self.entity_store.write_behind is not None:
+                self.entity_store.write_behind.submit("hearings", "delete", self.selected_hearing_id)
+                self._on_hearing_deleted(self.selected_hearing_id, {"success": True}, notify=False)
+                return
+            self.task_runner.run(
+                self.hearings_api_service.delete_hearing, self.user_id, self.selected_hearing_id,
+                on_result=lambda api_response, hid=self.selected_hearing_id: self._on_hearing_deleted(hid, api_response),
+                on_error=self._on_hearing_delete_error,
+                key="delete_hearing",
+                priority=PRIORITY_INTERACTIVE
+            )
+
+    @Slot(str)
+    def _on_hearing_delete_error(self, error_message: str):
+        print(f"Erro ao chamar delete_hearing: {error_message}")
+        self.delete_hearing_btn.setEnabled(self.selected_hearing_id is not None)
+        QMessageBox.critical(self, "Erro na Remoção", f"Erro ao tentar remover audiência: {error_message}")
+
+    def _on_hearing_deleted(self, hearing_id: str, api_response, notify: bool = True):
+        if api_response and api_response.get("success"):
+            if notify:
                 QMessageBox.information(self, "Sucesso", api_response.get("message", "Audiência removida com sucesso."))
-                self.load_all_hearings_from_api() 
-                self.clear_hearing_details_display() 
-                self.edit_hearing_btn.setEnabled(False) 
-                self.delete_hearing_btn.setEnabled(False)
-            elif api_response: 
-                error_msg = api_response.get("message", "Não foi possível remover a audiência via API.")
-                QMessageBox.critical(self, "Erro na Remoção", error_msg)
+            self.entity_store.hearings.remove(hearing_id)
+            self.clear_hearing_details_display() 
+            self.edit_hearing_btn.setEnabled(False) 
+            self.delete_hearing_btn.setEnabled(False)
+        elif api_response: 
+            self.delete_hearing_btn.setEnabled(self.selected_hearing_id is not None)
+            error_msg = api_response.get("message", "Não foi possível remover a audiência via API.")
+            QMessageBox.critical(self, "Erro na Remoção", error_msg)
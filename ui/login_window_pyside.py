@@ -6,6 +6,8 @@ from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QFont, QPalette, QColor
 
 from services.auth_service import AuthService # Mantém o mesmo serviço de autenticação
+from .workers import BackgroundTaskRunner
+from services.scheduler import PRIORITY_INTERACTIVE
 # Importaremos a RegisterWindow_pyside quando ela for criada
 # from .register_window_pyside import RegisterWindow_pyside
 
@@ -17,6 +19,7 @@ class LoginWindow(QWidget):
         # Acessa o auth_service através do app_controller
         # self.auth_service = AuthService() # Removido, usar self.app_controller.auth_service
         self.register_window_instance = None # Para manter uma referência à janela de registro
+        self.task_runner = BackgroundTaskRunner(self, busy_widget=self) # Login corre fora da thread da GUI
 
         self.setWindowTitle("Login - Sistema Advocacia")
         self.setMinimumSize(400, 400) # Aumentar um pouco a altura para o novo botão
@@ -111,10 +114,10 @@ class LoginWindow(QWidget):
         main_layout.addSpacerItem(QSpacerItem(20, 10, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Minimum)) # Espaço menor
 
         # Botão de Login
-        login_button = QPushButton("Login")
-        login_button.setObjectName("loginButton") # Aplicar ID para QSS
-        login_button.clicked.connect(self.attempt_login)
-        main_layout.addWidget(login_button)
+        self.login_button = QPushButton("Login")
+        self.login_button.setObjectName("loginButton") # Aplicar ID para QSS
+        self.login_button.clicked.connect(self.attempt_login)
+        main_layout.addWidget(self.login_button)
 
         # Linha divisória (opcional, para separar visualmente os botões)
         line = QFrame()
@@ -140,11 +143,27 @@ class LoginWindow(QWidget):
             QMessageBox.warning(self, "Erro de Login", "Por favor, insira usuário e senha.")
             return
 
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        # Usa o auth_service do app_controller
-        login_result = self.app_controller.auth_service.login(username, password)
-        QApplication.restoreOverrideCursor()
+        if self.task_runner.is_running("login"):
+            return # Evita submissões duplicadas (Enter + clique)
 
+        self._set_login_busy(True)
+        # Usa o auth_service do app_controller
+        self.task_runner.run(
+            self.app_controller.auth_service.login, username, password,
+            on_result=self._on_login_finished,
+            on_error=lambda msg: self._on_login_finished({"success": False, "message": f"Erro inesperado durante o login: {msg}"}),
+            key="login",
+            priority=PRIORITY_INTERACTIVE
+        )
+
+    def _set_login_busy(self, busy: bool):
+        self.login_button.setEnabled(not busy)
+        self.login_button.setText("A entrar..." if busy else "Login")
+        self.username_entry.setEnabled(not busy)
+        self.password_entry.setEnabled(not busy)
+
+    def _on_login_finished(self, login_result):
+        self._set_login_busy(False)
         if login_result.get("success"):
             user_data = login_result.get("user_data", {})
             self.app_controller.on_login_success(user_data)
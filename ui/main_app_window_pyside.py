@@ -1,4 +1,5 @@
 import os
+from typing import Callable, Dict, Optional, Tuple
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QTabWidget, QMessageBox, QFrame, QApplication,
@@ -35,6 +36,7 @@ class MainAppWindow(QMainWindow):
         self.client_api_service = self.app_controller.client_api_service 
         self.process_api_service = self.app_controller.process_api_service 
         self.hearings_api_service = self.app_controller.hearings_api_service # Novo serviço
+        self.entity_store = self.app_controller.entity_store # Dados partilhados entre as abas
 
         if hasattr(self.app_controller, 'update_service') and self.app_controller.update_service is not None:
             self.update_service = self.app_controller.update_service
@@ -99,6 +101,24 @@ class MainAppWindow(QMainWindow):
         header_layout.addWidget(welcome_label)
         header_layout.addStretch()
 
+        # Indicador das alterações ainda na outbox (gravadas em segundo plano)
+        self.sync_status_label = QLabel("")
+        self.sync_status_label.setVisible(False)
+        header_layout.addWidget(self.sync_status_label)
+        self.retry_sync_button = QPushButton("Tentar novamente")
+        self.retry_sync_button.setVisible(False)
+        header_layout.addWidget(self.retry_sync_button)
+        self.discard_sync_button = QPushButton("Descartar")
+        self.discard_sync_button.setVisible(False)
+        header_layout.addWidget(self.discard_sync_button)
+        write_behind = self.entity_store.write_behind if self.entity_store is not None else None
+        if write_behind is not None:
+            write_behind.status_changed.connect(self._on_sync_status_changed)
+            write_behind.mutation_failed.connect(self._on_mutation_failed)
+            self.retry_sync_button.clicked.connect(write_behind.retry_failed)
+            self.discard_sync_button.clicked.connect(self._confirm_discard_failed)
+            self._on_sync_status_changed(*write_behind.outbox.counts(write_behind.user_id))
+
         logout_button = QPushButton("Logout")
         logout_button.setFixedWidth(100)
         logout_button.clicked.connect(self.handle_logout)
@@ -140,20 +160,28 @@ class MainAppWindow(QMainWindow):
             QMessageBox.critical(self, "Erro Crítico de API", "Serviço de API de Audiências não inicializado.")
             return
             
+        # As abas são construídas na primeira ativação; até lá só existe um contentor vazio.
+        # Os dados de todas as abas já estão a ser baixados em paralelo pelo EntityStore (prefetch no login).
+        self.clients_tab: Optional[ClientsTab_pyside] = None
+        self.processes_tab: Optional[ProcessesTab_pyside] = None
+        self.hearings_tab: Optional[HearingsTab_pyside] = None
+        self._lazy_tabs: Dict[int, Tuple[str, Callable[[QWidget], QWidget]]] = {}
+
         # Aba de Clientes
-        print(f"MainAppWindow: Instanciando ClientsTab_pyside com user_id: {user_id_for_tabs}")
-        self.clients_tab = ClientsTab_pyside(user_id_for_tabs, self.client_api_service, self.tab_widget)
-        self.tab_widget.addTab(self.clients_tab, "Clientes")
+        self._add_lazy_tab("Clientes", "clients_tab", lambda container: ClientsTab_pyside(
+            user_id_for_tabs, self.client_api_service, self.entity_store, container))
 
         # Aba de Processos
-        print(f"MainAppWindow: Instanciando ProcessesTab_pyside com user_id: {user_id_for_tabs}")
-        self.processes_tab = ProcessesTab_pyside(user_id_for_tabs, self.process_api_service, self.client_api_service, self.hearings_api_service, self.tab_widget)
-        self.tab_widget.addTab(self.processes_tab, "Processos")
+        self._add_lazy_tab("Processos", "processes_tab", lambda container: ProcessesTab_pyside(
+            user_id_for_tabs, self.process_api_service, self.client_api_service, self.hearings_api_service, self.entity_store, container))
         
         # Aba de Audiências (Nova)
-        print(f"MainAppWindow: Instanciando HearingsTab_pyside com user_id: {user_id_for_tabs}")
-        self.hearings_tab = HearingsTab_pyside(user_id_for_tabs, self.hearings_api_service, self.process_api_service, self.tab_widget)
-        self.tab_widget.addTab(self.hearings_tab, "Audiências")
+        self._add_lazy_tab("Audiências", "hearings_tab", lambda container: HearingsTab_pyside(
+            user_id_for_tabs, self.hearings_api_service, self.process_api_service, self.entity_store, container))
+
+        self.tab_widget.currentChanged.connect(self._ensure_tab_built)
+        # A aba inicial é construída logo após a primeira pintura da janela
+        QTimer.singleShot(0, lambda: self._ensure_tab_built(self.tab_widget.currentIndex()))
         
         # Aba de Demandas (Placeholder)
         # self.demands_tab = PlaceholderTab("Demandas", parent=self.tab_widget) 
@@ -162,6 +190,25 @@ class MainAppWindow(QMainWindow):
         main_layout.addWidget(self.tab_widget)
         print("MainAppWindow: init_ui concluído com sucesso.")
 
+    def _add_lazy_tab(self, title: str, attr_name: str, factory: Callable[[QWidget], QWidget]):
+        container = QWidget(self.tab_widget)
+        container_layout = QVBoxLayout(container)
+        container_layout.setContentsMargins(0, 0, 0, 0)
+        index = self.tab_widget.addTab(container, title)
+        self._lazy_tabs[index] = (attr_name, factory)
+
+    @Slot(int)
+    def _ensure_tab_built(self, index: int):
+        lazy_tab = self._lazy_tabs.pop(index, None)
+        if lazy_tab is None:
+            return
+        attr_name, factory = lazy_tab
+        container = self.tab_widget.widget(index)
+        print(f"MainAppWindow: Construindo a aba '{self.tab_widget.tabText(index)}' na primeira ativação.")
+        tab = factory(container)
+        container.layout().addWidget(tab)
+        setattr(self, attr_name, tab)
+
     @Slot()
     def manual_update_check(self):
         if self.update_service:
@@ -176,9 +223,39 @@ class MainAppWindow(QMainWindow):
                           f"Versão: {CURRENT_APPLICATION_VERSION}\n\n"
                           "Desenvolvido por [Seu Nome/Empresa]") # Substitua pelo seu nome/empresa
 
+    @Slot(int, int)
+    def _on_sync_status_changed(self, pending: int, failed: int):
+        if failed:
+            self.sync_status_label.setText(f"{failed} alteração(ões) não gravada(s) no servidor")
+            self.sync_status_label.setStyleSheet("color: #B00020; font-weight: bold;")
+        elif pending:
+            self.sync_status_label.setText(f"{pending} alteração(ões) por sincronizar...")
+            self.sync_status_label.setStyleSheet("color: #555555;")
+        self.sync_status_label.setVisible(bool(pending or failed))
+        self.retry_sync_button.setVisible(bool(failed))
+        self.discard_sync_button.setVisible(bool(failed))
+
+    @Slot(str)
+    def _on_mutation_failed(self, message: str):
+        self.statusBar().showMessage(f"Alteração recusada pelo servidor: {message}", 10000)
+
+    def _confirm_discard_failed(self):
+        reply = QMessageBox.question(self, "Descartar Alterações",
+                                     "As alterações que o servidor recusou serão descartadas e os registos afetados "
+                                     "voltam à versão do servidor. Continuar?",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                     QMessageBox.StandardButton.No)
+        if reply == QMessageBox.StandardButton.Yes:
+            self.entity_store.write_behind.discard_failed()
+
     def handle_logout(self): 
+        pending = self.entity_store.write_behind.pending_count() if self.entity_store is not None and self.entity_store.write_behind is not None else 0
+        logout_question = "Tem certeza que deseja sair?"
+        if pending:
+            logout_question = (f"Há {pending} alteração(ões) ainda por sincronizar; serão enviadas no próximo login.\n\n"
+                               "Tem certeza que deseja sair?")
         reply = QMessageBox.question(self, "Logout",
-                                     "Tem certeza que deseja sair?",
+                                     logout_question,
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
                                      QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
@@ -1,15 +1,25 @@
 # process_form_dialog_pyside.py
 
+import logging
+
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QGridLayout, QLineEdit, QTextEdit, # QFormLayout removido, QGridLayout adicionado
     QDialogButtonBox, QMessageBox, QPushButton, QFileDialog,
-    QListWidget, QAbstractItemView, QComboBox, QLabel, QApplication,
-    QListWidgetItem, QCompleter, QSizePolicy # QSizePolicy adicionado
+    QListWidget, QAbstractItemView, QComboBox, QLabel,
+    QListWidgetItem, QCompleter, QSizePolicy, QWidget, QProgressBar # QSizePolicy adicionado
 )
 from PySide6.QtCore import Qt, Slot, QFileInfo, QRegularExpression, QStringListModel 
 from PySide6.QtGui import QRegularExpressionValidator 
 from typing import List, Dict, Optional, Any
 
+from .workers import BackgroundTaskRunner
+from services.scheduler import PRIORITY_INTERACTIVE
+from .entity_store import normalize_cpf
+from .write_behind import is_local_key
+from config.logging_setup import Redacted
+
+logger = logging.getLogger(__name__)
+
 class ProcessFormDialog_pyside(QDialog):
     """
     Diálogo para adicionar ou editar um processo jurídico,
@@ -34,15 +44,21 @@ class ProcessFormDialog_pyside(QDialog):
         ("Link do Processo (Tribunal):", "link_processo_externo", QLineEdit, False, "URL para consulta pública do processo", None)
     ]
 
-    def __init__(self, process_api_service, client_api_service, user_id: str, clients_list: List[Dict[str, str]], process_id_to_edit: Optional[str] = None, parent=None):
+    def __init__(self, process_api_service, client_api_service, user_id: str, clients_list: List[Dict[str, str]], process_id_to_edit: Optional[str] = None,
+                 entity_store=None, parent=None):
         super().__init__(parent)
         self.process_api_service = process_api_service
         self.client_api_service = client_api_service 
         self.user_id = user_id
         self.clients_list_data = clients_list 
+        self._client_combo_index_by_cpf: Dict[str, int] = {} # CPF normalizado -> índice no ComboBox
         self.process_id_to_edit = process_id_to_edit
         self.process_data_to_edit: Optional[Dict[str, Any]] = None
+        self.saved_process_id: Optional[str] = None # ID gravado com sucesso (None se a API não o devolver)
+        self.entity_store = entity_store # Com write_behind, gravações sem novos documentos ficam na outbox
+        self.saved_via_outbox = False # True se a alteração ficou na outbox (o EntityStore já foi atualizado)
         self.document_items_state: List[Dict[str, Any]] = [] 
+        self.task_runner = BackgroundTaskRunner(self, busy_widget=self) # Chamadas à API fora da thread da GUI
 
         self.setWindowTitle("Adicionar Novo Processo" if not self.process_id_to_edit else "Editar Processo")
         # Ajustar tamanhos mínimos conforme necessário, QGridLayout é mais flexível
@@ -83,6 +99,7 @@ class ProcessFormDialog_pyside(QDialog):
                     display_text = f"{client.get('nome_completo', 'Nome Desconhecido')} (CPF: {client.get('client_cpf', 'N/A')})"
                     widget.addItem(display_text, client.get('client_cpf'))
                     client_display_list.append(display_text)
+                    self._client_combo_index_by_cpf.setdefault(normalize_cpf(client.get('client_cpf')), widget.count() - 1)
                 
                 if not self.clients_list_data:
                     widget.setEnabled(False)
@@ -122,7 +139,9 @@ class ProcessFormDialog_pyside(QDialog):
             form_grid_layout.addWidget(widget, current_row, 1)
             current_row += 1
         
-        main_layout.addLayout(form_grid_layout)
+        self.form_container = QWidget() # Agrupa os campos para poderem ser bloqueados durante chamadas à API
+        self.form_container.setLayout(form_grid_layout)
+        main_layout.addWidget(self.form_container)
 
         docs_group_label = QLabel("<b>Documentos do Processo:</b>")
         docs_group_label.setToolTip("Anexe arquivos PDF relevantes para este processo.")
@@ -149,6 +168,12 @@ class ProcessFormDialog_pyside(QDialog):
         
         main_layout.addStretch(1) # Empurra os botões OK/Cancelar para baixo
 
+        # Progresso real (em bytes) do envio dos documentos; só visível durante um upload
+        self.upload_progress_bar = QProgressBar()
+        self.upload_progress_bar.setRange(0, 100)
+        self.upload_progress_bar.setVisible(False)
+        main_layout.addWidget(self.upload_progress_bar)
+
         self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
         self.button_box.button(QDialogButtonBox.StandardButton.Ok).setText("Salvar Processo")
         self.button_box.button(QDialogButtonBox.StandardButton.Cancel).setText("Cancelar")
@@ -161,16 +186,34 @@ class ProcessFormDialog_pyside(QDialog):
         if self.process_id_to_edit:
             self.load_process_data_for_edit()
 
+    def _set_form_busy(self, busy: bool, status_text: str = ""):
+        """Bloqueia o formulário enquanto uma chamada à API está em curso (a janela continua a responder)."""
+        self.form_container.setEnabled(not busy)
+        self.documents_list_widget.setEnabled(not busy)
+        ok_button = self.button_box.button(QDialogButtonBox.StandardButton.Ok)
+        if ok_button:
+            ok_button.setEnabled(not busy)
+            ok_button.setText(status_text if busy and status_text else "Salvar Processo")
+
     def load_process_data_for_edit(self):
-        # ... (código existente, sem alterações necessárias aqui para o layout) ...
         if not self.process_id_to_edit: return
         print(f"ProcessFormDialog: Carregando dados para editar processo ID {self.process_id_to_edit}")
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        try:
-            api_response = self.process_api_service.get_process_details(self.user_id, self.process_id_to_edit)
-        finally:
-            QApplication.restoreOverrideCursor()
-        
+        local_response = self.entity_store.pending_response("processes", self.process_id_to_edit) if self.entity_store is not None else None
+        if local_response is not None: # Alterações ainda por enviar: a API teria a versão anterior
+            self._on_process_data_loaded(local_response)
+            return
+        self._set_form_busy(True, "A carregar...")
+        self.task_runner.run(
+            self.process_api_service.get_process_details, self.user_id, self.process_id_to_edit,
+            on_result=self._on_process_data_loaded,
+            on_error=lambda msg: self._on_process_data_loaded({"success": False, "message": f"Erro ao buscar dados do processo: {msg}"}),
+            key="load_process",
+            priority=PRIORITY_INTERACTIVE
+        )
+
+    @Slot(object)
+    def _on_process_data_loaded(self, api_response):
+        self._set_form_busy(False)
         if api_response and api_response.get("success") and "process" in api_response:
             self.process_data_to_edit = api_response["process"]
             
@@ -184,11 +227,9 @@ class ProcessFormDialog_pyside(QDialog):
                     elif isinstance(widget, QTextEdit):
                         widget.setPlainText(str(value))
                     elif isinstance(widget, QComboBox) and attr_name == "client_cpf":
-                        client_cpf_to_select = str(value)
-                        for i in range(widget.count()):
-                            if widget.itemData(i) == client_cpf_to_select:
-                                widget.setCurrentIndex(i)
-                                break
+                        combo_index = self._client_combo_index_by_cpf.get(normalize_cpf(value), -1)
+                        if combo_index > 0:
+                            widget.setCurrentIndex(combo_index)
             
             self.documents_list_widget.clear()
             self.document_items_state.clear() 
@@ -298,20 +339,23 @@ class ProcessFormDialog_pyside(QDialog):
                 else: 
                     edited_text = widget.lineEdit().text().strip() if widget.lineEdit() else ""
                     if edited_text:
-                        found_in_model = False
-                        for i in range(self.client_completer_model.rowCount()):
-                            model_text = self.client_completer_model.data(self.client_completer_model.index(i, 0), Qt.ItemDataRole.DisplayRole)
-                            if edited_text.lower() in model_text.lower(): 
-                                original_combo_index = -1
-                                for cb_idx in range(widget.count()):
-                                    if widget.itemText(cb_idx) == model_text:
-                                        original_combo_index = cb_idx
-                                        break
-                                if original_combo_index > 0:
-                                    cpf_data = widget.itemData(original_combo_index)
+                        # CPF digitado (com ou sem pontuação): consulta direta no índice
+                        typed_cpf_index = -1
+                        if not any(ch.isalpha() for ch in edited_text):
+                            typed_cpf_index = self._client_combo_index_by_cpf.get(normalize_cpf(edited_text), -1)
+                        found_in_model = typed_cpf_index > 0
+                        if found_in_model:
+                            value_str = str(widget.itemData(typed_cpf_index))
+                            widget.setCurrentIndex(typed_cpf_index)
+                        else:
+                            edited_lower = edited_text.lower()
+                            for i, model_text in enumerate(self.client_completer_model.stringList()):
+                                if edited_lower in model_text.lower(): 
+                                    # O completer foi preenchido na mesma ordem do ComboBox (que tem "Selecione..." na posição 0)
+                                    cpf_data = widget.itemData(i + 1)
                                     if cpf_data:
                                         value_str = str(cpf_data)
-                                        widget.setCurrentIndex(original_combo_index) 
+                                        widget.setCurrentIndex(i + 1) 
                                         found_in_model = True
                                         break
                         if not found_in_model:
@@ -335,7 +379,7 @@ class ProcessFormDialog_pyside(QDialog):
                     final_document_metadata_for_api.append(item_state["original_data"]) 
             process_data_payload['documents'] = final_document_metadata_for_api
 
-        print(f"ProcessFormDialog: Dados do processo para API (payload): {process_data_payload}")
+        logger.debug("Dados do processo para a API: %s", Redacted(process_data_payload))
         
         files_data_for_api = [] 
         for item_state in self.document_items_state:
@@ -345,30 +389,68 @@ class ProcessFormDialog_pyside(QDialog):
                     if not file_info.exists():
                         QMessageBox.warning(self, "Arquivo Não Encontrado", f"O arquivo '{file_info.fileName()}' não foi encontrado e não será enviado.")
                         continue
-                    with open(file_info.absoluteFilePath(), 'rb') as f:
-                        files_data_for_api.append(
-                            ('process_documents', (file_info.fileName(), f.read(), 'application/pdf'))
-                        )
+                    if not file_info.isReadable():
+                        raise PermissionError("sem permissão de leitura")
+                    # Só o caminho: o serviço lê o ficheiro em blocos durante o envio (sem carregá-lo em memória)
+                    files_data_for_api.append(
+                        ('process_documents', (file_info.fileName(), file_info.absoluteFilePath(), 'application/pdf'))
+                    )
                 except Exception as e:
                     QMessageBox.critical(self, "Erro ao Ler Ficheiro", f"Não foi possível ler o ficheiro {file_info.fileName()}: {e}")
                     return 
         print(f"ProcessFormDialog: {len(files_data_for_api)} novos ficheiros preparados para envio.")
 
-        api_response = None
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        try:
-            if self.process_id_to_edit:
-                print(f"ProcessFormDialog: Chamando process_api_service.update_process para user: {self.user_id}, process_id: {self.process_id_to_edit}")
-                api_response = self.process_api_service.update_process(self.user_id, self.process_id_to_edit, process_data_payload, files_data_for_api if files_data_for_api else None)
-            else:
-                print(f"ProcessFormDialog: Chamando process_api_service.add_process para user: {self.user_id}")
-                api_response = self.process_api_service.add_process(self.user_id, process_data_payload, files_data_for_api if files_data_for_api else None)
-        finally:
-            QApplication.restoreOverrideCursor()
+        write_behind = self.entity_store.write_behind if self.entity_store is not None else None
+        if write_behind is not None and not files_data_for_api:
+            self.saved_process_id = write_behind.submit("processes", "update" if self.process_id_to_edit else "create",
+                                                        self.process_id_to_edit, process_data_payload)
+            self.saved_via_outbox = True
+            self.accept() # A API é atualizada em segundo plano (indicador de sincronização na janela principal)
+            return
+        # Documentos novos são enviados diretamente (streaming com progresso); não cabem na outbox
+        if files_data_for_api and is_local_key(self.process_id_to_edit):
+            QMessageBox.warning(self, "Processo Por Sincronizar",
+                                "Este processo ainda não foi gravado no servidor. Aguarde a sincronização para anexar documentos.")
+            return
+        # O envio direto leva o processo inteiro: não pode passar à frente (nem ficar atrás) de uma edição na outbox
+        if files_data_for_api and write_behind is not None and write_behind.has_pending("processes", self.process_id_to_edit):
+            QMessageBox.warning(self, "Processo Por Sincronizar",
+                                "Este processo tem alterações ainda não sincronizadas com o servidor. Aguarde a sincronização "
+                                "(ou resolva as alterações recusadas) para anexar documentos.")
+            return
+
+        if self.process_id_to_edit:
+            print(f"ProcessFormDialog: Chamando process_api_service.update_process para user: {self.user_id}, process_id: {self.process_id_to_edit}")
+            save_call = (self.process_api_service.update_process, self.user_id, self.process_id_to_edit, process_data_payload, files_data_for_api if files_data_for_api else None)
+        else:
+            print(f"ProcessFormDialog: Chamando process_api_service.add_process para user: {self.user_id}")
+            save_call = (self.process_api_service.add_process, self.user_id, process_data_payload, files_data_for_api if files_data_for_api else None)
+
+        self._set_form_busy(True, "A enviar documentos..." if files_data_for_api else "A guardar...")
+        self.upload_progress_bar.setValue(0)
+        self.upload_progress_bar.setVisible(bool(files_data_for_api))
+        self.task_runner.run(
+            *save_call,
+            on_result=self._on_save_finished,
+            on_progress=self._on_upload_progress if files_data_for_api else None,
+            on_error=lambda msg: self._on_save_finished({"success": False, "message": f"Erro ao comunicar com a API de Processos: {msg}"}),
+            key="save_process",
+            priority=PRIORITY_INTERACTIVE
+        )
+
+    def _on_upload_progress(self, bytes_sent: int, bytes_total: int):
+        percent = int(bytes_sent * 100 / bytes_total) if bytes_total else 100
+        self.upload_progress_bar.setValue(percent)
+        self.upload_progress_bar.setFormat(f"{percent}% ({bytes_sent / 1048576:.1f} de {bytes_total / 1048576:.1f} MB)")
 
-        print(f"ProcessFormDialog: Resposta da API: {api_response}")
+    @Slot(object)
+    def _on_save_finished(self, api_response):
+        self._set_form_busy(False)
+        self.upload_progress_bar.setVisible(False)
+        logger.debug("Resposta da API: %s", Redacted(api_response))
         if api_response and api_response.get("success"):
             msg = api_response.get("message", f"Processo {'atualizado' if self.process_id_to_edit else 'adicionado'} com sucesso!")
+            self.saved_process_id = self.process_id_to_edit or api_response.get("process_id") or (api_response.get("process") or {}).get("process_id")
             QMessageBox.information(self, "Sucesso", msg)
             self.accept() 
         else:
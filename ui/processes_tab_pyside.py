@@ -1,28 +1,54 @@
 # processes_tab_pyside.py
 
+import asyncio
 import datetime
-from typing import Dict, List, Optional
+import logging
+from typing import Any, Callable, Dict, List, Optional
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
-    QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox,
-    QScrollArea, QTextBrowser, QApplication, QDialog, QSplitter
+    QPushButton, QTableView, QHeaderView, QMessageBox,
+    QScrollArea, QTextBrowser, QDialog, QSplitter
 )
-from PySide6.QtCore import Qt, Slot, QDateTime 
+from PySide6.QtCore import Qt, Slot, QDateTime, QTimer
 from PySide6.QtGui import QFont
-import json
 
 from .process_form_dialog_pyside import ProcessFormDialog_pyside
 from .hearing_form_dialog_pyside import HearingFormDialog_pyside # Para agendar audiência
+from .workers import BackgroundTaskRunner
+from .entity_store import PROCESS_LIST_FIELDS
+from config.logging_setup import log_body
+from services.async_api import AsyncApiService
+from services.scheduler import PRIORITY_INTERACTIVE
+from .table_models import (
+    RecordTableModel, RecordFilterProxyModel, configure_record_table_view, selected_record_id
+)
+
+logger = logging.getLogger(__name__)
 
 class ProcessesTab_pyside(QWidget):
-    def __init__(self, user_id: str, process_api_service, client_api_service, hearings_api_service, parent=None): 
+    SEARCH_DEBOUNCE_MS = 300 # Intervalo sem digitação antes de enviar a busca ao servidor
+
+    def __init__(self, user_id: str, process_api_service, client_api_service, hearings_api_service, entity_store, parent=None): 
         super().__init__(parent)
         self.user_id = user_id
         self.process_api_service = process_api_service 
         self.client_api_service = client_api_service 
         self.hearings_api_service = hearings_api_service 
+        # Versões aguardáveis dos serviços (para buscar detalhes e audiências em paralelo)
+        self.async_process_api = AsyncApiService(process_api_service)
+        self.async_hearings_api = AsyncApiService(hearings_api_service)
+        self.entity_store = entity_store # Listas de processos/clientes partilhadas com as outras abas
         self.selected_process_id: Optional[str] = None
-        self.clients_cache: List[Dict[str, str]] = [] 
+        self._search_term = "" # Busca no servidor ativa; vazio = lista completa do EntityStore
+        self._search_generation = 0 # Incrementado a cada busca: só a resposta da mais recente é mostrada
+        self._displayed_process_id: Optional[str] = None # Processo cujos detalhes estão no painel (ou a ser carregados)
+        self.task_runner = BackgroundTaskRunner(self, busy_widget=self) # Chamadas à API fora da thread da GUI
+
+        # Debounce da busca: o pedido ao servidor só sai quando o utilizador para de digitar
+        self.search_debounce_timer = QTimer(self)
+        self.search_debounce_timer.setSingleShot(True)
+        self.search_debounce_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self.search_debounce_timer.timeout.connect(self.apply_processes_search)
         
         print(f"ProcessesTab_pyside: Instanciada com user_id: {self.user_id}")
 
@@ -36,23 +62,38 @@ class ProcessesTab_pyside(QWidget):
         action_bar_layout.addWidget(self.search_entry)
 
         add_process_btn = QPushButton("Adicionar Processo")
-        add_process_btn.clicked.connect(self.open_add_process_dialog)
+        add_process_btn.clicked.connect(lambda: self.open_add_process_dialog())
         action_bar_layout.addWidget(add_process_btn)
         main_layout.addLayout(action_bar_layout)
 
+        # Indicador de carregamento (placeholder) exibido enquanto a lista é buscada
+        self.loading_label = QLabel("A carregar processos...")
+        self.loading_label.setStyleSheet("color: #555; font-style: italic;")
+        self.loading_label.setVisible(False)
+        main_layout.addWidget(self.loading_label)
+
         self.splitter = QSplitter(Qt.Orientation.Horizontal)
 
-        self.processes_table = QTableWidget()
-        self.processes_table.setColumnCount(5) 
-        self.processes_table.setHorizontalHeaderLabels(["ID Processo", "Nº Processo", "Cliente", "Vara", "Fase Atual"])
+        # O ID do processo não é uma coluna: fica no ID_ROLE de cada linha do modelo
+        self.processes_model = RecordTableModel(
+            [
+                ("Nº Processo", lambda p: p.get("numero_processo", "N/A"), None),
+                ("Cliente", lambda p: self._client_display_name(p.get("client_cpf")), None),
+                ("Vara", lambda p: p.get("vara", "N/A"), None),
+                ("Fase Atual", lambda p: p.get("fase_atual", "N/A"), None),
+            ],
+            id_field="process_id",
+            parent=self
+        )
+        self.processes_proxy = RecordFilterProxyModel(self)
+        self.processes_proxy.setSourceModel(self.processes_model)
+
+        self.processes_table = QTableView()
+        configure_record_table_view(self.processes_table, self.processes_proxy, sort_column=0)
         self.processes_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.processes_table.setColumnHidden(0, True) 
-        self.processes_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Interactive) 
-        self.processes_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Interactive)
-        self.processes_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.processes_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.processes_table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
-        self.processes_table.itemSelectionChanged.connect(self.on_process_selected_from_table)
+        self.processes_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Interactive) 
+        self.processes_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Interactive)
+        self.processes_table.selectionModel().selectionChanged.connect(self.on_process_selected_from_table)
         self.splitter.addWidget(self.processes_table)
 
         self.process_details_area = QScrollArea()
@@ -63,7 +104,7 @@ class ProcessesTab_pyside(QWidget):
         details_content_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
 
         self.edit_process_btn = QPushButton("Editar Processo Selecionado")
-        self.edit_process_btn.clicked.connect(self.open_edit_process_dialog)
+        self.edit_process_btn.clicked.connect(lambda: self.open_edit_process_dialog())
         self.edit_process_btn.setEnabled(False)
         details_content_layout.addWidget(self.edit_process_btn)
 
@@ -92,46 +133,120 @@ class ProcessesTab_pyside(QWidget):
         main_layout.addWidget(self.splitter) 
         self.setLayout(main_layout)
 
-        self.fetch_clients_for_form() 
+        # Subscrição ao EntityStore: clientes (nomes na tabela e formulário) e processos (lista)
+        self.entity_store.clients.changed.connect(self._refresh_client_names_in_table)
+        processes = self.entity_store.processes
+        processes.reset.connect(self._on_processes_reset)
+        processes.items_added.connect(self._on_processes_added)
+        processes.item_changed.connect(self._on_process_changed)
+        processes.item_removed.connect(self._on_process_removed)
+        processes.loading_changed.connect(self._on_processes_loading_changed)
+        processes.load_failed.connect(self._on_processes_load_error)
+
+        self.entity_store.clients.ensure_loaded()
         self.load_processes_from_api() 
 
-    def fetch_clients_for_form(self):
-        print("ProcessesTab: Buscando lista de clientes para o formulário...")
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        try:
-            response = self.client_api_service.get_clients_by_user(self.user_id)
-            if response and response.get("success") and "clients" in response:
-                self.clients_cache = response["clients"]
-                print(f"ProcessesTab: {len(self.clients_cache)} clientes carregados para o formulário.")
-            else:
-                self.clients_cache = []
-                msg = "Não foi possível buscar a lista de clientes para o formulário."
-                if response and isinstance(response, dict) and response.get("message"): 
-                    msg = response.get("message")
-                QMessageBox.warning(self, "Erro ao Carregar Clientes", msg)
-        except Exception as e:
-            print(f"Erro em fetch_clients_for_form: {e}")
-            QMessageBox.critical(self, "Erro Crítico", f"Erro ao buscar clientes: {e}")
-        finally:
-            QApplication.restoreOverrideCursor()
+    @property
+    def clients_cache(self) -> List[Dict[str, Any]]:
+        """Lista de clientes do EntityStore (para o formulário e os nomes na tabela)."""
+        return self.entity_store.clients.items()
+
+    def fetch_clients_for_form(self, on_loaded: Optional[Callable[[], None]] = None):
+        """Garante a lista de clientes no EntityStore; 'on_loaded' é chamado na GUI quando estiver disponível."""
+        print("ProcessesTab: Garantindo lista de clientes para o formulário...")
+        if on_loaded:
+            self.entity_store.clients.when_loaded(on_loaded)
+        else:
+            self.entity_store.clients.ensure_loaded()
+
+    def _client_display_name(self, client_cpf: Optional[str]) -> Optional[str]:
+        # Índice por CPF normalizado do EntityStore: O(1) por linha em vez de varrer todos os clientes
+        found_client = self.entity_store.clients.lookup(client_cpf) if client_cpf else None
+        if found_client:
+            return found_client.get('nome_completo', client_cpf)
+        return client_cpf
+
+    @Slot()
+    def _refresh_client_names_in_table(self):
+        """Atualiza a coluna 'Cliente' quando a lista de clientes muda ou chega depois da lista de processos."""
+        if self.processes_model.rowCount():
+            self.processes_model.refresh_columns([1])
 
     def load_processes_from_api(self, search_term=""):
         print(f"ProcessesTab: load_processes_from_api. User ID: {self.user_id}, Busca: '{search_term}'")
-        self.processes_table.setRowCount(0)
         if not self.user_id:
             QMessageBox.critical(self, "Erro Interno", "ID do utilizador não está disponível para carregar processos.")
             return
         
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        api_response = None
-        try:
-            api_response = self.process_api_service.get_processes_by_user(self.user_id, search_term) 
-        except Exception as e:
-            print(f"Erro em load_processes_from_api ao chamar serviço: {e}")
-            QMessageBox.critical(self, "Erro de API", f"Erro ao buscar lista de processos: {e}")
-        finally:
-            QApplication.restoreOverrideCursor()
-        
+        self._search_term = search_term
+        self._search_generation += 1
+        generation = self._search_generation
+        if not search_term:
+            # Sem busca: a lista completa vem do EntityStore (baixada uma vez por sessão)
+            self.task_runner.cancel("load_processes")
+            processes = self.entity_store.processes
+            if processes.is_loaded():
+                self._populate_processes_table(processes.items())
+            self.loading_label.setVisible(processes.is_loading())
+            processes.ensure_loaded()
+            return
+
+        self.loading_label.setVisible(True)
+        # Uma nova busca substitui (cancela) a anterior ainda em curso; se a anterior já estiver no servidor,
+        # a resposta é descartada pela geração (mesmo que o sinal já esteja na fila da GUI)
+        self.task_runner.run(
+            self.process_api_service.get_processes_by_user, self.user_id, search_term, fields=PROCESS_LIST_FIELDS,
+            on_result=lambda api_response, gen=generation: self._on_processes_loaded(gen, api_response),
+            on_error=lambda msg, gen=generation: self._on_search_error(gen, msg),
+            key="load_processes"
+        )
+
+    @Slot()
+    def _on_processes_reset(self):
+        if not self._search_term:
+            self._populate_processes_table(self.entity_store.processes.items())
+
+    @Slot(list)
+    def _on_processes_added(self, process_ids: List[str]):
+        """Página da primeira carga: as linhas aparecem sem esperar pelo resto da lista."""
+        if self._search_term:
+            return # A tabela mostra o resultado de uma busca no servidor
+        processes = self.entity_store.processes
+        self.processes_model.append_records([processes.get(pid) for pid in process_ids if pid in processes])
+
+    @Slot(str)
+    def _on_process_changed(self, process_id: str):
+        process = self.entity_store.processes.get(process_id)
+        if process is None: return
+        # Durante uma busca no servidor, só atualiza linhas já presentes (um processo novo pode não corresponder)
+        if not self._search_term or self.processes_model.row_for_id(process_id) >= 0:
+            self.processes_model.upsert_record(process)
+        if process_id == self.selected_process_id:
+            self.display_process_details(process_id)
+
+    @Slot(str)
+    def _on_process_removed(self, process_id: str):
+        self.processes_model.remove_record(process_id)
+
+    @Slot(bool)
+    def _on_processes_loading_changed(self, loading: bool):
+        if not self._search_term:
+            self.loading_label.setVisible(loading)
+
+    @Slot(str)
+    def _on_processes_load_error(self, error_message: str):
+        self.loading_label.setVisible(False)
+        print(f"Erro em load_processes_from_api ao chamar serviço: {error_message}")
+        QMessageBox.critical(self, "Erro de API", f"Erro ao buscar lista de processos: {error_message}")
+
+    def _on_search_error(self, generation: int, error_message: str):
+        if generation == self._search_generation:
+            self._on_processes_load_error(error_message)
+
+    def _on_processes_loaded(self, generation: int, api_response):
+        if generation != self._search_generation:
+            return # Resposta de uma busca já substituída
+        self.loading_label.setVisible(False)
         all_processes_data = []
         if api_response and api_response.get("success") and "processes" in api_response:
             all_processes_data = api_response["processes"]
@@ -142,25 +257,23 @@ class ProcessesTab_pyside(QWidget):
              pass 
         else: 
              QMessageBox.warning(self, "Erro ao Carregar Processos", "Resposta inesperada ou falha de comunicação ao buscar processos.")
+        self._populate_processes_table(all_processes_data)
+
+    def _populate_processes_table(self, all_processes_data: List[Dict[str, Any]]):
+        previous_process_id = self.selected_process_id
+        selection_model = self.processes_table.selectionModel()
+        selection_model.blockSignals(True) # Evita limpar a seleção/detalhes durante o repovoamento
+        self.processes_model.set_records(all_processes_data)
+        selection_model.blockSignals(False)
+
+        # Mantém o processo selecionado se ele continuar na lista
+        if previous_process_id:
+            proxy_row = self.processes_proxy.proxy_row_for_id(previous_process_id)
+            if proxy_row >= 0:
+                self.processes_table.selectRow(proxy_row)
+                return
         
-        self.processes_table.setSortingEnabled(False)
-        for row, process_item in enumerate(all_processes_data):
-            self.processes_table.insertRow(row)
-            self.processes_table.setItem(row, 0, QTableWidgetItem(str(process_item.get("process_id", "N/A"))))
-            self.processes_table.setItem(row, 1, QTableWidgetItem(process_item.get("numero_processo", "N/A")))
-            
-            client_cpf_from_process = process_item.get("client_cpf")
-            client_display_name = client_cpf_from_process 
-            if client_cpf_from_process and self.clients_cache:
-                found_client = next((c for c in self.clients_cache if c.get('client_cpf') == client_cpf_from_process), None)
-                if found_client:
-                    client_display_name = found_client.get('nome_completo', client_cpf_from_process)
-            
-            self.processes_table.setItem(row, 2, QTableWidgetItem(client_display_name))
-            self.processes_table.setItem(row, 3, QTableWidgetItem(process_item.get("vara", "N/A")))
-            self.processes_table.setItem(row, 4, QTableWidgetItem(process_item.get("fase_atual", "N/A")))
-        self.processes_table.setSortingEnabled(True)
-        
+        self.selected_process_id = None
         self.clear_process_details_display()
         self.edit_process_btn.setEnabled(False)
         self.delete_process_btn.setEnabled(False)
@@ -168,23 +281,33 @@ class ProcessesTab_pyside(QWidget):
 
     @Slot()
     def filter_processes_display(self):
-        search_term = self.search_entry.text()
+        # Reinicia o debounce a cada tecla; limpar a busca volta logo à lista do EntityStore (sem pedido)
+        if self.search_entry.text().strip():
+            self.search_debounce_timer.start()
+        else:
+            self.apply_processes_search()
+
+    @Slot()
+    def apply_processes_search(self):
+        """Envia a busca atual ao servidor (parâmetro 'q'), a não ser que já seja a que está em curso ou mostrada."""
+        self.search_debounce_timer.stop()
+        search_term = self.search_entry.text().strip()
+        if search_term == self._search_term:
+            return
         self.load_processes_from_api(search_term)
 
     @Slot() 
     def on_process_selected_from_table(self):
-        selected_items = self.processes_table.selectedItems()
-        if selected_items:
-            selected_row = self.processes_table.currentRow() 
-            process_id_item = self.processes_table.item(selected_row, 0) 
-            if process_id_item and process_id_item.text() != "N/A":
-                self.selected_process_id = process_id_item.text()
-                print(f"ProcessesTab: Processo selecionado da tabela - ID {self.selected_process_id}")
+        selected_process_id = selected_record_id(self.processes_table)
+        if selected_process_id and selected_process_id != "N/A":
+            self.selected_process_id = selected_process_id
+            print(f"ProcessesTab: Processo selecionado da tabela - ID {self.selected_process_id}")
+            if self.selected_process_id != self._displayed_process_id:
                 self.display_process_details(self.selected_process_id)
-                self.edit_process_btn.setEnabled(True)
-                self.delete_process_btn.setEnabled(True)
-                self.schedule_hearing_btn.setEnabled(True) 
-                return
+            self.edit_process_btn.setEnabled(True)
+            self.delete_process_btn.setEnabled(True)
+            self.schedule_hearing_btn.setEnabled(True) 
+            return
         
         self.selected_process_id = None
         self.clear_process_details_display()
@@ -192,28 +315,52 @@ class ProcessesTab_pyside(QWidget):
         self.delete_process_btn.setEnabled(False)
         self.schedule_hearing_btn.setEnabled(False) 
 
+    async def _fetch_process_details_with_hearings(self, process_id: str):
+        """Executado no loop asyncio: detalhes do processo e as suas audiências, buscados em paralelo."""
+        logger.debug("A buscar detalhes e audiências do processo %s.", process_id)
+        process_api_response, hearings_api_response = await asyncio.gather(
+            self.async_process_api.get_process_details(self.user_id, process_id),
+            self.async_hearings_api.get_hearings_by_user(self.user_id, process_id=process_id)
+        )
+        # As audiências só são mostradas se os detalhes do processo foram carregados com sucesso
+        if not (process_api_response and process_api_response.get("success")):
+            hearings_api_response = None
+        else:
+            log_body(logger, "Audiências do processo %s: %s", hearings_api_response, process_id)
+        return process_api_response, hearings_api_response
+
     def display_process_details(self, process_id_to_display: str):
-        self.clear_process_details_display() 
-        print(f"DEBUG UI: Chamando display_process_details para ID: {process_id_to_display}")
-
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        process_api_response = None
-        hearings_api_response = None # Para armazenar a resposta das audiências
-        try:
-            process_api_response = self.process_api_service.get_process_details(self.user_id, process_id_to_display)
-            # Se os detalhes do processo foram carregados com sucesso, busca as audiências
-            if process_api_response and process_api_response.get("success"):
-                print(f"DEBUG UI: Buscando audiências para o processo ID: {process_id_to_display}")
-                hearings_api_response = self.hearings_api_service.get_hearings_by_user(self.user_id, process_id=process_id_to_display)
-                print(f"DEBUG UI - display_process_details - hearings_api_response: {json.dumps(hearings_api_response, indent=2, ensure_ascii=False)}")
-        except Exception as e:
-            print(f"DEBUG UI - Erro ao chamar APIs em display_process_details: {e}")
-            QMessageBox.critical(self, "Erro de API", f"Erro ao buscar dados: {e}")
-            self.details_display_browser.setHtml("<font color='red'>Erro ao buscar dados.</font>")
-            QApplication.restoreOverrideCursor()
+        logger.debug("display_process_details para o processo %s.", process_id_to_display)
+        self._displayed_process_id = process_id_to_display
+        self.details_display_browser.setHtml("<i>A carregar detalhes do processo...</i>")
+
+        local_response = self.entity_store.pending_response("processes", process_id_to_display)
+        if local_response is not None: # Alterações ainda por enviar: mostra a versão local
+            self.task_runner.cancel("process_details")
+            process_hearings = [hearing for hearing in self.entity_store.hearings.items()
+                                if hearing.get("process_id") == process_id_to_display]
+            self._render_process_details(process_id_to_display, local_response, {"success": True, "hearings": process_hearings})
             return
-        finally:
-            QApplication.restoreOverrideCursor()
+
+        # Cliques rápidos na tabela cancelam a busca anterior
+        self.task_runner.run_async(
+            self._fetch_process_details_with_hearings, process_id_to_display,
+            on_result=lambda responses, pid=process_id_to_display: self._render_process_details(pid, *responses),
+            on_error=lambda msg, pid=process_id_to_display: self._on_process_details_error(pid, msg),
+            key="process_details",
+            priority=PRIORITY_INTERACTIVE
+        )
+
+    def _on_process_details_error(self, process_id: str, error_message: str):
+        if process_id != self._displayed_process_id:
+            return
+        logger.warning("Erro ao buscar os detalhes do processo %s: %s", process_id, error_message)
+        QMessageBox.critical(self, "Erro de API", f"Erro ao buscar dados: {error_message}")
+        self.details_display_browser.setHtml("<font color='red'>Erro ao buscar dados.</font>")
+
+    def _render_process_details(self, process_id: str, process_api_response, hearings_api_response):
+        if process_id != self._displayed_process_id:
+            return # Resposta de uma seleção que já não está ativa
 
         html_parts = []
         if process_api_response and process_api_response.get("success") and "process" in process_api_response:
@@ -237,10 +384,10 @@ class ProcessesTab_pyside(QWidget):
                 value = process_info.get(attr_name)
                 if value is not None: 
                     display_value_str = str(value).replace('\t', ' ')
-                    if attr_name == "client_cpf" and self.clients_cache:
-                        client_found = next((c for c in self.clients_cache if c.get('client_cpf') == display_value_str), None)
-                        if client_found:
-                            display_value_str = f"{client_found.get('nome_completo', display_value_str)} (CPF: {display_value_str})"
+                    if attr_name == "client_cpf":
+                        client_name = self._client_display_name(display_value_str)
+                        if client_name != display_value_str:
+                            display_value_str = f"{client_name} (CPF: {display_value_str})"
                     
                     if attr_name in ["created_at", "updated_at"] and 'T' in display_value_str:
                         try:
@@ -314,32 +461,43 @@ class ProcessesTab_pyside(QWidget):
         self.details_display_browser.setHtml(final_details_html)
 
     def clear_process_details_display(self):
+        self._displayed_process_id = None
+        self.task_runner.cancel("process_details")
         self.details_display_browser.setHtml("Selecione um processo para ver os detalhes.")
 
-    def open_add_process_dialog(self):
+    def open_add_process_dialog(self, clients_just_fetched: bool = False):
         print("ProcessesTab: open_add_process_dialog chamado.")
         if not self.clients_cache: 
-            QMessageBox.information(self, "A Carregar Clientes", "A buscar lista de clientes para o formulário...")
-            self.fetch_clients_for_form()
-            if not self.clients_cache:
-                QMessageBox.warning(self, "Sem Clientes", "Não há clientes cadastrados para associar ao processo. Por favor, adicione um cliente primeiro.")
+            if not clients_just_fetched:
+                # Busca em segundo plano e reabre o diálogo quando a lista chegar
+                self.fetch_clients_for_form(on_loaded=lambda: self.open_add_process_dialog(clients_just_fetched=True))
                 return
+            QMessageBox.warning(self, "Sem Clientes", "Não há clientes cadastrados para associar ao processo. Por favor, adicione um cliente primeiro.")
+            return
 
-        dialog = ProcessFormDialog_pyside(self.process_api_service, self.client_api_service, self.user_id, self.clients_cache, parent=self)
-        if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_processes_from_api() 
+        dialog = ProcessFormDialog_pyside(self.process_api_service, self.client_api_service, self.user_id, self.clients_cache,
+                                          entity_store=self.entity_store, parent=self)
+        if dialog.exec() == QDialog.DialogCode.Accepted and not dialog.saved_via_outbox:
+            if dialog.saved_process_id:
+                self.entity_store.processes.refresh_item(dialog.saved_process_id)
+            else:
+                self.entity_store.processes.invalidate() # A API não devolveu o ID: recarrega a lista uma vez
 
-    def open_edit_process_dialog(self):
+    def open_edit_process_dialog(self, clients_just_fetched: bool = False):
         if not self.selected_process_id:
             QMessageBox.warning(self, "Seleção Necessária", "Por favor, selecione um processo na lista para editar.")
             return
         print(f"ProcessesTab: open_edit_process_dialog para ID {self.selected_process_id}")
-        if not self.clients_cache: self.fetch_clients_for_form() 
+        if not self.clients_cache and not clients_just_fetched:
+            self.fetch_clients_for_form(on_loaded=lambda: self.open_edit_process_dialog(clients_just_fetched=True))
+            return
 
-        dialog = ProcessFormDialog_pyside(self.process_api_service, self.client_api_service, self.user_id, self.clients_cache, process_id_to_edit=self.selected_process_id, parent=self)
-        if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_processes_from_api() 
-            self.display_process_details(self.selected_process_id) # Reexibe os detalhes atualizados
+        process_id_edited = self.selected_process_id
+        dialog = ProcessFormDialog_pyside(self.process_api_service, self.client_api_service, self.user_id, self.clients_cache, process_id_to_edit=process_id_edited,
+                                          entity_store=self.entity_store, parent=self)
+        if dialog.exec() == QDialog.DialogCode.Accepted and not dialog.saved_via_outbox:
+            # O EntityStore notifica item_changed; a linha e os detalhes são atualizados
+            self.entity_store.processes.refresh_item(process_id_edited)
 
     @Slot()
     def open_schedule_hearing_for_process_dialog(self):
@@ -353,14 +511,19 @@ class ProcessesTab_pyside(QWidget):
             self.process_api_service, # Passado para que HearingFormDialog possa buscar lista de processos se necessário
             self.user_id,
             initial_process_id=self.selected_process_id, 
+            entity_store=self.entity_store,
             parent=self
         )
         if dialog.exec() == QDialog.DialogCode.Accepted:
             # Após agendar uma audiência, atualiza os detalhes do processo para mostrar a nova audiência
             self.display_process_details(self.selected_process_id)
-            # Opcional: Notificar a aba de audiências para recarregar também
-            # if hasattr(self.parent(), 'hearings_tab') and self.parent().hearings_tab:
-            #     self.parent().hearings_tab.load_all_hearings_from_api()
+            # A aba de audiências é notificada pelo EntityStore
+            if dialog.saved_via_outbox:
+                pass # O EntityStore já tem a audiência (atualização otimista)
+            elif dialog.saved_hearing_id:
+                self.entity_store.hearings.refresh_item(dialog.saved_hearing_id)
+            else:
+                self.entity_store.hearings.invalidate()
 
 
     def delete_selected_process(self):
@@ -369,12 +532,10 @@ class ProcessesTab_pyside(QWidget):
             return
         print(f"ProcessesTab: delete_selected_process para ID {self.selected_process_id}")
 
-        current_row = self.processes_table.currentRow()
         numero_processo_confirm = self.selected_process_id 
-        if current_row >= 0:
-            item_num_proc = self.processes_table.item(current_row, 1) 
-            if item_num_proc:
-                numero_processo_confirm = item_num_proc.text()
+        source_row = self.processes_model.row_for_id(self.selected_process_id)
+        if source_row >= 0:
+            numero_processo_confirm = self.processes_model.record(source_row).get("numero_processo", numero_processo_confirm)
         
         confirm_msg = (f"Tem certeza que deseja remover o processo:\n"
                        f"Nº: {numero_processo_confirm} (ID: {self.selected_process_id})\n\n"
@@ -385,25 +546,40 @@ class ProcessesTab_pyside(QWidget):
                                      QMessageBox.StandardButton.No)
         
         if reply == QMessageBox.StandardButton.Yes:
-            QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-            api_response = None
-            try:
-                # A API de delete_process na Lambda deve ser ajustada para também deletar audiências associadas
-                api_response = self.process_api_service.delete_process(self.user_id, self.selected_process_id)
-            except Exception as e:
-                print(f"Erro ao chamar delete_process: {e}")
-                QMessageBox.critical(self, "Erro na Remoção", f"Erro ao tentar remover processo: {e}")
-            finally:
-                QApplication.restoreOverrideCursor()
-
-            if api_response and api_response.get("success"):
+            self.delete_process_btn.setEnabled(False)
+            if self.entity_store.write_behind is not None:
+                self.entity_store.write_behind.submit("processes", "delete", self.selected_process_id)
+                self._on_process_deleted(self.selected_process_id, {"success": True}, notify=False)
+                return
+            # A API de delete_process na Lambda deve ser ajustada para também deletar audiências associadas
+            self.task_runner.run(
+                self.process_api_service.delete_process, self.user_id, self.selected_process_id,
+                on_result=lambda api_response, pid=self.selected_process_id: self._on_process_deleted(pid, api_response),
+                on_error=self._on_process_delete_error,
+                key="delete_process",
+                priority=PRIORITY_INTERACTIVE
+            )
+
+    @Slot(str)
+    def _on_process_delete_error(self, error_message: str):
+        print(f"Erro ao chamar delete_process: {error_message}")
+        self.delete_process_btn.setEnabled(self.selected_process_id is not None)
+        QMessageBox.critical(self, "Erro na Remoção", f"Erro ao tentar remover processo: {error_message}")
+
+    def _on_process_deleted(self, process_id: str, api_response, notify: bool = True):
+        if api_response and api_response.get("success"):
+            if notify:
                 QMessageBox.information(self, "Sucesso", api_response.get("message", "Processo removido com sucesso."))
-                self.load_processes_from_api() 
-                self.clear_process_details_display() 
-                self.edit_process_btn.setEnabled(False) 
-                self.delete_process_btn.setEnabled(False)
-                self.schedule_hearing_btn.setEnabled(False)
-            elif api_response: 
-                error_msg = api_response.get("message", "Não foi possível remover o processo via API.")
-                QMessageBox.critical(self, "Erro na Remoção", error_msg)
+            self.selected_process_id = None
+            self.clear_process_details_display() 
+            self.edit_process_btn.setEnabled(False) 
+            self.delete_process_btn.setEnabled(False)
+            self.schedule_hearing_btn.setEnabled(False)
+            # A Lambda remove também as audiências do processo; o EntityStore reflete isso em todas as abas
+            self.entity_store.processes.remove(process_id)
+            self.entity_store.hearings.remove_where(lambda hearing: hearing.get("process_id") == process_id)
+        elif api_response: 
+            self.delete_process_btn.setEnabled(self.selected_process_id is not None)
+            error_msg = api_response.get("message", "Não foi possível remover o processo via API.")
+            QMessageBox.critical(self, "Erro na Remoção", error_msg)
 
@@ -5,6 +5,9 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont
 
+from .workers import BackgroundTaskRunner
+from services.scheduler import PRIORITY_INTERACTIVE
+
 # Importa AuthService diretamente se não for passado pelo app_controller,
 # ou acessa via app_controller como no exemplo de login.
 # Para consistência e melhor prática, vamos assumir que é acessado via app_controller.
@@ -15,6 +18,7 @@ class RegisterWindow_pyside(QDialog): # <--- NOME DA CLASSE CORRIGIDO
         super().__init__(parent)
         self.app_controller = app_controller
         # self.auth_service = AuthService() # Usar self.app_controller.auth_service
+        self.task_runner = BackgroundTaskRunner(self, busy_widget=self) # Registro corre fora da thread da GUI
 
         self.setWindowTitle("Criar Nova Conta - Sistema Advocacia")
         self.setMinimumSize(400, 380) # Ajustar altura se necessário
@@ -87,9 +91,9 @@ class RegisterWindow_pyside(QDialog): # <--- NOME DA CLASSE CORRIGIDO
 
         main_layout.addSpacerItem(QSpacerItem(20, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding))
 
-        register_button = QPushButton("Registrar")
-        register_button.clicked.connect(self.attempt_register)
-        main_layout.addWidget(register_button)
+        self.register_button = QPushButton("Registrar")
+        self.register_button.clicked.connect(self.attempt_register)
+        main_layout.addWidget(self.register_button)
 
         self.setLayout(main_layout)
 
@@ -118,13 +122,23 @@ class RegisterWindow_pyside(QDialog): # <--- NOME DA CLASSE CORRIGIDO
             QMessageBox.warning(self, "E-mail Inválido", "Por favor, insira um endereço de e-mail válido.")
             return
 
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        
-        # Acessa o auth_service através do app_controller
-        register_result = self.app_controller.auth_service.register(username, password, email)
-
-        QApplication.restoreOverrideCursor()
+        if self.task_runner.is_running("register"):
+            return
 
+        self.register_button.setEnabled(False)
+        self.register_button.setText("A registar...")
+        # Acessa o auth_service através do app_controller
+        self.task_runner.run(
+            self.app_controller.auth_service.register, username, password, email,
+            on_result=self._on_register_finished,
+            on_error=lambda msg: self._on_register_finished({"success": False, "message": f"Erro inesperado durante o registro: {msg}"}),
+            key="register",
+            priority=PRIORITY_INTERACTIVE
+        )
+
+    def _on_register_finished(self, register_result):
+        self.register_button.setEnabled(True)
+        self.register_button.setText("Registrar")
         if register_result.get("success"):
             QMessageBox.information(self, "Registro Bem-sucedido", register_result.get("message", "Conta criada com sucesso! Agora você pode fazer login."))
             self.accept() 
@@ -0,0 +1,364 @@
+# advocacia_app/ui/table_models.py
+
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from PySide6.QtCore import (
+    QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+)
+from PySide6.QtWidgets import QAbstractItemView, QTableView
+
+# Linhas amostradas pelas colunas em ResizeToContents (o padrão do Qt mede até 1000 linhas)
+RESIZE_CONTENTS_PRECISION = 100
+
+# (Título da coluna, função que gera o texto exibido, função opcional que gera a chave de ordenação)
+TableColumn = Tuple[str, Callable[[Dict[str, Any]], str], Optional[Callable[[Dict[str, Any]], Any]]]
+
+
+def portuguese_sort_key(text: Any) -> Tuple[str, str, str]:
+    """
+    Chave de ordenação alfabética em português, pré-calculada uma vez por célula.
+    Compara primeiro as letras base sem acento nem caixa ("Álvaro" junto de "alvaro",
+    "Conceição" antes de "Costa"), depois os acentos e por fim a caixa, como um collator.
+    """
+    text = str(text or "")
+    decomposed = unicodedata.normalize("NFD", text)
+    base = "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+    return (base, decomposed.casefold(), text)
+
+
+class RecordTableModel(QAbstractTableModel):
+    """
+    Modelo de tabela sobre uma lista de registos (dicts) da API.
+
+    Os textos exibidos e as chaves de ordenação são calculados uma vez em set_records()
+    e guardados em tuplos compactos; a view só pede os dados das linhas visíveis, logo
+    não há um QTableWidgetItem por célula. A ordenação reordena estes tuplos em Python
+    (list.sort com as chaves já prontas) em vez de comparar célula a célula via lessThan.
+    """
+    ID_ROLE = Qt.ItemDataRole.UserRole
+
+    def __init__(self, columns: Sequence[TableColumn], id_field: str,
+                 search_key_fn: Optional[Callable[[Dict[str, Any]], Any]] = None, parent=None):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self.id_field = id_field
+        self.search_key_fn = search_key_fn
+        self._records: List[Dict[str, Any]] = []
+        self._ids: List[str] = []
+        self._display: List[Tuple[str, ...]] = []
+        self._sort_keys: List[Tuple[Any, ...]] = []
+        self._search_keys: List[Any] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._sort_column = -1
+        self._sort_order = Qt.SortOrder.AscendingOrder
+
+    # --- Carregamento ---
+
+    def set_records(self, records: List[Dict[str, Any]]):
+        """Substitui todas as linhas (um único reset, em vez de uma inserção por linha)."""
+        self.beginResetModel()
+        self._records = list(records)
+        self._ids = [str(record.get(self.id_field, "")) for record in self._records]
+        self._display = [self._build_display(record) for record in self._records]
+        self._sort_keys = [self._build_sort_keys(record, display) for record, display in zip(self._records, self._display)]
+        self._search_keys = [self.search_key_fn(record) for record in self._records] if self.search_key_fn else []
+        if 0 <= self._sort_column < len(self.columns):
+            self._apply_sort(self._sort_column, self._sort_order)
+        self._rebuild_row_index()
+        self.endResetModel()
+
+    def upsert_record(self, record: Dict[str, Any]):
+        """
+        Atualiza a linha do registo (ou acrescenta-a) sem reconstruir o modelo. Com a tabela ordenada,
+        só esta linha muda de lugar (procura binária pela posição): nada de reordenar a tabela inteira.
+        """
+        record_id = str(record.get(self.id_field, ""))
+        row = self._row_by_id.get(record_id, -1)
+        if row >= 0:
+            self._update_row(row, record)
+            if 0 <= self._sort_column < len(self.columns):
+                self._move_to_sorted_position(row)
+            return
+        display = self._build_display(record)
+        sort_keys = self._build_sort_keys(record, display)
+        row = len(self._records)
+        if 0 <= self._sort_column < len(self.columns):
+            row = self._sorted_position(sort_keys[self._sort_column])
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._records.insert(row, record)
+        self._ids.insert(row, record_id)
+        self._display.insert(row, display)
+        self._sort_keys.insert(row, sort_keys)
+        if self.search_key_fn:
+            self._search_keys.insert(row, self.search_key_fn(record))
+        self._reindex(row, len(self._ids))
+        self.endInsertRows()
+
+    def _sorts_before(self, key: Any, other: Any) -> bool:
+        return key > other if self._sort_order == Qt.SortOrder.DescendingOrder else key < other
+
+    def _sorted_position(self, key: Any, skip_row: int = -1) -> int:
+        """
+        Posição (sem contar a linha 'skip_row') onde uma linha com esta chave fica na ordem atual:
+        depois das linhas com chave igual, como a ordenação estável faria.
+        """
+        column = self._sort_column
+        low, high = 0, len(self._sort_keys) - (1 if skip_row >= 0 else 0)
+        while low < high:
+            middle = (low + high) // 2
+            row = middle + 1 if 0 <= skip_row <= middle else middle
+            if self._sorts_before(key, self._sort_keys[row][column]):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def _move_to_sorted_position(self, row: int):
+        column = self._sort_column
+        key = self._sort_keys[row][column]
+        if (row == 0 or not self._sorts_before(key, self._sort_keys[row - 1][column])) and \
+                (row == len(self._sort_keys) - 1 or not self._sorts_before(self._sort_keys[row + 1][column], key)):
+            return # A chave não mudou de lugar (o caso comum: alterações noutros campos)
+        target = self._sorted_position(key, skip_row=row)
+        if target == row:
+            return
+        # beginMoveRows conta o destino antes de retirar a linha
+        if not self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), target + 1 if target > row else target):
+            return
+        rows = [self._records, self._ids, self._display, self._sort_keys]
+        if self._search_keys:
+            rows.append(self._search_keys)
+        for values in rows:
+            values.insert(target, values.pop(row))
+        self._reindex(min(row, target), max(row, target) + 1)
+        self.endMoveRows()
+
+    def _update_row(self, row: int, record: Dict[str, Any]):
+        """Substitui o registo de uma linha existente (sem reordenar)."""
+        display = self._build_display(record)
+        self._records[row], self._display[row] = record, display
+        self._sort_keys[row] = self._build_sort_keys(record, display)
+        if self._search_keys:
+            self._search_keys[row] = self.search_key_fn(record)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.columns) - 1))
+
+    def append_records(self, records: List[Dict[str, Any]]):
+        """
+        Acrescenta um lote de linhas com uma única inserção (páginas de um carregamento progressivo);
+        registos já presentes são atualizados no lugar.
+        """
+        new_records = []
+        for record in records:
+            row = self._row_by_id.get(str(record.get(self.id_field, "")), -1)
+            if row >= 0:
+                self._update_row(row, record) # Sem reordenar a cada registo: ordena-se uma vez no fim
+            else:
+                new_records.append(record)
+        if not records:
+            return
+        if new_records:
+            first_row = len(self._records)
+            self.beginInsertRows(QModelIndex(), first_row, first_row + len(new_records) - 1)
+            for row, record in enumerate(new_records, start=first_row):
+                record_id = str(record.get(self.id_field, ""))
+                display = self._build_display(record)
+                self._records.append(record)
+                self._ids.append(record_id)
+                self._display.append(display)
+                self._sort_keys.append(self._build_sort_keys(record, display))
+                if self.search_key_fn:
+                    self._search_keys.append(self.search_key_fn(record))
+                self._row_by_id[record_id] = row
+            self.endInsertRows()
+        if 0 <= self._sort_column < len(self.columns):
+            self.sort(self._sort_column, self._sort_order)
+
+    def remove_record(self, record_id: str):
+        row = self._row_by_id.get(str(record_id), -1)
+        if row < 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        for rows in (self._records, self._ids, self._display, self._sort_keys):
+            del rows[row]
+        if self._search_keys:
+            del self._search_keys[row]
+        del self._row_by_id[str(record_id)]
+        self._reindex(row, len(self._ids)) # Só as linhas a seguir à removida sobem uma posição
+        self.endRemoveRows()
+
+    def refresh_columns(self, column_numbers: Sequence[int]):
+        """Recalcula colunas cujo texto depende de dados externos (ex: nome do cliente que chegou depois)."""
+        if not self._records or not column_numbers:
+            return
+        for row, record in enumerate(self._records):
+            display = list(self._display[row])
+            sort_keys = list(self._sort_keys[row])
+            for col in column_numbers:
+                header, display_fn, sort_fn = self.columns[col]
+                display[col] = self._safe_display(display_fn, record)
+                sort_keys[col] = sort_fn(record) if sort_fn else portuguese_sort_key(display[col])
+            self._display[row] = tuple(display)
+            self._sort_keys[row] = tuple(sort_keys)
+            if self._search_keys: # A chave de busca pode incluir o texto destas colunas
+                self._search_keys[row] = self.search_key_fn(record)
+        for col in column_numbers:
+            self.dataChanged.emit(self.index(0, col), self.index(len(self._records) - 1, col),
+                                  [Qt.ItemDataRole.DisplayRole])
+        if self._sort_column in column_numbers:
+            self.sort(self._sort_column, self._sort_order)
+
+    def _build_display(self, record: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(self._safe_display(display_fn, record) for _, display_fn, _ in self.columns)
+
+    def _build_sort_keys(self, record: Dict[str, Any], display: Tuple[str, ...]) -> Tuple[Any, ...]:
+        return tuple(sort_fn(record) if sort_fn else portuguese_sort_key(text)
+                     for (_, _, sort_fn), text in zip(self.columns, display))
+
+    @staticmethod
+    def _safe_display(display_fn: Callable[[Dict[str, Any]], str], record: Dict[str, Any]) -> str:
+        value = display_fn(record)
+        return "N/A" if value is None else str(value)
+
+    def _rebuild_row_index(self):
+        self._row_by_id = {record_id: row for row, record_id in enumerate(self._ids)}
+
+    def _reindex(self, start: int, end: int):
+        for row in range(start, end):
+            self._row_by_id[self._ids[row]] = row
+
+    # --- Acesso às linhas ---
+
+    def record(self, row: int) -> Optional[Dict[str, Any]]:
+        return self._records[row] if 0 <= row < len(self._records) else None
+
+    def record_id(self, row: int) -> Optional[str]:
+        return self._ids[row] if 0 <= row < len(self._ids) else None
+
+    def row_for_id(self, record_id: Optional[str]) -> int:
+        return self._row_by_id.get(str(record_id), -1) if record_id is not None else -1
+
+    def search_key(self, row: int) -> Any:
+        return self._search_keys[row] if self._search_keys else None
+
+    def records(self) -> List[Dict[str, Any]]:
+        return self._records
+
+    # --- Interface QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._display)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole or role == Qt.ItemDataRole.ToolTipRole:
+            return self._display[index.row()][index.column()]
+        if role == self.ID_ROLE:
+            return self._ids[index.row()]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        # Não delega em super().headerData: algumas versões do PySide6 libertam None a mais nessa chamada
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.columns[section][0] if 0 <= section < len(self.columns) else None
+        return str(section + 1)
+
+    def sort(self, column: int, order=Qt.SortOrder.AscendingOrder):
+        """Reordena as linhas pelas chaves pré-calculadas, preservando seleção (índices persistentes)."""
+        if not (0 <= column < len(self.columns)):
+            return
+        self._sort_column, self._sort_order = column, order
+        self.layoutAboutToBeChanged.emit()
+        old_persistent = self.persistentIndexList()
+        order_rows = self._apply_sort(column, order)
+        self._rebuild_row_index()
+        new_row_of = {old_row: new_row for new_row, old_row in enumerate(order_rows)}
+        new_persistent = [self.index(new_row_of[idx.row()], idx.column()) for idx in old_persistent]
+        self.changePersistentIndexList(old_persistent, new_persistent)
+        self.layoutChanged.emit()
+
+    def _apply_sort(self, column: int, order) -> List[int]:
+        """Reordena as listas paralelas; retorna a permutação (linhas antigas pela nova ordem)."""
+        order_rows = sorted(range(len(self._records)), key=lambda row: self._sort_keys[row][column],
+                            reverse=(order == Qt.SortOrder.DescendingOrder))
+        self._records = [self._records[row] for row in order_rows]
+        self._ids = [self._ids[row] for row in order_rows]
+        self._display = [self._display[row] for row in order_rows]
+        self._sort_keys = [self._sort_keys[row] for row in order_rows]
+        if self._search_keys:
+            self._search_keys = [self._search_keys[row] for row in order_rows]
+        return order_rows
+
+
+class RecordFilterProxyModel(QSortFilterProxyModel):
+    """
+    Proxy de ordenação/filtro sobre um RecordTableModel.
+
+    - Ordenação: delegada ao modelo de origem (chaves pré-calculadas), para que o clique
+      no cabeçalho não faça milhares de chamadas Python a lessThan.
+    - Filtro: função que recebe a chave de busca pré-calculada de cada linha.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._filter_fn: Optional[Callable[[Any], bool]] = None
+
+    def set_filter_function(self, filter_fn: Optional[Callable[[Any], bool]]):
+        self._filter_fn = filter_fn
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent) -> bool:
+        if self._filter_fn is None:
+            return True
+        return self._filter_fn(self.sourceModel().search_key(source_row))
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+    # --- Atalhos usados pelas abas ---
+
+    def record_id_at(self, proxy_index: QModelIndex) -> Optional[str]:
+        if not proxy_index.isValid():
+            return None
+        return self.sourceModel().record_id(self.mapToSource(proxy_index).row())
+
+    def record_at(self, proxy_index: QModelIndex) -> Optional[Dict[str, Any]]:
+        if not proxy_index.isValid():
+            return None
+        return self.sourceModel().record(self.mapToSource(proxy_index).row())
+
+    def proxy_row_for_id(self, record_id: Optional[str]) -> int:
+        source_row = self.sourceModel().row_for_id(record_id)
+        if source_row < 0:
+            return -1
+        return self.mapFromSource(self.sourceModel().index(source_row, 0)).row()
+
+
+def configure_record_table_view(view: QTableView, proxy_model: RecordFilterProxyModel,
+                                sort_column: int = 0,
+                                sort_order=Qt.SortOrder.AscendingOrder):
+    """Configuração comum das tabelas das abas (seleção de linha única, sem edição, ordenável)."""
+    view.setModel(proxy_model)
+    view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+    view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+    view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+    view.horizontalHeader().setResizeContentsPrecision(RESIZE_CONTENTS_PRECISION)
+    view.setSortingEnabled(True)
+    view.sortByColumn(sort_column, sort_order)
+
+
+def selected_record_id(view: QTableView) -> Optional[str]:
+    """ID (ID_ROLE) da linha selecionada numa view configurada com configure_record_table_view."""
+    selection_model = view.selectionModel()
+    if selection_model is None:
+        return None
+    rows = selection_model.selectedRows()
+    if not rows:
+        return None
+    return view.model().record_id_at(rows[0])
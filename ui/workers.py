@@ -0,0 +1,266 @@
+# advocacia_app/ui/workers.py
+
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal, Slot, Qt
+from PySide6.QtWidgets import QWidget
+
+from config.constants import API_POOL_MAXSIZE, API_BACKGROUND_MAX_CONCURRENT
+from services.async_api import get_async_loop
+from services.scheduler import PRIORITY_SYNC, PRIORITY_VISIBLE, TaskPriority, is_background_priority, request_priority
+
+logger = logging.getLogger(__name__)
+
+_api_thread_pool: Optional[QThreadPool] = None
+_background_thread_pool: Optional[QThreadPool] = None
+
+def get_api_thread_pool(background: bool = False) -> QThreadPool:
+    """
+    Pool de threads dedicado às chamadas de API (dimensionado como o pool de conexões do ApiTransport).
+    Com background=True, o pool separado do prefetch e da sincronização: tarefas de fundo à espera de
+    vaga no RequestScheduler não ocupam as threads de que os pedidos interativos precisam.
+    """
+    global _api_thread_pool, _background_thread_pool
+    if background:
+        if _background_thread_pool is None:
+            _background_thread_pool = QThreadPool()
+            _background_thread_pool.setMaxThreadCount(API_BACKGROUND_MAX_CONCURRENT)
+        return _background_thread_pool
+    if _api_thread_pool is None:
+        _api_thread_pool = QThreadPool()
+        _api_thread_pool.setMaxThreadCount(API_POOL_MAXSIZE)
+    return _api_thread_pool
+
+
+class ApiWorkerSignals(QObject):
+    """Sinais do ApiWorker. Vive na thread da GUI, logo os slots conectados correm na GUI."""
+    result = Signal(object)
+    error = Signal(str)
+    finished = Signal()
+    progress = Signal(object, object) # (feito, total); object para não truncar contagens de bytes > 2 GB
+
+
+class ApiWorker(QRunnable):
+    """
+    Executa uma chamada de serviço (função bloqueante) numa thread do pool.
+    O resultado é entregue pelo sinal 'result' e exceções pelo sinal 'error'.
+    Se o worker for cancelado, nenhum dos dois é emitido (apenas 'finished').
+    Os pedidos feitos pela função usam a 'priority' do worker no RequestScheduler (promote() para a subir).
+    """
+
+    def __init__(self, fn: Callable[..., Any], *args: Any, priority: int = PRIORITY_VISIBLE, **kwargs: Any):
+        super().__init__()
+        self.fn = fn
+        self.priority = TaskPriority(priority)
+        self.pool: Optional[QThreadPool] = None # Pool onde foi agendado (a prioridade pode mudar depois)
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = ApiWorkerSignals()
+        self._cancelled = threading.Event()
+        self.setAutoDelete(False) # O BackgroundTaskRunner mantém a referência até 'finished'
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def promote(self, priority: int):
+        """Os pedidos seguintes da tarefa passam a ter esta prioridade (se for mais urgente)."""
+        self.priority.promote(priority)
+
+    def report_progress(self, done: Any, total: Any):
+        """Passado à função como 'progress_callback'; pode ser chamado na thread do pool."""
+        if not self.is_cancelled():
+            self.signals.progress.emit(done, total)
+
+    def run(self):
+        try:
+            if self.is_cancelled():
+                return
+            with request_priority(self.priority):
+                result = self.fn(*self.args, **self.kwargs)
+            if not self.is_cancelled():
+                self.signals.result.emit(result)
+        except Exception as e:
+            logger.exception("Erro em %s: %s", getattr(self.fn, '__name__', self.fn), e)
+            if not self.is_cancelled():
+                self.signals.error.emit(str(e))
+        finally:
+            self.signals.finished.emit()
+
+
+class AsyncApiTask:
+    """
+    Executa uma corrotina (ex: asyncio.gather sobre AsyncApiService) no loop asyncio da aplicação.
+    Mesmos sinais e mesma semântica de cancelamento do ApiWorker; 'finished' é sempre emitido,
+    mesmo que a corrotina seja cancelada antes de começar.
+    """
+
+    def __init__(self, coro_fn: Callable[..., Awaitable[Any]], *args: Any, priority: int = PRIORITY_VISIBLE, **kwargs: Any):
+        self.coro_fn = coro_fn
+        self.priority = TaskPriority(priority)
+        self.pool: Optional[QThreadPool] = None # Pool onde foi agendado (a prioridade pode mudar depois)
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = ApiWorkerSignals()
+        self._cancelled = threading.Event()
+        self._future: Optional[concurrent.futures.Future] = None
+
+    def start(self):
+        self._future = get_async_loop().submit(self._run_with_priority())
+        self._future.add_done_callback(self._on_done) # Corre na thread do loop; os sinais são entregues na GUI
+
+    async def _run_with_priority(self) -> Any:
+        # As tarefas filhas (gather) e as chamadas no executor herdam o contexto, e com ele a prioridade
+        with request_priority(self.priority):
+            return await self.coro_fn(*self.args, **self.kwargs)
+
+    def promote(self, priority: int):
+        self.priority.promote(priority)
+
+    def cancel(self):
+        self._cancelled.set()
+        if self._future is not None:
+            self._future.cancel()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def _on_done(self, future: concurrent.futures.Future):
+        try:
+            if future.cancelled() or self.is_cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                logger.error("Erro em %s: %s", getattr(self.coro_fn, '__name__', self.coro_fn), error, exc_info=error)
+                self.signals.error.emit(str(error))
+            else:
+                self.signals.result.emit(future.result())
+        finally:
+            self.signals.finished.emit()
+
+
+class BackgroundTaskRunner(QObject):
+    """
+    Ponto único para um widget disparar chamadas de API fora da thread da GUI.
+
+    - run(): agenda a função no pool e conecta callbacks de resultado/erro.
+    - key: tarefas com a mesma chave são "a mais recente vence"; a anterior é cancelada.
+    - on_progress: a função recebe o kwarg 'progress_callback' (chamável na thread do pool) e cada
+      chamada chega à GUI como on_progress(feito, total).
+    - run_async(): igual a run(), mas para uma função async (corre no loop asyncio; permite gather).
+    - priority: classe dos pedidos da tarefa no RequestScheduler (PRIORITY_INTERACTIVE para o que o
+      utilizador está à espera; PRIORITY_PREFETCH/PRIORITY_SYNC correm no pool de fundo, sem tirar
+      threads aos pedidos interativos). Também ordena as tarefas ainda na fila do QThreadPool.
+    - busy_widget: recebe o cursor de ocupado enquanto houver tarefas em curso
+      (substitui QApplication.setOverrideCursor, que bloqueava a janela inteira).
+    - cancel_all() é chamado automaticamente quando o widget dono é destruído.
+    """
+
+    def __init__(self, parent: QObject, busy_widget: Optional[QWidget] = None):
+        super().__init__(parent)
+        self.busy_widget = busy_widget
+        self._pool = get_api_thread_pool()
+        self._background_pool = get_api_thread_pool(background=True)
+        self._active: Dict[int, Union[ApiWorker, AsyncApiTask]] = {}
+        self._keyed: Dict[str, Union[ApiWorker, AsyncApiTask]] = {}
+        self._retired: List[Union[ApiWorker, AsyncApiTask]] = [] # Libertados só depois de 'finished' terminar de ser entregue
+        parent.destroyed.connect(self.cancel_all)
+
+    def run(self, fn: Callable[..., Any], *args: Any,
+            on_result: Optional[Callable[[Any], None]] = None,
+            on_error: Optional[Callable[[str], None]] = None,
+            on_finished: Optional[Callable[[], None]] = None,
+            on_progress: Optional[Callable[[Any, Any], None]] = None,
+            key: Optional[str] = None,
+            priority: int = PRIORITY_VISIBLE,
+            **kwargs: Any) -> ApiWorker:
+        worker = ApiWorker(fn, *args, priority=priority, **kwargs)
+        if on_progress:
+            worker.signals.progress.connect(on_progress)
+            worker.kwargs["progress_callback"] = worker.report_progress
+        # Na fila do QThreadPool, maior = primeiro (o inverso das classes do scheduler)
+        self._start(worker, on_result, on_error, on_finished, key,
+                    lambda: self._submit(worker, priority))
+        return worker
+
+    def run_async(self, coro_fn: Callable[..., Awaitable[Any]], *args: Any,
+                  on_result: Optional[Callable[[Any], None]] = None,
+                  on_error: Optional[Callable[[str], None]] = None,
+                  on_finished: Optional[Callable[[], None]] = None,
+                  key: Optional[str] = None,
+                  priority: int = PRIORITY_VISIBLE,
+                  **kwargs: Any) -> AsyncApiTask:
+        task = AsyncApiTask(coro_fn, *args, priority=priority, **kwargs)
+        self._start(task, on_result, on_error, on_finished, key, task.start)
+        return task
+
+    def _start(self, worker: Union[ApiWorker, AsyncApiTask],
+               on_result: Optional[Callable[[Any], None]], on_error: Optional[Callable[[str], None]],
+               on_finished: Optional[Callable[[], None]], key: Optional[str], start: Callable[[], None]):
+        if key is not None:
+            self.cancel(key)
+        if on_result:
+            worker.signals.result.connect(on_result)
+        if on_error:
+            worker.signals.error.connect(on_error)
+        if on_finished:
+            worker.signals.finished.connect(on_finished)
+        worker.signals.finished.connect(lambda worker_id=id(worker), k=key: self._on_worker_finished(worker_id, k))
+
+        self._active[id(worker)] = worker
+        if key is not None:
+            self._keyed[key] = worker
+        self._update_busy_cursor()
+        start()
+
+    def cancel(self, key: str):
+        """Cancela a tarefa em curso com esta chave (se ainda estiver na fila, nem chega a executar)."""
+        worker = self._keyed.pop(key, None)
+        if worker is not None:
+            self._discard(worker)
+
+    @Slot()
+    def cancel_all(self):
+        for worker in list(self._active.values()):
+            self._discard(worker)
+        self._keyed.clear()
+
+    def is_running(self, key: str) -> bool:
+        return key in self._keyed
+
+    def _discard(self, worker: Union[ApiWorker, AsyncApiTask]):
+        worker.cancel()
+        if isinstance(worker, ApiWorker) and worker.pool is not None and worker.pool.tryTake(worker):
+            # Retirado da fila antes de começar: 'finished' nunca será emitido
+            self._active.pop(id(worker), None)
+            self._update_busy_cursor()
+
+    def _submit(self, worker: ApiWorker, priority: int):
+        worker.pool = self._background_pool if is_background_priority(priority) else self._pool
+        worker.pool.start(worker, PRIORITY_SYNC - priority)
+
+    def _on_worker_finished(self, worker_id: int, key: Optional[str]):
+        worker = self._active.pop(worker_id, None)
+        if worker is not None:
+            if key is not None and self._keyed.get(key) is worker:
+                del self._keyed[key]
+            # Não destruir o emissor durante a própria emissão do sinal
+            self._retired.append(worker)
+            QTimer.singleShot(0, self._retired.clear)
+        self._update_busy_cursor()
+
+    def _update_busy_cursor(self):
+        if self.busy_widget is None:
+            return
+        try:
+            if self._active:
+                self.busy_widget.setCursor(Qt.CursorShape.BusyCursor)
+            else:
+                self.busy_widget.unsetCursor()
+        except RuntimeError: # Widget já destruído pelo Qt
+            self.busy_widget = None
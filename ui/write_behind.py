@@ -0,0 +1,261 @@
+# advocacia_app/ui/write_behind.py
+
+import random
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+
+from config.constants import OUTBOX_MAX_ATTEMPTS, OUTBOX_RETRY_BASE_SECONDS, OUTBOX_RETRY_MAX_SECONDS
+from database.outbox import MutationOutbox, OPERATION_CREATE, OPERATION_DELETE, OPERATION_UPDATE
+from services.scheduler import PRIORITY_SYNC
+from .workers import BackgroundTaskRunner
+
+# Prefixo das chaves provisórias de entidades criadas localmente (o ID definitivo vem da API)
+LOCAL_KEY_PREFIX = "local-"
+
+# Métodos dos serviços de API para cada entidade e operação
+ENTITY_OPERATIONS: Dict[str, Dict[str, str]] = {
+    "clients": {OPERATION_CREATE: "add_client", OPERATION_UPDATE: "update_client", OPERATION_DELETE: "delete_client"},
+    "processes": {OPERATION_CREATE: "add_process", OPERATION_UPDATE: "update_process", OPERATION_DELETE: "delete_process"},
+    "hearings": {OPERATION_CREATE: "add_hearing", OPERATION_UPDATE: "update_hearing", OPERATION_DELETE: "delete_hearing"},
+}
+
+
+def is_local_key(key: Optional[str]) -> bool:
+    return bool(key) and str(key).startswith(LOCAL_KEY_PREFIX)
+
+
+class WriteBehindQueue(QObject):
+    """
+    Gravação em segundo plano das alterações (criar/editar/remover) feitas nos diálogos e nas abas.
+
+    submit() aplica a alteração de imediato no EntityStore (atualização otimista, o diálogo fecha já),
+    regista-a na MutationOutbox (SQLite) e agenda o envio. Um único envio está em curso de cada vez,
+    pela ordem das alterações; falhas de rede/servidor são repetidas com backoff exponencial e as
+    recusas da API ficam como 'falhadas' até o utilizador tentar de novo ou descartar.
+    """
+    status_changed = Signal(int, int)  # (pendentes, falhadas)
+    mutation_failed = Signal(str)      # Mensagem da recusa definitiva
+
+    def __init__(self, outbox: MutationOutbox, user_id: str, entity_store, services: Dict[str, Any],
+                 parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.outbox = outbox
+        self.user_id = user_id
+        self.entity_store = entity_store
+        self.services = services # {"clients": ClientApiService, "processes": ..., "hearings": ...}
+        self.task_runner = BackgroundTaskRunner(self)
+        self._sending = False
+        self._stopped = False
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.timeout.connect(self._flush_next)
+
+        for entity, collection in self._collections().items():
+            collection.protected_keys_fn = lambda entity=entity: self.outbox.pending_keys(self.user_id, entity)
+
+        # Mutações que ficaram a meio no fecho anterior voltam à fila
+        self.outbox.recover_interrupted(self.user_id)
+        QTimer.singleShot(0, self._emit_status)
+        self._schedule_flush()
+
+    def _collections(self) -> Dict[str, Any]:
+        return {"clients": self.entity_store.clients, "processes": self.entity_store.processes,
+                "hearings": self.entity_store.hearings}
+
+    # --- Interface para diálogos e abas ---
+
+    def submit(self, entity: str, operation: str, entity_key: Optional[str] = None,
+               payload: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Aplica a alteração no EntityStore e enfileira-a para a API. Retorna a chave da entidade
+        (provisória, com LOCAL_KEY_PREFIX, para criações cujo ID é gerado pelo servidor).
+        """
+        collection = self._collections()[entity]
+        if operation == OPERATION_CREATE and not entity_key:
+            entity_key = f"{LOCAL_KEY_PREFIX}{uuid.uuid4().hex}"
+        entity_key = str(entity_key)
+
+        if operation == OPERATION_DELETE:
+            collection.remove(entity_key)
+            if entity == "processes": # A API remove as audiências do processo; não há nada a enviar para elas
+                process_hearings = [hearing for hearing in self.entity_store.hearings.items()
+                                    if str(hearing.get("process_id")) == entity_key]
+                for hearing in process_hearings:
+                    self.outbox.discard_pending(self.user_id, "hearings", hearing.get("hearing_id"))
+                    self.entity_store.hearings.remove(str(hearing.get("hearing_id")))
+        else:
+            record = dict(collection.get(entity_key) or {})
+            record.update(payload or {})
+            record[collection.key_field] = entity_key
+            collection.upsert(record)
+
+        self.outbox.enqueue(self.user_id, entity, operation, entity_key, payload)
+        print(f"WriteBehindQueue: {operation} de {entity} '{entity_key}' enfileirado.")
+        self._emit_status()
+        self._schedule_flush()
+        return entity_key
+
+    def retry_failed(self):
+        self.outbox.retry_failed(self.user_id)
+        self._emit_status()
+        self._schedule_flush()
+
+    def discard_failed(self):
+        """Descarta as alterações recusadas e repõe, a partir da API, as entidades afetadas."""
+        for mutation in self.outbox.discard_failed(self.user_id):
+            collection = self._collections().get(mutation["entity"])
+            if collection is None:
+                continue
+            if is_local_key(mutation["entity_key"]):
+                collection.remove(mutation["entity_key"]) # Nunca existiu na API
+            else:
+                collection.refresh_item(mutation["entity_key"])
+        self._emit_status()
+
+    def pending_response(self, entity: str, entity_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Registo local no formato de resposta da API ({"success": True, "<item>": {...}}) se a entidade
+        tem alterações por enviar; os diálogos e detalhes usam-no em vez de pedir à API uma versão antiga.
+        """
+        if not entity_key or not self.outbox.has_pending(self.user_id, entity, entity_key):
+            return None
+        collection = self._collections()[entity]
+        record = collection.get(str(entity_key))
+        if record is None:
+            return None
+        return {"success": True, collection.item_field: dict(record)}
+
+    def has_pending(self, entity: str, entity_key: Optional[str]) -> bool:
+        """A entidade tem alterações na outbox (pendentes, em envio ou recusadas)."""
+        return bool(entity_key) and self.outbox.has_pending(self.user_id, entity, str(entity_key))
+
+    def pending_count(self) -> int:
+        return self.outbox.counts(self.user_id)[0]
+
+    def stop(self):
+        """
+        Para os envios (logout). Uma mutação em envio fica marcada como tal e volta a pendente no
+        próximo login (recover_interrupted), podendo ser reenviada se a API já a tinha recebido.
+        """
+        self._flush_timer.stop()
+        self.task_runner.cancel_all()
+        self._stopped = True
+
+    # --- Envio ---
+
+    def _emit_status(self):
+        pending, failed = self.outbox.counts(self.user_id)
+        self.status_changed.emit(pending, failed)
+
+    def _schedule_flush(self, delay_seconds: float = 0.0):
+        if self._sending or self._stopped:
+            return
+        delay_ms = max(0, int(delay_seconds * 1000))
+        if self._flush_timer.isActive() and self._flush_timer.remainingTime() <= delay_ms:
+            return
+        self._flush_timer.start(delay_ms)
+
+    @Slot()
+    def _flush_next(self):
+        if self._sending or self._stopped:
+            return
+        mutation = self.outbox.next_due(self.user_id)
+        if mutation is None:
+            next_at = self.outbox.next_attempt_at(self.user_id)
+            if next_at is not None:
+                self._schedule_flush(next_at - time.time())
+            return
+        self._sending = True
+        self.outbox.mark_sending(mutation["id"])
+        self.task_runner.run(
+            self._send, mutation,
+            on_result=lambda response, m=mutation: self._on_sent(m, response),
+            on_error=lambda msg, m=mutation: self._on_sent(m, {"success": False, "message": msg}),
+            key="flush",
+            priority=PRIORITY_SYNC
+        )
+
+    def _send(self, mutation: Dict[str, Any]) -> Dict[str, Any]:
+        """Executado no pool: chama o método do serviço correspondente à mutação."""
+        entity, operation, key = mutation["entity"], mutation["operation"], mutation["entity_key"]
+        method = getattr(self.services[entity], ENTITY_OPERATIONS[entity][operation])
+        if operation == OPERATION_CREATE:
+            payload = dict(mutation["payload"] or {})
+            if is_local_key(key):
+                payload.pop(self._collections()[entity].key_field, None) # O ID é gerado pela API
+            return method(self.user_id, payload)
+        if operation == OPERATION_UPDATE:
+            return method(self.user_id, key, mutation["payload"] or {})
+        return method(self.user_id, key)
+
+    @staticmethod
+    def _is_transient_failure(response: Any) -> bool:
+        """Falhas de rede, timeouts e erros 5xx/408/429 valem nova tentativa; as restantes recusas não."""
+        if not isinstance(response, dict):
+            return True
+        status = response.get("http_status")
+        if status is None:
+            return True # Sem resposta HTTP (erro de comunicação)
+        return status >= 500 or status in (408, 429)
+
+    @staticmethod
+    def _is_repeated_delete_gone(mutation: Dict[str, Any], response: Any) -> bool:
+        """404 a um DELETE que já foi enviado antes: o envio anterior apagou o registo."""
+        return (mutation["operation"] == OPERATION_DELETE and mutation["attempts"] > 0
+                and isinstance(response, dict) and response.get("http_status") == 404)
+
+    def _on_sent(self, mutation: Dict[str, Any], response: Any):
+        self._sending = False
+        entity, key = mutation["entity"], mutation["entity_key"]
+        if self._is_repeated_delete_gone(mutation, response):
+            # A tentativa anterior foi aplicada mas a resposta perdeu-se: o registo já não existe
+            response = {"success": True}
+        if isinstance(response, dict) and response.get("success"):
+            self.outbox.complete(mutation["id"])
+            print(f"WriteBehindQueue: {mutation['operation']} de {entity} '{key}' confirmado pela API.")
+            if mutation["operation"] != OPERATION_DELETE:
+                self._apply_confirmed(entity, key, response)
+        else:
+            message = response.get("message", "Erro desconhecido.") if isinstance(response, dict) else str(response)
+            attempts = mutation["attempts"] + 1
+            if self._is_transient_failure(response) and attempts < OUTBOX_MAX_ATTEMPTS:
+                delay = min(OUTBOX_RETRY_BASE_SECONDS * (2 ** (attempts - 1)), OUTBOX_RETRY_MAX_SECONDS)
+                delay *= random.uniform(0.8, 1.2) # Evita que vários clientes repitam em simultâneo
+                self.outbox.reschedule(mutation["id"], attempts, time.time() + delay, message)
+                print(f"WriteBehindQueue: Falha ao enviar {entity} '{key}' (tentativa {attempts}); nova tentativa em {delay:.0f}s. {message}")
+            else:
+                self.outbox.mark_failed(mutation["id"], attempts, message)
+                print(f"WriteBehindQueue: Alteração de {entity} '{key}' recusada: {message}")
+                self.mutation_failed.emit(message)
+        self._emit_status()
+        self._schedule_flush()
+
+    def _apply_confirmed(self, entity: str, key: str, response: Dict[str, Any]):
+        """Após a criação/edição ser aceite: passa para o ID definitivo e relê o registo da API."""
+        collection = self._collections()[entity]
+        final_key = key
+        if is_local_key(key):
+            item = response.get(collection.item_field) if isinstance(response.get(collection.item_field), dict) else {}
+            final_key = str(response.get(collection.key_field) or item.get(collection.key_field) or "")
+            if not final_key:
+                collection.remove(key)
+                collection.invalidate() # A API não devolveu o ID: recarrega a lista
+                return
+            self._rekey(entity, key, final_key)
+        if not self.outbox.has_pending(self.user_id, entity, final_key):
+            collection.refresh_item(final_key)
+
+    def _rekey(self, entity: str, local_key: str, final_key: str):
+        collection = self._collections()[entity]
+        self.outbox.rekey(self.user_id, entity, local_key, final_key)
+        record = dict(collection.get(local_key) or {})
+        record[collection.key_field] = final_key
+        collection.upsert(record)
+        collection.remove(local_key)
+        if entity == "processes": # Audiências criadas localmente para o processo provisório
+            for hearing in self.entity_store.hearings.items():
+                if hearing.get("process_id") == local_key:
+                    self.entity_store.hearings.upsert(dict(hearing, process_id=final_key))